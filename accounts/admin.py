@@ -1,4 +1,41 @@
 from django.contrib import admin
-from .models import User
+from django.utils import timezone
+from .models import OutboxEmail, RevokedToken, User
 # Register your models here.
-admin.site.register(User)
+
+
+@admin.register(User)
+class UserAdmin(admin.ModelAdmin):
+    list_display = ['email', 'username', 'first_name', 'last_name', 'is_active', 'is_staff']
+    list_filter = ['is_active', 'is_staff']
+    search_fields = ['email', 'username']
+    actions = ['deactivate']
+
+    # Users whose wallets have ledger history cannot be deleted: the ledger
+    # is append-only and protects their wallets. Deactivate them instead.
+    @admin.action(description="Deactivate selected users")
+    def deactivate(self, request, queryset):
+        # Saved one by one so accounts.signals drops them from the JWT user
+        # cache; their tokens stop authenticating.
+        for user in queryset.filter(is_active=True):
+            user.is_active = False
+            user.save(update_fields=["is_active"])
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'recipients', 'status', 'attempts', 'next_attempt_at', 'date_sent']
+    list_filter = ['status']
+    actions = ['requeue']
+
+    @admin.action(description="Requeue selected emails")
+    def requeue(self, request, queryset):
+        queryset.update(status="pending", attempts=0, claimed_by=None, next_attempt_at=timezone.now())
+
+
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    list_display = ['jti', 'user', 'token_type', 'expires_at', 'date_created']
+    list_filter = ['token_type']
+    search_fields = ['jti', 'user__email']
+    raw_id_fields = ['user']
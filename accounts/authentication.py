@@ -0,0 +1,96 @@
+# Python imports
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+# Django imports
+from django.conf import settings
+
+# Third party imports
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+
+class UserCache:
+    """
+    Bounded, TTL-based in-process cache of authenticated users keyed by
+    (user id, token issue time). Entries are dropped when the user is saved
+    or deleted in this process (see accounts.signals); other workers pick
+    the change up within the TTL.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires < time.monotonic():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return user
+
+    def set(self, key, user):
+        with self._lock:
+            self._entries[key] = (user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            self._keys_by_user.setdefault(key[0], set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._pop(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in list(self._keys_by_user.get(str(user_id), ())):
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _pop(self, key):
+        self._entries.pop(key, None)
+        keys = self._keys_by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[key[0]]
+
+
+user_cache = UserCache(settings.JWT_USER_CACHE_SIZE, settings.JWT_USER_CACHE_TTL)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that rejects revoked tokens and resolves the user from
+    ``user_cache`` when it can.
+    """
+
+    def get_validated_token(self, raw_token):
+        # Imported here: accounts.revocation needs the app registry.
+        from accounts.revocation import revocation_filter
+
+        validated_token = super().get_validated_token(raw_token)
+        if revocation_filter.is_revoked(validated_token[api_settings.JTI_CLAIM]):
+            raise InvalidToken("Token has been revoked")
+        return validated_token
+
+    def get_user(self, validated_token):
+        key = (str(validated_token.get(api_settings.USER_ID_CLAIM)), validated_token.get("iat"))
+        user = user_cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(key, user)
+        # Each request gets its own instance so nothing it caches on the
+        # user leaks into other requests.
+        return copy.copy(user)
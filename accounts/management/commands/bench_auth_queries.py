@@ -0,0 +1,63 @@
+from django.db import connection
+from django.core.management.base import BaseCommand
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.authentication import CachedJWTAuthentication, user_cache
+from accounts.models import User
+from apexpay_core.benchmark import Timer, benchmark_database, summarize_latencies, write_report
+from transactions.models import Wallet
+
+ENDPOINTS = ["acc-balance", "transactions", "deposit-status", "withdraw-status", "total-deposit", "total-withdraw"]
+
+
+class Command(BaseCommand):
+    help = "Compare queries and latency per authenticated request with and without the cached JWT user lookup."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and mode.")
+        parser.add_argument("--output", help="Write the results as JSON to this path.")
+
+    def handle(self, *args, **options):
+        report = {}
+        with benchmark_database():
+            user = User.objects.create(email="bench-auth@example.com", username="bench-auth", is_active=True)
+            Wallet.objects.create(user=user)
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+            original = APIView.authentication_classes
+            try:
+                for mode, auth_class in (("uncached", JWTAuthentication), ("cached", CachedJWTAuthentication)):
+                    APIView.authentication_classes = [auth_class]
+                    user_cache.clear()
+                    report[mode] = self.run(client, options["requests"])
+            finally:
+                APIView.authentication_classes = original
+
+        for mode in ("uncached", "cached"):
+            for name, row in report[mode].items():
+                self.stdout.write(f"{mode:9} {name:16} queries/request={row['queries_per_request']:.2f} {row['latency']}")
+        if options["output"]:
+            write_report(options["output"], report)
+
+    def run(self, client, count):
+        results = {}
+        for name in ENDPOINTS:
+            url = reverse(name)
+            latencies = []
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(count):
+                    with Timer() as timer:
+                        response = client.get(url, secure=True)
+                    assert response.status_code == 200, response.content
+                    latencies.append(timer.elapsed)
+            results[name] = {
+                "queries_per_request": len(queries) / count,
+                "latency": summarize_latencies(latencies),
+            }
+        return results
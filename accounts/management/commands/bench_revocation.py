@@ -0,0 +1,85 @@
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.authentication import user_cache
+from accounts.models import RevokedToken, User
+from accounts.revocation import revocation_filter
+from apexpay_core.benchmark import Timer, benchmark_database, summarize_latencies, write_report
+
+
+class Command(BaseCommand):
+    help = "Measure JWT auth latency as the number of revoked tokens grows."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--revoked", default="0,100000,1000000",
+            help="Comma-separated revoked-token counts to measure at.",
+        )
+        parser.add_argument("--requests", type=int, default=500, help="Authenticated requests per level.")
+        parser.add_argument("--batch-size", type=int, default=20000)
+        parser.add_argument("--output", help="Write the results as JSON to this path.")
+
+    def handle(self, *args, **options):
+        levels = sorted(int(level) for level in options["revoked"].split(","))
+        report = {"levels": []}
+
+        with benchmark_database():
+            user = User.objects.create(email="bench-revoke@example.com", username="bench-revoke", is_active=True)
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+            url = reverse("profile")
+            expires_at = timezone.now() + timedelta(days=1)
+
+            for level in levels:
+                self.seed(level, expires_at, options["batch_size"])
+                user_cache.clear()
+                with Timer() as build:
+                    revocation_filter.refresh(force=True)
+
+                latencies = []
+                with CaptureQueriesContext(connection) as queries:
+                    for _ in range(options["requests"]):
+                        with Timer() as timer:
+                            response = client.get(url, secure=True)
+                        assert response.status_code == 200, response.content
+                        latencies.append(timer.elapsed)
+                lookups = sum('"RevokedTokens"' in query["sql"] for query in queries)
+
+                row = {
+                    "revoked": level,
+                    "filter_build_seconds": round(build.elapsed, 3),
+                    "filter_bytes": len(revocation_filter._filter.bits),
+                    "revocation_queries_per_request": lookups / options["requests"],
+                    "latency": summarize_latencies(latencies),
+                }
+                report["levels"].append(row)
+                self.stdout.write(str(row))
+
+            # A revoked token must still be rejected.
+            access = RefreshToken.for_user(user).access_token
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+            assert client.post(reverse("logout"), secure=True).status_code == 200
+            report["revoked_token_rejected"] = client.get(url, secure=True).status_code == 401
+
+        style = self.style.SUCCESS if report["revoked_token_rejected"] else self.style.ERROR
+        self.stdout.write(style(f"revoked token rejected: {report['revoked_token_rejected']}"))
+        if options["output"]:
+            write_report(options["output"], report)
+
+    def seed(self, target, expires_at, batch_size):
+        existing = RevokedToken.objects.count()
+        while existing < target:
+            size = min(batch_size, target - existing)
+            RevokedToken.objects.bulk_create(
+                RevokedToken(jti=uuid.uuid4().hex, token_type="access", expires_at=expires_at)
+                for _ in range(size)
+            )
+            existing += size
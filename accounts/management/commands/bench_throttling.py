@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from accounts.models import User
+from apexpay_core.benchmark import Timer, benchmark_database, write_report
+from apexpay_core.throttling import get_backend
+from transactions.views import DepositView
+
+# Rates high enough that every call in the microbenchmark is allowed.
+UNLIMITED = {"deposit.user": "1000000000/s", "deposit.ip": "1000000000/s", "deposit.endpoint": "1000000000/s"}
+
+
+class Command(BaseCommand):
+    help = "Measure per-request throttle overhead for each backend and check bursts are cut off with Retry-After."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=100000, help="Throttle checks per backend.")
+        parser.add_argument("--burst", type=int, default=30, help="Login attempts fired in the burst check.")
+        parser.add_argument("--output", help="Write the results as JSON to this path.")
+
+    def handle(self, *args, **options):
+        rates = dict(settings.THROTTLE_RATES)
+        report = {"overhead": {}, "burst": {}}
+
+        for backend in ("local", "cache"):
+            with override_settings(THROTTLE_BACKEND=backend, THROTTLE_RATES=UNLIMITED):
+                report["overhead"][backend] = self.overhead(options["iterations"])
+        with override_settings(THROTTLE_RATES={}):
+            report["overhead"]["unthrottled"] = self.overhead(options["iterations"])
+
+        with benchmark_database():
+            User.objects.create(email="bench-throttle@example.com", username="bench-throttle", is_active=True)
+            for backend in ("local", "cache"):
+                with override_settings(THROTTLE_BACKEND=backend, THROTTLE_RATES=rates):
+                    get_backend().clear()
+                    report["burst"][backend] = self.burst(options["burst"])
+
+        for name, row in report["overhead"].items():
+            self.stdout.write(f"{name:12} {row['us_per_request']:.2f} us/request over {row['iterations']} checks")
+        for name, row in report["burst"].items():
+            self.stdout.write(f"{name:12} burst of {row['attempts']}: {row['allowed']} allowed, {row['throttled']} throttled, Retry-After={row['retry_after']}")
+        self.stdout.write(self.style.SUCCESS("Done"))
+        if options["output"]:
+            write_report(options["output"], report)
+
+    def overhead(self, iterations):
+        """Time the full throttle stack DRF runs before a deposit reaches the handler."""
+        user = User(pk=1, email="bench-throttle@example.com")
+        raw = APIRequestFactory().post("/api/v1/deposit/", {"amount": 1}, format="json", REMOTE_ADDR="10.0.0.1")
+        force_authenticate(raw, user=user)
+        view = DepositView()
+        request = view.initialize_request(raw)
+        request.user
+        get_backend().clear()
+
+        with Timer() as timer:
+            for _ in range(iterations):
+                view.check_throttles(request)
+        return {"iterations": iterations, "us_per_request": timer.elapsed / iterations * 1e6}
+
+    def burst(self, attempts):
+        client = APIClient()
+        url = reverse("login")
+        codes = []
+        retry_after = None
+        for _ in range(attempts):
+            response = client.post(
+                url, {"email": "bench-throttle@example.com", "password": "wrong"},
+                format="json", secure=True, REMOTE_ADDR="10.0.0.2",
+            )
+            codes.append(response.status_code)
+            if response.status_code == 429 and retry_after is None:
+                retry_after = response.headers.get("Retry-After")
+        return {
+            "attempts": attempts,
+            "allowed": sum(code != 429 for code in codes),
+            "throttled": codes.count(429),
+            "retry_after": retry_after,
+        }
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.models import RevokedToken
+
+
+class Command(BaseCommand):
+    help = "Delete revoked tokens that have expired and no longer need to be rejected."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        deleted = 0
+        while True:
+            ids = list(
+                RevokedToken.objects.filter(expires_at__lte=now)
+                .values_list("pk", flat=True)[:options["batch_size"]]
+            )
+            if not ids:
+                break
+            deleted += RevokedToken.objects.filter(pk__in=ids).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} expired revoked tokens"))
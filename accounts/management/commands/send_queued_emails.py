@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.services import claim_outbox, deliver_outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver queued outbox emails in batches over one reused mail connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of exiting when the outbox is drained.")
+        parser.add_argument("--sleep", type=float, default=5.0, help="Seconds to wait between polls in --loop mode.")
+        parser.add_argument("--lease", type=int, default=300, help="Seconds a claimed batch stays reserved for this dispatcher.")
+
+    def handle(self, *args, **options):
+        totals = {"sent": 0, "retried": 0, "dead": 0}
+
+        while True:
+            emails = claim_outbox(options["batch_size"], lease_seconds=options["lease"])
+            if not emails:
+                if not options["loop"]:
+                    break
+                time.sleep(options["sleep"])
+                continue
+
+            started = time.perf_counter()
+            sent, retried, dead = deliver_outbox(emails)
+            totals["sent"] += sent
+            totals["retried"] += retried
+            totals["dead"] += dead
+
+            self.stdout.write(
+                f"Batch of {len(emails)} in {time.perf_counter() - started:.2f}s: "
+                f"{sent} sent, {retried} to retry, {dead} dead-lettered"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {totals['sent']} sent, {totals['retried']} to retry, {totals['dead']} dead-lettered"
+        ))
@@ -1,6 +1,7 @@
 # Django imports
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser,PermissionsMixin
+from django.utils import timezone
 
 # App imports
 from accounts.manager import CustomUserManager
@@ -28,3 +29,54 @@ class User(AbstractBaseUser,PermissionsMixin):
     class Meta:
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+
+
+outbox_status = [
+    ("pending", "PENDING"),
+    ("sent", "SENT"),
+    ("dead", "DEAD"),
+]
+
+
+class OutboxEmail(models.Model):
+    # Written in the same DB transaction as the user change that triggers it
+    # and delivered later by `manage.py send_queued_emails`.
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=outbox_status, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_by = models.CharField(max_length=100, null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_sent = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return "{} - {} - {}".format(", ".join(self.recipients), self.subject, self.status)
+
+    class Meta:
+        verbose_name = 'Outbox email'
+        verbose_name_plural = 'Outbox emails'
+        indexes = [
+            models.Index(fields=['next_attempt_at'], condition=models.Q(status='pending'), name='outbox_due_idx'),
+        ]
+
+
+class RevokedToken(models.Model):
+    # Revoked JWTs, checked through the bloom filter in accounts.revocation.
+    # Rows are only needed until the token would have expired anyway.
+    jti = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name="revoked_tokens")
+    token_type = models.CharField(max_length=20)
+    expires_at = models.DateTimeField(db_index=True)
+    date_created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return "{} - {}".format(self.jti, self.token_type)
+
+    class Meta:
+        db_table = 'RevokedTokens'
+        verbose_name = 'Revoked token'
+        verbose_name_plural = 'Revoked tokens'
@@ -0,0 +1,149 @@
+# Python imports
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+
+# Django imports
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+# Third party imports
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+# App imports
+from accounts.models import RevokedToken
+
+# New revocations are read back with this much overlap so a row that
+# committed late (with an older date_created) is still picked up.
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings using double hashing."""
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        added = False
+        for position in self._positions(value):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not self.bits[byte] & mask:
+                self.bits[byte] |= mask
+                added = True
+        # Re-adding a value (or a false positive) leaves the count alone.
+        self.count += added
+
+    def __contains__(self, value):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class RevocationFilter:
+    """
+    Per-worker view of the RevokedToken table. ``is_revoked`` only touches
+    the database when the bloom filter reports a possible match.
+    """
+
+    def __init__(self):
+        self._filter = None
+        self._high_water = None
+        self._refreshed = 0.0
+        self._rebuilt = 0.0
+        self._lock = threading.Lock()
+
+    def is_revoked(self, jti):
+        self.refresh()
+        bloom = self._filter
+        if bloom is not None and jti not in bloom:
+            return False
+        # A possible hit, or no filter built yet.
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def add(self, jti):
+        if self._filter is not None:
+            self._filter.add(jti)
+
+    def refresh(self, force=False):
+        """
+        Pull in new revocations (or rebuild) when due. The work runs on a
+        background thread so requests never wait on it; ``force`` runs a
+        full rebuild synchronously.
+        """
+        if force:
+            with self._lock:
+                self._rebuild()
+                self._refreshed = time.monotonic()
+            return
+
+        if self._filter is not None and time.monotonic() - self._refreshed < settings.REVOCATION_REFRESH_SECONDS:
+            return
+        if not self._lock.acquire(blocking=False):
+            return
+        threading.Thread(target=self._refresh_in_background, daemon=True).start()
+
+    def _refresh_in_background(self):
+        try:
+            if self._filter is None or time.monotonic() - self._rebuilt >= settings.REVOCATION_REBUILD_SECONDS:
+                self._rebuild()
+            else:
+                self._load_new()
+        finally:
+            self._refreshed = time.monotonic()
+            self._lock.release()
+            connection.close()
+
+    def _rebuild(self):
+        active = RevokedToken.objects.filter(expires_at__gt=timezone.now())
+        capacity = max(settings.REVOCATION_BLOOM_CAPACITY, 2 * active.count())
+        bloom = BloomFilter(capacity, settings.REVOCATION_BLOOM_ERROR_RATE)
+        high_water = None
+        for jti, date_created in active.values_list("jti", "date_created").iterator(chunk_size=10000):
+            bloom.add(jti)
+            if high_water is None or date_created > high_water:
+                high_water = date_created
+        self._filter = bloom
+        self._high_water = high_water or timezone.now()
+        self._rebuilt = time.monotonic()
+
+    def _load_new(self):
+        rows = RevokedToken.objects.filter(date_created__gte=self._high_water - REFRESH_OVERLAP)
+        for jti, date_created in rows.values_list("jti", "date_created").iterator(chunk_size=10000):
+            self._filter.add(jti)
+            if date_created > self._high_water:
+                self._high_water = date_created
+        # Past its capacity the filter's false-positive rate climbs; size it
+        # again on the next refresh.
+        if self._filter.count > self._filter.capacity:
+            self._rebuilt = 0.0
+
+
+revocation_filter = RevocationFilter()
+
+
+def revoke_token(token, user=None):
+    """Revoke a validated simplejwt token until it expires."""
+    jti = token["jti"]
+    RevokedToken.objects.get_or_create(
+        jti=jti,
+        defaults={
+            "user": user,
+            "token_type": token.get("token_type", ""),
+            "expires_at": datetime_from_epoch(token["exp"]),
+        },
+    )
+    revocation_filter.add(jti)
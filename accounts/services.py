@@ -1,8 +1,115 @@
+# Python imports
+import uuid
+from datetime import timedelta
+
+# Django imports
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
 # Apps import
+from accounts.models import OutboxEmail
 from transactions.models import Wallet
+from transactions.services import ensure_wallet
+
+
+class EmailNotSent(Exception):
+	pass
+
+
+def create_user_wallet(user, currency=None):
+	# Upsert: a deposit racing the activation may already have created it.
+	currency = currency or settings.DEFAULT_CURRENCY
+	ensure_wallet(user.pk, currency)
+	return Wallet.objects.get(user=user, currency=currency)
+
+
+def queue_email(subject, message, recipient_list, from_email=None):
+	# Call inside the atomic block that changes the user, so the email only
+	# exists if that change committed.
+	return OutboxEmail.objects.create(
+		subject=subject,
+		body=message,
+		from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+		recipients=list(recipient_list),
+	)
+
+
+def claim_outbox(batch_size, lease_seconds=300):
+	"""
+	Claim up to ``batch_size`` due emails. The claim pushes next_attempt_at
+	out by the lease, so emails claimed by a dispatcher that crashed become
+	due again on their own.
+	"""
+	now = timezone.now()
+	token = uuid.uuid4().hex
+	candidates = list(
+		OutboxEmail.objects.filter(status="pending", next_attempt_at__lte=now)
+		.order_by("next_attempt_at")
+		.values_list("pk", flat=True)[:batch_size]
+	)
+	OutboxEmail.objects.filter(pk__in=candidates, status="pending", next_attempt_at__lte=now).update(
+		claimed_by=token, next_attempt_at=now + timedelta(seconds=lease_seconds)
+	)
+	return list(OutboxEmail.objects.filter(pk__in=candidates, claimed_by=token).order_by("pk"))
+
+
+def deliver_outbox(emails, max_attempts=None, backoff_seconds=None):
+	"""
+	Send ``emails`` over one reused backend connection. Failures are retried
+	with exponential backoff and dead-lettered after ``max_attempts``.
+	Returns (sent, retried, dead) counts.
+	"""
+	max_attempts = max_attempts or settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+	backoff_seconds = backoff_seconds or settings.EMAIL_OUTBOX_BACKOFF_SECONDS
+	sent, failed = [], []
+
+	connection = get_connection(fail_silently=False)
+	try:
+		connection.open()
+	except Exception as exc:
+		failed = [(email, exc) for email in emails]
+		emails = []
+
+	for email in emails:
+		message = EmailMessage(email.subject, email.body, email.from_email, email.recipients, connection=connection)
+		try:
+			delivered = connection.send_messages([message])
+		except Exception as exc:
+			failed.append((email, exc))
+			# The server may have dropped us; carry on over a fresh
+			# connection.
+			connection.close()
+			try:
+				connection.open()
+			except Exception:
+				pass
+		else:
+			if delivered:
+				sent.append(email.pk)
+			else:
+				# Nothing went out (e.g. no valid recipients): retry and
+				# eventually dead-letter it rather than mark it sent.
+				failed.append((email, EmailNotSent("The backend sent no message")))
+	connection.close()
+
+	now = timezone.now()
+	if sent:
+		OutboxEmail.objects.filter(pk__in=sent).update(status="sent", date_sent=now, claimed_by=None)
 
-def create_user_wallet(user):
-	wallet = Wallet.objects.create(user=user)
-	wallet.save()
-	return wallet
+	dead = 0
+	for email, exc in failed:
+		email.attempts += 1
+		email.last_error = "{}: {}".format(type(exc).__name__, exc)
+		email.claimed_by = None
+		if email.attempts >= max_attempts:
+			email.status = "dead"
+			dead += 1
+		else:
+			email.next_attempt_at = now + timedelta(seconds=backoff_seconds * 2 ** (email.attempts - 1))
+	OutboxEmail.objects.bulk_update(
+		[email for email, _ in failed],
+		["attempts", "last_error", "claimed_by", "status", "next_attempt_at"],
+	)
 
+	return len(sent), len(failed) - dead, dead
@@ -0,0 +1,13 @@
+# Django imports
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+# App imports
+from accounts.authentication import user_cache
+from accounts.models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_cache.invalidate_user(instance.pk)
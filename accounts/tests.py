@@ -1,3 +1,149 @@
-from django.test import TestCase
+# Python imports
+from unittest import mock
 
-# Create your tests here.
+# Django imports
+from django.conf import settings
+from django.core import mail
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+# App imports
+from accounts.authentication import user_cache
+from accounts.models import OutboxEmail, User
+from accounts.services import claim_outbox, deliver_outbox, queue_email
+from apexpay_core.throttling import TokenBucketThrottle
+
+# rest_framework imports
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+PASSWORD = "Sup3r-secret!"
+
+
+def make_user(email="ada@example.com", **extra):
+    return User.objects.create_user(
+        email=email, username=email.split("@")[0], password=PASSWORD,
+        first_name="Ada", last_name="Lovelace", mobile="0800", **extra,
+    )
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, THROTTLE_RATES={})
+class OutboxTests(TestCase):
+    def test_register_queues_the_activation_email_instead_of_sending_it(self):
+        response = APIClient().post(reverse("register"), {
+            "email": "new@example.com", "username": "new", "password": PASSWORD,
+            "first_name": "New", "last_name": "User",
+        }, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(mail.outbox, [])
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.recipients, ["new@example.com"])
+        self.assertIn("/api/v1/auth/confirm-email/", email.body)
+
+    def test_delivery_sends_and_marks_emails_sent(self):
+        queue_email("Hello", "Body", ["ada@example.com"])
+
+        self.assertEqual(deliver_outbox(claim_outbox(10)), (1, 0, 0))
+
+        self.assertEqual(mail.outbox[0].to, ["ada@example.com"])
+        self.assertEqual(OutboxEmail.objects.get().status, "sent")
+
+    def test_email_the_backend_did_not_send_is_retried(self):
+        queue_email("Hello", "Body", ["ada@example.com"])
+
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", return_value=0):
+            self.assertEqual(deliver_outbox(claim_outbox(10)), (0, 1, 0))
+
+        email = OutboxEmail.objects.get()
+        self.assertEqual((email.status, email.attempts), ("pending", 1))
+        self.assertIn("EmailNotSent", email.last_error)
+
+    def test_failing_email_is_dead_lettered_after_the_last_attempt(self):
+        queue_email("Hello", "Body", ["ada@example.com"])
+
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=OSError("down")):
+            self.assertEqual(deliver_outbox(claim_outbox(10), max_attempts=1), (0, 0, 1))
+
+        self.assertEqual(OutboxEmail.objects.get().status, "dead")
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, THROTTLE_RATES={})
+class TokenTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = make_user()
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post(reverse("login"), {"email": self.user.email, "password": PASSWORD}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return response.data["data"]
+
+    def test_logout_revokes_the_access_and_refresh_tokens(self):
+        tokens = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(self.client.get(reverse("profile")).status_code, 200)
+
+        response = self.client.post(reverse("logout"), {"refresh": tokens["refresh"]}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(reverse("profile")).status_code, 401)
+        self.assertEqual(self.user.revoked_tokens.count(), 2)
+
+    def test_deactivated_user_is_dropped_from_the_user_cache(self):
+        tokens = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(self.client.get(reverse("profile")).status_code, 200)
+
+        admin = make_user("root@example.com", is_superuser=True)
+        browser = Client()
+        browser.force_login(admin)
+        browser.post(reverse("admin:accounts_user_changelist"), {"action": "deactivate", "_selected_action": [self.user.pk]})
+
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(self.client.get(reverse("profile")).status_code, 401)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ThrottleTests(TestCase):
+    def login(self, email, **headers):
+        return APIClient().post(reverse("login"), {"email": email, "password": "wrong"}, format="json", **headers)
+
+    @override_settings(THROTTLE_RATES={"login.user": "2/min"})
+    def test_login_attempts_per_account_are_limited(self):
+        statuses = [self.login("ada@example.com").status_code for _ in range(3)]
+
+        self.assertEqual(statuses, [401, 401, 429])
+        self.assertEqual(self.login("grace@example.com").status_code, 401)
+
+    @override_settings(THROTTLE_RATES={"login.user": "2/min"})
+    def test_failed_logins_from_one_address_do_not_lock_the_account_elsewhere(self):
+        statuses = [self.login("ada@example.com", REMOTE_ADDR="198.51.100.1").status_code for _ in range(3)]
+
+        self.assertEqual(statuses, [401, 401, 429])
+        self.assertEqual(self.login("ada@example.com", REMOTE_ADDR="198.51.100.2").status_code, 401)
+
+    @override_settings(THROTTLE_RATES={"login.ip": "2/min"}, REST_FRAMEWORK={**settings.REST_FRAMEWORK, "NUM_PROXIES": 1})
+    def test_rotating_forwarded_for_does_not_escape_the_ip_bucket(self):
+        statuses = [
+            self.login(f"user{n}@example.com", HTTP_X_FORWARDED_FOR=f"10.0.0.{n}, 203.0.113.7").status_code
+            for n in range(3)
+        ]
+
+        self.assertEqual(statuses, [401, 401, 429])
+
+    @override_settings(THROTTLE_RATES={"batch.user": "1/min"})
+    def test_batches_are_limited_like_single_transactions(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(make_user()).access_token}")
+        payload = {"transactions": [{"transaction_type": "deposit", "amount": 10}]}
+
+        statuses = [client.post(reverse("transactions-batch"), payload, format="json").status_code for _ in range(2)]
+
+        self.assertEqual(statuses, [200, 429])
+
+    def test_bucket_throttles_must_name_their_bucket(self):
+        with self.assertRaises(TypeError):
+            TokenBucketThrottle()
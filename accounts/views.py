@@ -1,5 +1,5 @@
 # Django imports
-from django.core.mail import send_mail
+from django.db import transaction
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_str, force_bytes
 from django.contrib.auth import logout
@@ -7,7 +7,8 @@ from django.contrib.auth.hashers import check_password
 from django.conf import settings
 
 # App imports
-from accounts.services import create_user_wallet
+from accounts.revocation import revoke_token
+from accounts.services import create_user_wallet, queue_email
 from accounts.tokens import account_activation_token
 from accounts.serializers import (
     ResetSerializer,
@@ -15,15 +16,16 @@ from accounts.serializers import (
     LoginSerializer,
     ResetPasswordSeriliazer
 )
+from accounts.authentication import CachedJWTAuthentication
 from accounts.models import User
 
 # rest_framework imports
 from rest_framework.response import Response
 from rest_framework.generics import GenericAPIView
 from rest_framework import status
+from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
 
 
 # -------------------------------------------------------------------------
@@ -32,6 +34,7 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 
 class Register(GenericAPIView):
     serializer_class = UserSerailizer
+    throttle_scope = "register"
     
     def post(self, request, format='json'):
         # Check existing user
@@ -44,27 +47,28 @@ class Register(GenericAPIView):
 
         serializer = self.serializer_class(data=request.data)
         if serializer.is_valid(raise_exception=True):
-            user = serializer.save()
-            user.is_active = False
-            user.save()
-
-            # ⭐ BUILD ACTIVATION LINK USING settings.SITE_DOMAIN ⭐
-            activation_link = (
-                f"{settings.SITE_DOMAIN}/api/v1/auth/confirm-email/"
-                f"{urlsafe_base64_encode(force_bytes(str(user.pk)))}/"
-                f"{account_activation_token.make_token(user)}"
-            )
+            with transaction.atomic():
+                user = serializer.save()
+                user.is_active = False
+                user.save()
+
+                # ⭐ BUILD ACTIVATION LINK USING settings.SITE_DOMAIN ⭐
+                activation_link = (
+                    f"{settings.SITE_DOMAIN}/api/v1/auth/confirm-email/"
+                    f"{urlsafe_base64_encode(force_bytes(str(user.pk)))}/"
+                    f"{account_activation_token.make_token(user)}"
+                )
 
-            subject = "Activate your account"
-            message = (
-                f"Hi, {user.first_name} {user.last_name}!\n\n"
-                "Please click the link below to activate your account:\n\n"
-                f"{activation_link}\n\n"
-                "Thank you for using our application!"
-            )
+                subject = "Activate your account"
+                message = (
+                    f"Hi, {user.first_name} {user.last_name}!\n\n"
+                    "Please click the link below to activate your account:\n\n"
+                    f"{activation_link}\n\n"
+                    "Thank you for using our application!"
+                )
 
-            from_email = settings.EMAIL_HOST_USER or "no-reply@example.com"
-            send_mail(subject, message, from_email, [user.email])
+                from_email = settings.EMAIL_HOST_USER or "no-reply@example.com"
+                queue_email(subject, message, [user.email], from_email)
 
             return Response(
                 {"message": "User created successfully. Check your email."},
@@ -83,6 +87,7 @@ class Register(GenericAPIView):
 
 class Login(GenericAPIView):
     serializer_class = LoginSerializer
+    throttle_scope = "login"
 
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data)
@@ -155,7 +160,7 @@ class ResendActivationLink(GenericAPIView):
         )
 
         from_email = settings.EMAIL_HOST_USER or "no-reply@example.com"
-        send_mail(subject, message, from_email, [user.email])
+        queue_email(subject, message, [user.email], from_email)
 
         return Response({"message": "Email sent"}, status=status.HTTP_200_OK)
 
@@ -191,6 +196,7 @@ class ActivateEmail(GenericAPIView):
 
 class ResetPassword(GenericAPIView):
     serializer_class = ResetSerializer
+    throttle_scope = "password_reset"
 
     def get(self, request, email):
         try:
@@ -218,7 +224,7 @@ class ResetPassword(GenericAPIView):
         )
 
         from_email = settings.EMAIL_HOST_USER or "no-reply@example.com"
-        send_mail(subject, message, from_email, [user.email])
+        queue_email(subject, message, [user.email], from_email)
 
         return Response({"message": "Check your mail to reset your password"}, status=status.HTTP_200_OK)
 
@@ -257,8 +263,24 @@ class Logout(GenericAPIView):
     swagger_schema = None
     swagger_fake_view = True
     serializer_class = None
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
 
     def post(self, request):
+        refresh = None
+        if request.data.get("refresh"):
+            try:
+                refresh = RefreshToken(request.data["refresh"])
+            except TokenError:
+                return Response({"message": "Invalid refresh token"}, status=status.HTTP_400_BAD_REQUEST)
+            if str(refresh.get("user_id")) != str(request.user.pk):
+                return Response({"message": "Invalid refresh token"}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            revoke_token(request.auth, user=request.user)
+            if refresh is not None:
+                revoke_token(refresh, user=request.user)
+
         logout(request)
         return Response({"message": "Logout Successful"}, status=status.HTTP_200_OK)
 
@@ -271,7 +293,7 @@ class Profile(GenericAPIView):
     swagger_schema = None
     swagger_fake_view = True
     serializer_class = None
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -12,6 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'apexpay_core.settings')
+# Under ASGI the read-only transaction endpoints run on the async ORM.
+os.environ.setdefault('ASYNC_READ_VIEWS', 'True')
 
 
 
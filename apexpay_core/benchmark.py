@@ -0,0 +1,206 @@
+"""
+Helpers shared by the ``bench_*`` management commands.
+
+Benchmarks never touch the configured database: they run against a
+throwaway copy created the same way the test runner does it. On SQLite the
+copy is file-backed so worker threads and processes can share it. Rate
+limits are switched off inside it, since benchmarks call endpoints far faster
+than any real client; ``bench_throttling`` turns them back on itself.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import connections
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+
+@contextmanager
+def benchmark_database(alias="default"):
+    connection = connections[alias]
+    test_settings = connection.settings_dict.setdefault("TEST", {})
+    old_test_name = test_settings.get("NAME")
+    tmpdir = None
+
+    if connection.vendor == "sqlite":
+        tmpdir = tempfile.mkdtemp(prefix="apexpay-bench-")
+        test_settings["NAME"] = os.path.join(tmpdir, "bench.sqlite3")
+        connection.settings_dict.setdefault("OPTIONS", {}).setdefault("timeout", 30)
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    # Replicas mirror the benchmark database, as they do under the test runner.
+    mirrors = {
+        other.alias: other.settings_dict["NAME"]
+        for other in connections.all()
+        if other.settings_dict.get("TEST", {}).get("MIRROR") == alias
+    }
+    for mirror in mirrors:
+        connections[mirror].close()
+        connections[mirror].creation.set_as_test_mirror(connection.settings_dict)
+    try:
+        with override_settings(THROTTLE_RATES={}):
+            yield connection
+    finally:
+        for mirror, name in mirrors.items():
+            connections[mirror].close()
+            connections[mirror].settings_dict["NAME"] = name
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        test_settings["NAME"] = old_test_name
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+@contextmanager
+def explicit_timestamps(model):
+    """Let bulk_create keep caller-supplied auto_now / auto_now_add values."""
+    fields = [f for f in model._meta.concrete_fields if getattr(f, "auto_now", False) or getattr(f, "auto_now_add", False)]
+    saved = [(f, f.auto_now, f.auto_now_add) for f in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize_latencies(latencies):
+    """Latencies are in seconds, the summary is in milliseconds."""
+    if not latencies:
+        return {"count": 0}
+    return {
+        "count": len(latencies),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3),
+    }
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        return False
+
+
+def write_report(path, report):
+    with open(path, "w") as fh:
+        json.dump(report, fh, indent=2, default=str)
+
+
+# -----------------------------------------------------------------------------
+# Benchmarks against a real server process
+# -----------------------------------------------------------------------------
+
+SERVERS = {
+    "wsgi": lambda port, workers: [
+        sys.executable, "-m", "gunicorn", "apexpay_core.wsgi:application",
+        "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--log-level", "warning",
+    ],
+    "asgi": lambda port, workers: [
+        sys.executable, "-m", "uvicorn", "apexpay_core.asgi:application",
+        "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+        "--log-level", "warning", "--no-access-log",
+    ],
+}
+
+
+def database_url(connection):
+    """URL of the benchmark database, for the server subprocesses."""
+    db = connection.settings_dict
+    if connection.vendor == "sqlite":
+        return f"sqlite:///{db['NAME']}"
+    if connection.vendor == "postgresql":
+        auth = f"{quote(db['USER'] or '')}:{quote(db['PASSWORD'] or '')}@" if db["USER"] else ""
+        return f"postgres://{auth}{db['HOST'] or 'localhost'}:{db['PORT'] or 5432}/{db['NAME']}"
+    raise CommandError(f"Unsupported database vendor {connection.vendor}")
+
+
+@contextmanager
+def run_server(mode, port, workers, env):
+    """Serve the project with ``mode``'s server until the block exits."""
+    server = subprocess.Popen(SERVERS[mode](port, workers), cwd=settings.BASE_DIR, env=env)
+    try:
+        asyncio.run(wait_until_ready(port, server))
+        yield server
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+async def wait_until_ready(port, server, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise CommandError("Server exited during startup")
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise CommandError("Server did not start in time")
+
+
+async def http_request(reader, writer, method, path, token=None, body=None):
+    """
+    Minimal HTTP/1.1 keep-alive request, with ``body`` sent as JSON.
+    Returns (status, connection reusable, response body).
+    """
+    payload = json.dumps(body).encode() if body is not None else b""
+    head = f"{method} {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nX-Forwarded-Proto: https\r\nAccept: application/json\r\n"
+    if token:
+        head += f"Authorization: Bearer {token}\r\n"
+    if body is not None:
+        head += f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+    writer.write(head.encode() + b"\r\n" + payload)
+    await writer.drain()
+
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+
+    if "content-length" in headers:
+        content = await reader.readexactly(int(headers["content-length"]))
+    elif headers.get("transfer-encoding", "").lower() == "chunked":
+        chunks = []
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            chunks.append((await reader.readexactly(size + 2))[:size])
+            if size == 0:
+                break
+        content = b"".join(chunks)
+    else:
+        return status, False, await reader.read()
+    return status, headers.get("connection", "").lower() != "close", content
@@ -0,0 +1,94 @@
+"""
+Primary / read-replica routing.
+
+Every query goes to ``default`` (the primary) unless the current request has
+opted in to replica reads with ``allow_replica_reads``. The routing state is
+per request, held in a context variable that ``ReplicaRoutingMiddleware``
+sets up, so it follows the request into ``sync_to_async`` threads. A
+request reads from one replica throughout: its ETag and its body, or the
+queries of one page, must not see replicas at different lag.
+
+Read-after-write: once a request writes, the rest of it reads from the
+primary, and the middleware marks the user as sticky for
+``REPLICA_STICKY_SECONDS`` so their next reads don't hit a replica that has
+not caught up yet. The mark lives in the ``REPLICA_STICKY_CACHE_ALIAS``
+cache, which must be shared by every worker for the window to hold across
+them.
+"""
+
+import contextvars
+import random
+
+from django.conf import settings
+from django.core.cache import caches
+
+PRIMARY = "default"
+
+_state = contextvars.ContextVar("db_routing_state", default=None)
+
+
+class RoutingState:
+    __slots__ = ("replica", "wrote")
+
+    def __init__(self):
+        # The replica alias this request reads from, if any.
+        self.replica = None
+        self.wrote = False
+
+
+def begin_request():
+    return _state.set(RoutingState())
+
+
+def end_request(token):
+    state = _state.get()
+    _state.reset(token)
+    return state
+
+
+def _sticky_key(user_id):
+    return f"replica-sticky:{user_id}"
+
+
+def mark_sticky(user_id):
+    caches[settings.REPLICA_STICKY_CACHE_ALIAS].set(_sticky_key(user_id), 1, timeout=settings.REPLICA_STICKY_SECONDS)
+
+
+def is_sticky(user_id):
+    return caches[settings.REPLICA_STICKY_CACHE_ALIAS].get(_sticky_key(user_id)) is not None
+
+
+def allow_replica_reads(user):
+    """
+    Let the rest of the current request read from a replica, unless ``user``
+    wrote within the sticky window. Returns whether replica reads are on.
+    """
+    state = _state.get()
+    if state is None or not settings.REPLICA_DATABASES:
+        return False
+    if user and user.is_authenticated and is_sticky(user.pk):
+        state.replica = None
+    elif state.replica is None:
+        state.replica = random.choice(settings.REPLICA_DATABASES)
+    return state.replica is not None
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.replica is None or state.wrote:
+            return PRIMARY
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        pool = {PRIMARY, *settings.REPLICA_DATABASES}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
@@ -0,0 +1,83 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+from apexpay_core import db_router
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    """
+    WhiteNoise, usable from both WSGI and ASGI. The static file lookup is an
+    in-memory dict hit, so under ASGI it runs on the event loop instead of
+    forcing every request through a thread hop as the sync-only original
+    does.
+    """
+
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Give each request its own database routing state (see
+    ``apexpay_core.db_router``). After a request that wrote, the user is
+    pinned to the primary for ``REPLICA_STICKY_SECONDS``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = db_router.begin_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            state = db_router.end_request(token)
+        self.after_request(request, state)
+        return response
+
+    async def __acall__(self, request):
+        token = db_router.begin_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            state = db_router.end_request(token)
+        if state.wrote:
+            await sync_to_async(self.after_request)(request, state)
+        return response
+
+    @staticmethod
+    def after_request(request, state):
+        if not state.wrote or not settings.REPLICA_DATABASES:
+            return
+        # DRF stores the user it authenticated on the underlying request.
+        user = request.__dict__.get("user")
+        if user is not None and getattr(user, "is_authenticated", False):
+            db_router.mark_sticky(user.pk)
@@ -4,6 +4,7 @@ Compiled cleanly with dev-safe HTTPS settings.
 """
 
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 import dj_database_url
@@ -42,6 +43,8 @@ INSTALLED_APPS = [
     'accounts.apps.AccountsConfig',
     'transactions.apps.TransactionsConfig',
     'kyc.apps.KycConfig',
+    'ledger.apps.LedgerConfig',
+    'monitoring.apps.MonitoringConfig',
 
     # Third-party apps
     'rest_framework',
@@ -57,10 +60,14 @@ AUTH_USER_MODEL = 'accounts.User'
 # -----------------------------------------------------------------------------
 
 MIDDLEWARE = [
+    # First, so request latency covers every other middleware
+    'monitoring.middleware.MetricsMiddleware',
+    'monitoring.middleware.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
 
-    # Whitenoise MUST be high in the list
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # Whitenoise MUST be high in the list (async-capable subclass, so ASGI
+    # requests don't hop to a thread just to check for a static file)
+    'apexpay_core.middleware.WhiteNoiseMiddleware',
 
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -68,6 +75,7 @@ MIDDLEWARE = [
 
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apexpay_core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
 
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -115,6 +123,25 @@ else:
         }
     }
 
+# Read replicas, as a comma-separated list of URLs. They become aliases
+# replica1, replica2, ... that selected GET endpoints read from (see
+# apexpay_core/db_router.py). After a user writes, their reads stay on the
+# primary for REPLICA_STICKY_SECONDS, tracked in the REPLICA_STICKY_CACHE_ALIAS
+# cache (use one shared by all workers).
+DATABASE_REPLICA_URLS = [
+    url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+]
+for number, url in enumerate(DATABASE_REPLICA_URLS, 1):
+    DATABASES[f"replica{number}"] = {
+        **dj_database_url.parse(url, conn_max_age=600),
+        "TEST": {"MIRROR": "default"},
+    }
+REPLICA_DATABASES = [f"replica{number}" for number in range(1, len(DATABASE_REPLICA_URLS) + 1)]
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 10))
+REPLICA_STICKY_CACHE_ALIAS = os.getenv("REPLICA_STICKY_CACHE_ALIAS", "default")
+
+DATABASE_ROUTERS = ['apexpay_core.db_router.PrimaryReplicaRouter']
+
 # -----------------------------------------------------------------------------
 # PASSWORD VALIDATION
 # -----------------------------------------------------------------------------
@@ -142,9 +169,66 @@ USE_TZ = True
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.BasicAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    ]
+        'accounts.authentication.CachedJWTAuthentication',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'apexpay_core.throttling.UserTokenBucketThrottle',
+        'apexpay_core.throttling.IPTokenBucketThrottle',
+        'apexpay_core.throttling.EndpointTokenBucketThrottle',
+    ],
+    # Proxies in front of the app that append to X-Forwarded-For (Render's
+    # load balancer in production). Client addresses for the per-IP
+    # throttles are read that many hops from the right, so a client cannot
+    # pick its own bucket by sending the header.
+    'NUM_PROXIES': int(os.getenv("NUM_PROXIES", 0 if DEBUG else 1)),
+}
+
+# Token buckets for views that set ``throttle_scope``, keyed
+# "<scope>.<user|ip|endpoint>". "N/period" allows a burst of N and refills at
+# N per period. Override entries with THROTTLE_RATES="login.ip=30/min,...".
+# THROTTLE_BACKEND is "local" (per worker) or "cache" (the Django cache named
+# by THROTTLE_CACHE_ALIAS, shared by every worker).
+THROTTLE_RATES = {
+    "login.user": "5/min",
+    "login.ip": "20/min",
+    "login.endpoint": "600/min",
+    "register.ip": "10/hour",
+    "register.endpoint": "300/min",
+    "password_reset.user": "3/hour",
+    "password_reset.ip": "10/hour",
+    "password_reset.endpoint": "300/min",
+    "deposit.user": "30/min",
+    "deposit.ip": "120/min",
+    "deposit.endpoint": "3000/min",
+    "withdraw.user": "30/min",
+    "withdraw.ip": "120/min",
+    "withdraw.endpoint": "3000/min",
+    # Each batch carries up to TRANSACTION_BATCH_MAX_ITEMS items.
+    "batch.user": "10/min",
+    "batch.ip": "30/min",
+    "batch.endpoint": "600/min",
 }
+THROTTLE_RATES.update(
+    entry.strip().split("=", 1)
+    for entry in os.getenv("THROTTLE_RATES", "").split(",")
+    if "=" in entry
+)
+THROTTLE_BACKEND = os.getenv("THROTTLE_BACKEND", "local")
+THROTTLE_CACHE_ALIAS = os.getenv("THROTTLE_CACHE_ALIAS", "default")
+THROTTLE_LOCAL_MAX_KEYS = int(os.getenv("THROTTLE_LOCAL_MAX_KEYS", 100000))
+
+# Authenticated users are cached per worker for this many seconds (bounded to
+# JWT_USER_CACHE_SIZE entries) so API calls skip the per-request user query.
+JWT_USER_CACHE_SIZE = int(os.getenv("JWT_USER_CACHE_SIZE", 10000))
+JWT_USER_CACHE_TTL = int(os.getenv("JWT_USER_CACHE_TTL", 60))
+
+# Revoked token ids are mirrored into a per-worker bloom filter. New
+# revocations are pulled in every REVOCATION_REFRESH_SECONDS and the filter is
+# rebuilt (dropping expired tokens) every REVOCATION_REBUILD_SECONDS.
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", 1000000))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", 0.001))
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", 5))
+REVOCATION_REBUILD_SECONDS = float(os.getenv("REVOCATION_REBUILD_SECONDS", 3600))
 
 LOGIN_REDIRECT_URL = '/docs'
 
@@ -194,12 +278,105 @@ EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
 
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER or "no-reply@example.com"
 
+# Outbox delivery (`manage.py send_queued_emails`): failed sends are retried
+# after BACKOFF * 2 ** (attempt - 1) seconds and dead-lettered after
+# MAX_ATTEMPTS.
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", 5))
+EMAIL_OUTBOX_BACKOFF_SECONDS = int(os.getenv("EMAIL_OUTBOX_BACKOFF_SECONDS", 60))
+
 # -----------------------------------------------------------------------------
 # SITE DOMAIN FOR EMAIL LINKS
 # -----------------------------------------------------------------------------
 
 SITE_DOMAIN = os.getenv("SITE_DOMAIN", "http://127.0.0.1:8000")
 
+# -----------------------------------------------------------------------------
+# TRANSACTIONS
+# -----------------------------------------------------------------------------
+
+# Serve the read-only transaction endpoints from transactions.async_views.
+# apexpay_core/asgi.py turns this on; under WSGI the sync views are used.
+ASYNC_READ_VIEWS = os.getenv("ASYNC_READ_VIEWS", "False").lower() in ("true", "1", "yes")
+
+# Upper bound on items accepted by the batch submission endpoint.
+TRANSACTION_BATCH_MAX_ITEMS = int(os.getenv("TRANSACTION_BATCH_MAX_ITEMS", 500))
+
+# Rows fetched per round trip when streaming a statement export.
+STATEMENT_EXPORT_CHUNK_SIZE = int(os.getenv("STATEMENT_EXPORT_CHUNK_SIZE", 2000))
+
+# On PostgreSQL, Transactions is partitioned by month of date_created.
+# `manage.py transaction_partitions` keeps TRANSACTION_PARTITIONS_AHEAD months
+# of empty partitions ready and, when given --detach, detaches partitions
+# older than TRANSACTION_PARTITIONS_RETAIN_MONTHS (0 keeps everything) once
+# `manage.py archive_transactions` has emptied them.
+TRANSACTION_PARTITIONS_AHEAD = int(os.getenv("TRANSACTION_PARTITIONS_AHEAD", 3))
+TRANSACTION_PARTITIONS_RETAIN_MONTHS = int(os.getenv("TRANSACTION_PARTITIONS_RETAIN_MONTHS", 0))
+
+# `manage.py archive_transactions` moves processed transactions older than
+# TRANSACTION_ARCHIVE_AFTER_DAYS out of the database into compressed
+# segments under TRANSACTION_ARCHIVE_DIR, TRANSACTION_ARCHIVE_SEGMENT_ROWS
+# rows at most per segment. History, statements, reconciliation and summary
+# rebuilds read them back, so every web and worker process must see the
+# same directory.
+TRANSACTION_ARCHIVE_DIR = os.getenv("TRANSACTION_ARCHIVE_DIR", str(BASE_DIR / "archive"))
+TRANSACTION_ARCHIVE_AFTER_DAYS = int(os.getenv("TRANSACTION_ARCHIVE_AFTER_DAYS", 365))
+TRANSACTION_ARCHIVE_SEGMENT_ROWS = int(os.getenv("TRANSACTION_ARCHIVE_SEGMENT_ROWS", 100000))
+
+# Responses to requests sent with an Idempotency-Key header are replayed to
+# retries for IDEMPOTENCY_KEY_TTL seconds. Each worker also keeps the most
+# recent IDEMPOTENCY_CACHE_SIZE responses in memory. A duplicate that arrives
+# while the first request is running waits up to IDEMPOTENCY_WAIT_SECONDS; a
+# claim older than IDEMPOTENCY_LOCK_TIMEOUT is treated as abandoned.
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", 86400))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", 10000))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", 5))
+IDEMPOTENCY_LOCK_TIMEOUT = int(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT", 60))
+
+# Every user has at most one wallet per currency. Requests that don't name a
+# currency use DEFAULT_CURRENCY.
+DEFAULT_CURRENCY = os.getenv("DEFAULT_CURRENCY", "NGN").upper()
+SUPPORTED_CURRENCIES = [
+    currency.strip().upper()
+    for currency in os.getenv("SUPPORTED_CURRENCIES", "NGN,USD,GBP,EUR").split(",")
+    if currency.strip()
+]
+
+# -----------------------------------------------------------------------------
+# LEDGER
+# -----------------------------------------------------------------------------
+
+# A balance snapshot is written every N ledger entries per wallet, so a
+# historical balance never replays more than N entries.
+LEDGER_SNAPSHOT_INTERVAL = int(os.getenv("LEDGER_SNAPSHOT_INTERVAL", 100))
+
+# -----------------------------------------------------------------------------
+# MONITORING
+# -----------------------------------------------------------------------------
+
+# Per-endpoint request metrics, served in the Prometheus text format at
+# /metrics. Each worker writes its totals to a file in METRICS_DIR at most
+# every METRICS_FLUSH_SECONDS and /metrics adds up every file, so start each
+# deployment with an empty directory. Scrapers send METRICS_TOKEN as
+# "Authorization: Bearer <token>"; without a token, /metrics is only served
+# when DEBUG is on.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() in ("true", "1", "yes")
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(tempfile.gettempdir(), "apexpay-metrics"))
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", 5))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+if METRICS_TOKEN and not DEBUG:
+    # Prometheus scrapes over the private network, without TLS.
+    SECURE_REDIRECT_EXEMPT = [r"^metrics$"]
+
+# Opt-in slow-query log: queries slower than SLOW_QUERY_THRESHOLD_MS are
+# grouped by normalized SQL, endpoint and calling code into hourly rows, seen
+# in the admin and with `manage.py slow_queries`. Workers write their counts
+# every SLOW_QUERY_FLUSH_SECONDS; `manage.py slow_queries --prune` removes
+# rows older than SLOW_QUERY_RETENTION_DAYS.
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "False").lower() in ("true", "1", "yes")
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", 100))
+SLOW_QUERY_FLUSH_SECONDS = float(os.getenv("SLOW_QUERY_FLUSH_SECONDS", 30))
+SLOW_QUERY_RETENTION_DAYS = int(os.getenv("SLOW_QUERY_RETENTION_DAYS", 7))
+
 # -----------------------------------------------------------------------------
 # CORS / SWAGGER
 # -----------------------------------------------------------------------------
@@ -0,0 +1,236 @@
+"""
+Token-bucket rate limiting plugged into DRF's throttle hooks.
+
+A view opts in by setting ``throttle_scope``. Each scope can have up to three
+buckets, configured in ``settings.THROTTLE_RATES`` as ``"<scope>.<kind>"``:
+
+* ``user``     - one bucket per authenticated user (or, for anonymous calls
+                 such as login, per client address and email address in the
+                 request, so nobody can drain another client's bucket for
+                 an account)
+* ``ip``       - one bucket per client address
+* ``endpoint`` - one bucket shared by every caller of the scope
+
+A rate of ``"N/period"`` gives a bucket that holds N tokens and refills at N
+per period, so a client can burst N requests and is then held to the
+average. Kinds without a configured rate are not limited.
+
+Buckets live either in this process (``THROTTLE_BACKEND = "local"``) or in a
+Django cache shared by every worker (``"cache"``).
+"""
+
+import abc
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """``"20/min"`` -> (capacity 20, refill 20 / 60 tokens per second)."""
+    num, period = rate.split("/")
+    capacity = int(num)
+    return capacity, capacity / PERIODS[period.strip()[0]]
+
+
+class LocalBuckets:
+    """Buckets held in this process, bounded to ``max_keys`` least recently used."""
+
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, refill):
+        """Take a token; returns 0 when allowed, else seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = capacity
+            else:
+                tokens = min(capacity, bucket[0] + (now - bucket[1]) * refill)
+                self._buckets.move_to_end(key)
+
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (1 - tokens) / refill
+
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBuckets:
+    """
+    Buckets stored in a Django cache so every worker shares them. The
+    read-modify-write is not atomic across workers, so under contention a
+    bucket can briefly admit a few requests more than its capacity.
+    """
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def consume(self, key, capacity, refill):
+        cache = caches[self.alias]
+        cache_key = f"throttle:{key}"
+        now = time.time()
+        bucket = cache.get(cache_key)
+        if bucket is None:
+            tokens = capacity
+        else:
+            tokens = min(capacity, bucket[0] + (now - bucket[1]) * refill)
+
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / refill
+
+        # An entry that has expired would have refilled completely anyway.
+        cache.set(cache_key, (tokens, now), timeout=int(capacity / refill) + 1)
+        return wait
+
+    def clear(self):
+        caches[self.alias].clear()
+
+
+_config = None
+_config_lock = threading.Lock()
+
+
+def get_config():
+    """
+    (backend, {(scope, kind): (capacity, refill)}, NUM_PROXIES), resolved
+    from settings once so the per-request check is a couple of dict lookups.
+    """
+    global _config
+    config = _config
+    if config is None:
+        with _config_lock:
+            if _config is None:
+                _config = (
+                    get_backend(settings.THROTTLE_BACKEND),
+                    {
+                        tuple(name.rsplit(".", 1)): parse_rate(rate)
+                        for name, rate in settings.THROTTLE_RATES.items() if rate
+                    },
+                    api_settings.NUM_PROXIES,
+                )
+            config = _config
+    return config
+
+
+_backends = {}
+
+
+def get_backend(name=None):
+    name = name or settings.THROTTLE_BACKEND
+    if name not in _backends:
+        if name == "local":
+            _backends[name] = LocalBuckets(settings.THROTTLE_LOCAL_MAX_KEYS)
+        elif name == "cache":
+            _backends[name] = CacheBuckets(settings.THROTTLE_CACHE_ALIAS)
+        else:
+            raise ValueError(f"Unknown throttle backend {name!r}")
+    return _backends[name]
+
+
+@receiver(setting_changed)
+def reset_config(setting, **kwargs):
+    global _config
+    if setting.startswith("THROTTLE_") or setting == "REST_FRAMEWORK":
+        _config = None
+        _backends.clear()
+
+
+class TokenBucketThrottle(BaseThrottle, metaclass=abc.ABCMeta):
+    kind = None
+
+    @abc.abstractmethod
+    def get_bucket_ident(self, request):
+        """The key of the caller's bucket, or None to not limit the request."""
+
+    def allow_request(self, request, view):
+        self._wait = None
+        scope = getattr(view, "throttle_scope", None)
+        if not scope:
+            return True
+        backend, rates, _ = get_config()
+        rate = rates.get((scope, self.kind))
+        if rate is None:
+            return True
+        ident = self.get_bucket_ident(request)
+        if ident is None:
+            return True
+
+        self._wait = backend.consume(f"{scope}.{self.kind}:{ident}", *rate)
+        return not self._wait
+
+    def wait(self):
+        return self._wait
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    kind = "user"
+
+    def get_bucket_ident(self, request):
+        user = request.user
+        if user and user.is_authenticated:
+            return user.pk
+        # Anonymous auth endpoints are limited per target account, named
+        # either in the body or in the URL, from each client address. Keying
+        # on the account alone would let anyone lock its owner out.
+        data = request.data
+        email = data.get("email") if hasattr(data, "get") else None
+        if not email:
+            email = request.parser_context.get("kwargs", {}).get("email")
+        if isinstance(email, str) and email:
+            return f"{client_ip(request)}|{email.strip().lower()}"
+        return None
+
+
+def client_ip(request):
+    # BaseThrottle.get_ident, minus the per-call settings lookup and the
+    # proxy attribute access on ``request``.
+    meta = request._request.META
+    xff = meta.get("HTTP_X_FORWARDED_FOR")
+    remote_addr = meta.get("REMOTE_ADDR")
+    num_proxies = get_config()[2]
+    if num_proxies is not None:
+        if num_proxies == 0 or xff is None:
+            return remote_addr
+        addrs = xff.split(",")
+        return addrs[-min(num_proxies, len(addrs))].strip()
+    return "".join(xff.split()) if xff else remote_addr
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    kind = "ip"
+
+    def get_bucket_ident(self, request):
+        return client_ip(request)
+
+
+class EndpointTokenBucketThrottle(TokenBucketThrottle):
+    kind = "endpoint"
+
+    def get_bucket_ident(self, request):
+        return "all"
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:29
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kyc', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='kyc',
+            name='KYC_user_id_97c0aa_idx',
+        ),
+    ]
@@ -23,9 +23,6 @@ class KYC(models.Model):
   class Meta:
     verbose_name_plural = "KYC"
     db_table = "KYC"
-    indexes = [
-      models.Index(fields=['user','kyc_type', 'kyc_number', 'kyc_image', 'kyc_status', 'kyc_date'])
-    ]
     ordering = ['-kyc_date']
 
 
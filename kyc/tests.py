@@ -1,3 +1,41 @@
+# Python imports
+import io
+
+# Django imports
+from django.core.management import call_command
 from django.test import TestCase
 
-# Create your tests here.
+# App imports
+from kyc.models import KYC, KYC_CHOICES
+
+
+class SyntheticKYCTests(TestCase):
+    def seed(self, prefix, **options):
+        call_command(
+            "seed_synthetic", users=40, prefix=prefix, mean_transactions=2, days=30, workers=1, seed=7,
+            skip_summaries=True, stdout=io.StringIO(), **options,
+        )
+        return KYC.objects.filter(user__email__startswith=f"{prefix}-").order_by("user_id")
+
+    def test_every_user_gets_a_record_at_a_share_of_one(self):
+        records = self.seed("all", kyc=1.0, kyc_verified=0.0)
+
+        self.assertEqual(records.count(), 40)
+        self.assertFalse(records.filter(kyc_status=True).exists())
+        self.assertTrue(set(records.values_list("kyc_type", flat=True)) <= {value for value, _ in KYC_CHOICES})
+        self.assertTrue(all(len(number) <= 20 for number in records.values_list("kyc_number", flat=True)))
+
+    def test_no_records_at_a_share_of_zero(self):
+        self.assertFalse(self.seed("none", kyc=0.0).exists())
+
+    def test_verified_share_applies_to_the_records(self):
+        records = self.seed("verified", kyc=1.0, kyc_verified=1.0)
+
+        self.assertEqual(records.filter(kyc_status=True).count(), 40)
+
+    def test_the_same_seed_gives_the_same_records(self):
+        first = list(self.seed("first", kyc=0.5).values_list("kyc_type", "kyc_number", "kyc_status"))
+        second = list(self.seed("second", kyc=0.5).values_list("kyc_type", "kyc_number", "kyc_status"))
+
+        self.assertTrue(first)
+        self.assertEqual(first, second)
@@ -4,7 +4,6 @@ from django.shortcuts import get_object_or_404
 # App imports
 from kyc.serializers import KYCSerializer
 from kyc.models import KYC
-from accounts.models import User
 
 # rest_framework imports
 from rest_framework.generics import GenericAPIView
@@ -22,7 +21,7 @@ class KYCView(GenericAPIView):
     serializer = self.serializer_class(data=request.data)
 
     if serializer.is_valid():
-      user = get_object_or_404(User, pk=request.user.id)
+      user = request.user
       serializer.validated_data['user'] = user
       serializer.save(user=user)
 
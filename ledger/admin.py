@@ -0,0 +1,29 @@
+from django.contrib import admin
+from ledger.models import BalanceSnapshot, LedgerEntry
+
+
+class ReadOnlyAdmin(admin.ModelAdmin):
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(ReadOnlyAdmin):
+    list_display = ['wallet', 'sequence', 'account', 'entry_type', 'amount', 'balance_after', 'transaction_display', 'date_created']
+    list_filter = ['account', 'entry_type']
+    list_select_related = ['wallet']
+
+    @admin.display(description="transaction")
+    def transaction_display(self, obj):
+        return obj.get_transaction() or obj.transaction_id
+
+
+@admin.register(BalanceSnapshot)
+class BalanceSnapshotAdmin(ReadOnlyAdmin):
+    list_display = ['wallet', 'sequence', 'balance', 'date_created']
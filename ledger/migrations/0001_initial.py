@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('transactions', '0002_wallet_ledger_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveBigIntegerField()),
+                ('balance', models.IntegerField()),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='balance_snapshots', to='transactions.wallet')),
+            ],
+            options={
+                'verbose_name_plural': 'Balance snapshots',
+                'db_table': 'BalanceSnapshots',
+                'indexes': [models.Index(fields=['wallet', 'date_created'], name='BalanceSnap_wallet__362142_idx')],
+                'constraints': [models.UniqueConstraint(fields=('wallet', 'sequence'), name='balance_snapshot_wallet_sequence')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_type', models.CharField(choices=[('debit', 'DEBIT'), ('credit', 'CREDIT')], max_length=10)),
+                ('amount', models.IntegerField()),
+                ('balance_after', models.IntegerField()),
+                ('sequence', models.PositiveBigIntegerField()),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('transaction', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entries', to='transactions.transaction')),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entries', to='transactions.wallet')),
+            ],
+            options={
+                'verbose_name_plural': 'Ledger entries',
+                'db_table': 'LedgerEntries',
+                'indexes': [models.Index(fields=['wallet', 'date_created'], name='LedgerEntri_wallet__cb6207_idx')],
+                'constraints': [models.UniqueConstraint(fields=('wallet', 'sequence'), name='ledger_entry_wallet_sequence')],
+            },
+        ),
+    ]
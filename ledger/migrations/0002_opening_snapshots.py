@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+def create_opening_snapshots(apps, schema_editor):
+    # Wallets that already hold money get a sequence-0 snapshot so the ledger
+    # starts from their balance at the time it was introduced.
+    Wallet = apps.get_model("transactions", "Wallet")
+    BalanceSnapshot = apps.get_model("ledger", "BalanceSnapshot")
+
+    BalanceSnapshot.objects.bulk_create(
+        (
+            BalanceSnapshot(wallet_id=wallet_id, sequence=0, balance=balance)
+            for wallet_id, balance in Wallet.objects.values_list("pk", "available_amount").iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ledger", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_opening_snapshots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0002_opening_snapshots'),
+        ('transactions', '0007_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='balancesnapshot',
+            name='wallet',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='balance_snapshots', to='transactions.wallet'),
+        ),
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='wallet',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entries', to='transactions.wallet'),
+        ),
+    ]
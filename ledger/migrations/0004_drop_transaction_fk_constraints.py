@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0003_drop_wallet_fk_index'),
+        ('transactions', '0012_drop_transaction_fk_constraints'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='transaction',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entries', to='transactions.transaction'),
+        ),
+    ]
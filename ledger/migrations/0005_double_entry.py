@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-17 10:21
+
+from django.db import migrations, models
+
+# Entries written before the ledger was double-entry are all wallet legs.
+# Give each one its clearing leg, dated like it; nothing existing changes.
+CONTRA_LEGS = """
+INSERT INTO "LedgerEntries" (wallet_id, transaction_id, account, entry_type, amount, balance_after, sequence, date_created)
+SELECT wallet_id, transaction_id,
+       CASE entry_type WHEN 'credit' THEN 'deposits' ELSE 'withdrawals' END,
+       CASE entry_type WHEN 'credit' THEN 'debit' ELSE 'credit' END,
+       amount, NULL, NULL, date_created
+FROM "LedgerEntries"
+WHERE account = 'wallet'
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0004_drop_transaction_fk_constraints'),
+        ('transactions', '0016_restore_status_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ledgerentry',
+            name='account',
+            field=models.CharField(choices=[('wallet', 'WALLET'), ('deposits', 'DEPOSITS CLEARING'), ('withdrawals', 'WITHDRAWALS CLEARING')], default='wallet', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='balance_after',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='sequence',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='ledgerentry',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('account', 'wallet'), ('balance_after__isnull', False), ('sequence__isnull', False)), models.Q(models.Q(('account', 'wallet'), _negated=True), ('balance_after__isnull', True), ('sequence__isnull', True)), _connector='OR'), name='ledger_entry_wallet_leg_position'),
+        ),
+        migrations.RunSQL(CONTRA_LEGS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,123 @@
+# Django imports
+from django.db import models
+
+# App imports
+from transactions import archive
+from transactions.models import Transaction, Wallet
+
+
+entry_type = [
+    ("debit", "DEBIT"),
+    ("credit", "CREDIT")
+]
+
+# Every transaction posts two legs of the same amount: one on the wallet and
+# the opposite one on the clearing account money arrived from or left to.
+account = [
+    ("wallet", "WALLET"),
+    ("deposits", "DEPOSITS CLEARING"),
+    ("withdrawals", "WITHDRAWALS CLEARING")
+]
+
+
+class AppendOnlyQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        raise TypeError("Ledger rows are append-only and cannot be updated")
+
+    def delete(self):
+        raise TypeError("Ledger rows are append-only and cannot be deleted")
+
+
+class AppendOnlyModel(models.Model):
+    objects = AppendOnlyQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise TypeError("Ledger rows are append-only and cannot be updated")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise TypeError("Ledger rows are append-only and cannot be deleted")
+
+    class Meta:
+        abstract = True
+
+
+# Both models PROTECT their wallet, so a user whose wallets have any ledger
+# history cannot be deleted (User.delete() raises ProtectedError, and the
+# admin refuses). Such users are deactivated instead, with the "Deactivate
+# selected users" admin action.
+
+
+class LedgerEntry(AppendOnlyModel):
+    # Covered by the (wallet, sequence) unique constraint.
+    wallet = models.ForeignKey(Wallet, on_delete=models.PROTECT, related_name="ledger_entries", db_index=False)
+    # No DB-level constraint: Transactions may be partitioned (see the note
+    # above transactions.models.Transaction), and archived transactions
+    # leave the table while their entries keep the id. Read it with
+    # get_transaction(); a select_related join would drop those entries.
+    transaction = models.ForeignKey(Transaction, on_delete=models.PROTECT, related_name="ledger_entries", db_constraint=False)
+    account = models.CharField(max_length=20, choices=account, default="wallet")
+    entry_type = models.CharField(max_length=10, choices=entry_type)
+    amount = models.IntegerField()
+    # Only wallet legs move the wallet's balance, so only they carry a
+    # position in its sequence. Clearing legs keep the wallet for currency
+    # and traceability.
+    balance_after = models.IntegerField(null=True, blank=True)
+    sequence = models.PositiveBigIntegerField(null=True, blank=True)
+    date_created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        if self.account != "wallet":
+            return "Wallet: {} - {} {} {}".format(self.wallet_id, self.get_account_display(), self.entry_type, self.amount)
+        return "Wallet: {} - #{} {} {} - Balance: {}".format(self.wallet_id, self.sequence, self.entry_type, self.amount, self.balance_after)
+
+    def get_transaction(self):
+        """The transaction, read from the archive once it has been moved there."""
+        try:
+            return self.transaction
+        except Transaction.DoesNotExist:
+            row = archive.find(self.wallet.user_id, self.transaction_id)
+            return Transaction(**row) if row else None
+
+    @property
+    def signed_amount(self):
+        return self.amount if self.entry_type == "credit" else -self.amount
+
+    class Meta:
+        verbose_name_plural = "Ledger entries"
+        db_table = "LedgerEntries"
+        constraints = [
+            models.UniqueConstraint(fields=['wallet', 'sequence'], name='ledger_entry_wallet_sequence'),
+            models.CheckConstraint(
+                condition=(
+                    models.Q(account="wallet", sequence__isnull=False, balance_after__isnull=False)
+                    | (~models.Q(account="wallet") & models.Q(sequence__isnull=True, balance_after__isnull=True))
+                ),
+                name='ledger_entry_wallet_leg_position',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['wallet', 'date_created'])
+        ]
+
+
+class BalanceSnapshot(AppendOnlyModel):
+    # Covered by the (wallet, sequence) unique constraint.
+    wallet = models.ForeignKey(Wallet, on_delete=models.PROTECT, related_name="balance_snapshots", db_index=False)
+    sequence = models.PositiveBigIntegerField()
+    balance = models.IntegerField()
+    date_created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return "Wallet: {} - #{} - Balance: {} - Taken at: {}".format(self.wallet_id, self.sequence, self.balance, self.date_created)
+
+    class Meta:
+        verbose_name_plural = "Balance snapshots"
+        db_table = "BalanceSnapshots"
+        constraints = [
+            models.UniqueConstraint(fields=['wallet', 'sequence'], name='balance_snapshot_wallet_sequence')
+        ]
+        indexes = [
+            models.Index(fields=['wallet', 'date_created'])
+        ]
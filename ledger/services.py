@@ -0,0 +1,124 @@
+# Django imports
+from django.conf import settings
+from django.db.models import Case, F, IntegerField, Sum, When
+
+# App imports
+from ledger.models import BalanceSnapshot, LedgerEntry
+
+SIGNED_AMOUNT = Case(
+    When(entry_type="debit", then=F("amount") * -1),
+    default=F("amount"),
+    output_field=IntegerField(),
+)
+
+CLEARING_ACCOUNTS = {"credit": "deposits", "debit": "withdrawals"}
+OPPOSITE = {"credit": "debit", "debit": "credit"}
+
+
+class UnbalancedEntries(Exception):
+    pass
+
+
+def _legs(wallet_id, transaction, entry_type, amount, balance, sequence):
+    """The wallet leg of a movement and the clearing leg that balances it."""
+    return [
+        LedgerEntry(
+            wallet_id=wallet_id,
+            transaction=transaction,
+            entry_type=entry_type,
+            amount=amount,
+            balance_after=balance,
+            sequence=sequence,
+        ),
+        LedgerEntry(
+            wallet_id=wallet_id,
+            transaction=transaction,
+            account=CLEARING_ACCOUNTS[entry_type],
+            entry_type=OPPOSITE[entry_type],
+            amount=amount,
+        ),
+    ]
+
+
+def _post(wallet_id, entries):
+    """
+    Write ``entries`` and the snapshots they fall due for, refusing any set
+    in which some transaction's debits and credits differ.
+    """
+    net = {}
+    for entry in entries:
+        signed = entry.amount if entry.entry_type == "credit" else -entry.amount
+        net[entry.transaction_id] = net.get(entry.transaction_id, 0) + signed
+    unbalanced = [transaction_id for transaction_id, total in net.items() if total]
+    if unbalanced:
+        raise UnbalancedEntries(f"Debits and credits differ for transactions {unbalanced}")
+
+    LedgerEntry.objects.bulk_create(entries)
+    BalanceSnapshot.objects.bulk_create(
+        BalanceSnapshot(wallet_id=wallet_id, sequence=entry.sequence, balance=entry.balance_after)
+        for entry in entries
+        if entry.account == "wallet" and entry.sequence % settings.LEDGER_SNAPSHOT_INTERVAL == 0
+    )
+
+
+def post_entry(wallet_id, balance, sequence, transaction, entry_type, amount):
+    """
+    Append the ledger entries for a balance change that was just applied to
+    a wallet. ``balance`` and ``sequence`` are the values the wallet UPDATE
+    produced; read them back inside the same atomic block, while the row is
+    still locked. Returns the wallet leg.
+    """
+    entries = _legs(wallet_id, transaction, entry_type, amount, balance, sequence)
+    _post(wallet_id, entries)
+    return entries[0]
+
+
+def post_entries(wallet_id, balance, sequence, movements):
+    """
+    Bulk variant of post_entry for a batch applied to a wallet with one
+    UPDATE. ``movements`` is a list of (transaction, entry_type, amount) in
+    the order they happened; ``balance``/``sequence`` are the wallet values
+    after the whole batch, so each entry's balance_after is walked back from
+    the end. Returns the wallet legs.
+    """
+    legs = []
+    for transaction, entry_type_, amount in reversed(movements):
+        legs.append(_legs(wallet_id, transaction, entry_type_, amount, balance, sequence))
+        balance -= amount if entry_type_ == "credit" else -amount
+        sequence -= 1
+    legs.reverse()
+
+    _post(wallet_id, [entry for pair in legs for entry in pair])
+    return [wallet_leg for wallet_leg, _ in legs]
+
+
+def unbalanced_transactions():
+    """Ids of transactions whose ledger debits and credits differ."""
+    return list(
+        LedgerEntry.objects.values("transaction_id")
+        .annotate(net=Sum(SIGNED_AMOUNT))
+        .exclude(net=0)
+        .order_by("transaction_id")
+        .values_list("transaction_id", flat=True)
+    )
+
+
+def balance_as_of(wallet, when):
+    """
+    Balance of ``wallet`` at time ``when``: the latest snapshot taken at or
+    before ``when`` plus a replay of the (at most LEDGER_SNAPSHOT_INTERVAL)
+    entries appended after it.
+    """
+    snapshot = (
+        BalanceSnapshot.objects.filter(wallet=wallet, date_created__lte=when)
+        .order_by("-sequence")
+        .values_list("sequence", "balance")
+        .first()
+    )
+    sequence, balance = snapshot or (0, 0)
+
+    tail = LedgerEntry.objects.filter(
+        wallet=wallet, account="wallet", sequence__gt=sequence, date_created__lte=when
+    ).aggregate(delta=Sum(SIGNED_AMOUNT))["delta"]
+
+    return balance + (tail or 0)
@@ -0,0 +1,111 @@
+# Python imports
+from datetime import timedelta
+
+# Django imports
+from django.db.models import ProtectedError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+# App imports
+from accounts.models import User
+from ledger.models import BalanceSnapshot, LedgerEntry
+from ledger.services import UnbalancedEntries, _post, balance_as_of, unbalanced_transactions
+from transactions.models import Wallet
+from transactions.services import apply_batch, deposit_funds, withdraw_funds
+
+
+@override_settings(DEFAULT_CURRENCY="NGN")
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="ada@example.com", username="ada", password="Sup3r-secret!",
+            first_name="Ada", last_name="Lovelace", mobile="0800",
+        )
+
+    def entries(self):
+        return list(
+            LedgerEntry.objects.filter(account="wallet").order_by("sequence")
+            .values_list("sequence", "entry_type", "amount", "balance_after")
+        )
+
+    def test_every_balance_change_appends_an_entry(self):
+        deposit_funds(self.user, 100)
+        withdraw_funds(self.user, 30)
+
+        self.assertEqual(self.entries(), [(1, "credit", 100, 100), (2, "debit", 30, 70)])
+        self.assertEqual(Wallet.objects.get(user=self.user).ledger_sequence, 2)
+
+    def test_batches_walk_balances_back_from_the_final_one(self):
+        deposit_funds(self.user, 10)
+
+        apply_batch(self.user.pk, [
+            {"transaction_type": "deposit", "amount": 50},
+            {"transaction_type": "withdraw", "amount": 20},
+            {"transaction_type": "deposit", "amount": 5},
+        ])
+
+        self.assertEqual(self.entries(), [
+            (1, "credit", 10, 10), (2, "credit", 50, 60), (3, "debit", 20, 40), (4, "credit", 5, 45),
+        ])
+
+    def test_every_wallet_leg_is_balanced_by_a_clearing_leg(self):
+        deposit_funds(self.user, 100)
+        apply_batch(self.user.pk, [
+            {"transaction_type": "deposit", "amount": 50},
+            {"transaction_type": "withdraw", "amount": 20},
+        ])
+
+        self.assertEqual(
+            list(LedgerEntry.objects.exclude(account="wallet").order_by("id").values_list("account", "entry_type", "amount")),
+            [("deposits", "debit", 100), ("deposits", "debit", 50), ("withdrawals", "credit", 20)],
+        )
+        self.assertEqual(unbalanced_transactions(), [])
+
+    def test_unbalanced_entries_are_refused(self):
+        tx = deposit_funds(self.user, 100)
+        wallet = Wallet.objects.get(user=self.user)
+
+        with self.assertRaises(UnbalancedEntries):
+            _post(wallet.pk, [LedgerEntry(wallet=wallet, transaction=tx, account="deposits", entry_type="debit", amount=5)])
+
+        self.assertEqual(LedgerEntry.objects.count(), 2)
+
+    @override_settings(LEDGER_SNAPSHOT_INTERVAL=2)
+    def test_snapshots_are_taken_every_interval(self):
+        for amount in (10, 20, 30, 40, 50):
+            deposit_funds(self.user, amount)
+
+        self.assertEqual(list(BalanceSnapshot.objects.order_by("sequence").values_list("sequence", "balance")), [(2, 30), (4, 100)])
+
+    @override_settings(LEDGER_SNAPSHOT_INTERVAL=2)
+    def test_balance_as_of_replays_entries_after_the_snapshot(self):
+        for amount in (10, 20, 30):
+            deposit_funds(self.user, amount)
+        wallet = Wallet.objects.get(user=self.user)
+        middle = timezone.now()
+        deposit_funds(self.user, 1000)
+
+        self.assertEqual(balance_as_of(wallet, middle), 60)
+        self.assertEqual(balance_as_of(wallet, timezone.now()), 1060)
+        self.assertEqual(balance_as_of(wallet, middle - timedelta(days=1)), 0)
+
+    def test_entries_cannot_be_changed_or_removed(self):
+        deposit_funds(self.user, 100)
+        entry = LedgerEntry.objects.get(account="wallet")
+
+        with self.assertRaises(TypeError):
+            LedgerEntry.objects.update(amount=1)
+        with self.assertRaises(TypeError):
+            LedgerEntry.objects.all().delete()
+        with self.assertRaises(TypeError):
+            entry.save()
+        with self.assertRaises(TypeError):
+            entry.delete()
+
+    def test_users_with_ledger_history_cannot_be_deleted(self):
+        deposit_funds(self.user, 100)
+
+        with self.assertRaises(ProtectedError):
+            self.user.delete()
+
+        self.assertTrue(LedgerEntry.objects.exists())
@@ -0,0 +1,27 @@
+from django.contrib import admin
+from monitoring.models import SlowQuery
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ['short_sql', 'endpoint', 'call_site', 'count', 'total_ms', 'mean_ms', 'max_ms', 'window']
+    list_filter = ['endpoint']
+    search_fields = ['sql', 'endpoint', 'call_site', 'fingerprint']
+    date_hierarchy = 'window'
+    ordering = ['-total_ms']
+    readonly_fields = [f.name for f in SlowQuery._meta.fields]
+
+    @admin.display(description='SQL')
+    def short_sql(self, obj):
+        return obj.sql if len(obj.sql) <= 120 else obj.sql[:117] + "..."
+
+    @admin.display(description='Mean ms')
+    def mean_ms(self, obj):
+        return round(obj.mean_ms, 2)
+
+    # Rows come from the slow-query log only; old ones may be deleted.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,17 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+
+        from monitoring import metrics, slow_queries
+
+        connection_created.connect(metrics.instrument_connection)
+        connection_created.connect(slow_queries.instrument_connection)
+        if settings.METRICS_ENABLED:
+            metrics.instrument_serializers()
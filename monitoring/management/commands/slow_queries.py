@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+from monitoring.models import SlowQuery
+
+ORDERS = {
+    "total": "-total_ms",
+    "max": "-max_ms",
+    "count": "-count",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Show the slowest query groups (statement fingerprint, endpoint and calling code) "
+        "recorded by the slow-query log over the last --hours."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=24)
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument("--order", choices=sorted(ORDERS), default="total")
+        parser.add_argument("--endpoint", help="Only queries run while serving this URL name.")
+        parser.add_argument(
+            "--prune", action="store_true",
+            help="Delete rows older than SLOW_QUERY_RETENTION_DAYS instead of reporting.",
+        )
+
+    def handle(self, *args, **options):
+        if options["prune"]:
+            cutoff = timezone.now() - timedelta(days=settings.SLOW_QUERY_RETENTION_DAYS)
+            deleted, _ = SlowQuery.objects.filter(window__lt=cutoff).delete()
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} slow query rows"))
+            return
+
+        rows = SlowQuery.objects.filter(window__gte=timezone.now() - timedelta(hours=options["hours"]))
+        if options["endpoint"] is not None:
+            rows = rows.filter(endpoint=options["endpoint"])
+        groups = (
+            rows.values("fingerprint", "endpoint", "call_site")
+            .annotate(count=Sum("count"), total_ms=Sum("total_ms"), max_ms=Max("max_ms"), sql=Max("sql"))
+            .order_by(ORDERS[options["order"]])[: options["limit"]]
+        )
+
+        shown = 0
+        for group in groups:
+            shown += 1
+            self.stdout.write(
+                f"{group['total_ms']:.0f}ms total, {group['count']} queries, "
+                f"mean {group['total_ms'] / group['count']:.1f}ms, max {group['max_ms']:.1f}ms"
+            )
+            self.stdout.write(f"  endpoint:  {group['endpoint'] or '-'}")
+            self.stdout.write(f"  call site: {group['call_site'] or '-'}")
+            self.stdout.write(f"  sql:       {group['sql']}")
+        self.stdout.write(self.style.SUCCESS(f"{shown} slow query groups in the last {options['hours']} hours"))
@@ -0,0 +1,266 @@
+"""
+Per-endpoint request metrics.
+
+MetricsMiddleware times every request and attributes it to the resolved
+URL name (``deposit``, ``transactions``, ``login``, ...): latency, DB
+queries and DB time, time spent in DRF serializers and response size.
+
+Each thread of a worker adds to its own table, so recording a request
+takes no lock. A worker writes the sum of its tables to
+``METRICS_DIR/<pid>.json`` at most every METRICS_FLUSH_SECONDS, and
+``/metrics`` adds up the files of every worker (keeping those of workers
+that have exited, so totals never go backwards) and renders them in the
+Prometheus text format.
+"""
+
+# Python imports
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from functools import wraps
+
+# Django imports
+from django.conf import settings
+
+# Upper bounds, in seconds, of the request latency histogram buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Positions in a table row; the histogram bucket counts follow them.
+COUNT, SECONDS, QUERIES, DB_SECONDS, SERIALIZER_SECONDS, RESPONSE_BYTES = range(6)
+VALUES = 6
+
+_request = contextvars.ContextVar("monitoring_request", default=None)
+
+
+class RequestStats:
+    """What the current request has spent so far. Shared with the threads
+    sync_to_async runs its ORM calls in, through the context variable."""
+
+    __slots__ = ("queries", "db_seconds", "serializer_seconds", "serializer_depth")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializer_depth = 0
+
+
+def begin_request():
+    stats = RequestStats()
+    return stats, _request.set(stats)
+
+
+def end_request(token):
+    _request.reset(token)
+
+
+# -----------------------------------------------------------------------------
+# Instrumentation
+# -----------------------------------------------------------------------------
+
+def record_query(execute, sql, params, many, context):
+    stats = _request.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - start
+
+
+def instrument_connection(sender, connection, **kwargs):
+    """``connection_created`` receiver: count the queries of every new connection."""
+    if settings.METRICS_ENABLED and record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def _timed(method):
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        stats = _request.get()
+        if stats is None:
+            return method(self, *args, **kwargs)
+        # Serializers nest (``.data`` of a list serializer, a serializer
+        # validating inside another's is_valid): time the outermost call.
+        stats.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            stats.serializer_depth -= 1
+            if not stats.serializer_depth:
+                stats.serializer_seconds += time.perf_counter() - start
+    return wrapper
+
+
+def instrument_serializers():
+    """Time ``is_valid`` and ``data`` of every DRF serializer."""
+    from rest_framework.serializers import BaseSerializer
+
+    if getattr(BaseSerializer.is_valid, "__wrapped__", None) is None:
+        BaseSerializer.is_valid = _timed(BaseSerializer.is_valid)
+        BaseSerializer.data = property(_timed(BaseSerializer.data.fget))
+
+
+# -----------------------------------------------------------------------------
+# Aggregation
+# -----------------------------------------------------------------------------
+
+class Registry:
+    """This worker's totals, one table per thread."""
+
+    def __init__(self):
+        self.local = threading.local()
+        self.tables = []
+        self.tables_lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.last_flush = 0.0
+        self.pid = self.path = None
+
+    def _table(self):
+        table = getattr(self.local, "table", None)
+        if table is None:
+            table = self.local.table = {}
+            with self.tables_lock:
+                self.tables.append(table)
+        return table
+
+    def observe(self, key, seconds, stats, response_bytes):
+        table = self._table()
+        row = table.get(key)
+        if row is None:
+            row = table[key] = [0] * (VALUES + len(LATENCY_BUCKETS))
+        row[COUNT] += 1
+        row[SECONDS] += seconds
+        row[QUERIES] += stats.queries
+        row[DB_SECONDS] += stats.db_seconds
+        row[SERIALIZER_SECONDS] += stats.serializer_seconds
+        row[RESPONSE_BYTES] += response_bytes
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                row[VALUES + index] += 1
+                break
+
+    def snapshot(self):
+        """This worker's totals, summed over its threads."""
+        with self.tables_lock:
+            tables = list(self.tables)
+        totals = {}
+        for table in tables:
+            # A copy taken in one step, while the owning thread may be
+            # adding keys.
+            for key, row in list(table.items()):
+                _add(totals, key, row)
+        return totals
+
+    def maybe_flush(self):
+        if time.monotonic() - self.last_flush >= settings.METRICS_FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self):
+        if not self.flush_lock.acquire(blocking=False):
+            return
+        try:
+            self.last_flush = time.monotonic()
+            if self.pid != os.getpid():
+                # Named per process rather than per pid: a restarted worker
+                # that reuses a pid must not overwrite its predecessor's totals.
+                self.pid = os.getpid()
+                self.path = os.path.join(settings.METRICS_DIR, f"{self.pid}-{uuid.uuid4().hex[:8]}.json")
+            os.makedirs(settings.METRICS_DIR, exist_ok=True)
+            rows = [[*key, *row] for key, row in self.snapshot().items()]
+            with open(f"{self.path}.tmp", "w") as fh:
+                json.dump({"buckets": LATENCY_BUCKETS, "rows": rows}, fh, separators=(",", ":"))
+            os.replace(f"{self.path}.tmp", self.path)
+        finally:
+            self.flush_lock.release()
+
+
+def _add(totals, key, row):
+    current = totals.get(key)
+    if current is None:
+        totals[key] = list(row)
+    else:
+        for index, value in enumerate(row):
+            current[index] += value
+
+
+registry = Registry()
+
+
+def collect():
+    """Totals of every worker that has written to METRICS_DIR, this one included."""
+    registry.flush()
+    totals = {}
+    try:
+        names = os.listdir(settings.METRICS_DIR)
+    except FileNotFoundError:
+        names = []
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(settings.METRICS_DIR, name)) as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        # Written with other buckets by an older release; skip rather than
+        # mix incompatible histograms.
+        if tuple(data.get("buckets", ())) != LATENCY_BUCKETS:
+            continue
+        for row in data["rows"]:
+            _add(totals, tuple(row[:3]), row[3:])
+    return totals
+
+
+# -----------------------------------------------------------------------------
+# Prometheus text format
+# -----------------------------------------------------------------------------
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(endpoint, method, status, **extra):
+    pairs = {"endpoint": endpoint, "method": method, "status": status, **extra}
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs.items()) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(totals):
+    counters = [
+        ("apexpay_http_requests_total", "counter", "Requests served.", COUNT),
+        ("apexpay_db_queries_total", "counter", "Database queries run while serving requests.", QUERIES),
+        ("apexpay_db_query_seconds_total", "counter", "Time spent in database queries.", DB_SECONDS),
+        ("apexpay_serializer_seconds_total", "counter", "Time spent validating and serializing in DRF serializers.", SERIALIZER_SECONDS),
+        ("apexpay_http_response_bytes_total", "counter", "Response body bytes sent (streamed bodies without a Content-Length are not counted).", RESPONSE_BYTES),
+    ]
+    keys = sorted(totals)
+    lines = []
+    for name, kind, help_text, index in counters:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for key in keys:
+            lines.append(f"{name}{_labels(*key)} {_number(totals[key][index])}")
+
+    name = "apexpay_http_request_duration_seconds"
+    lines.append(f"# HELP {name} Request latency.")
+    lines.append(f"# TYPE {name} histogram")
+    for key in keys:
+        row = totals[key]
+        cumulative = 0
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            cumulative += row[VALUES + index]
+            lines.append(f"{name}_bucket{_labels(*key, le=bound)} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(*key, le='+Inf')} {row[COUNT]}")
+        lines.append(f"{name}_sum{_labels(*key)} {_number(row[SECONDS])}")
+        lines.append(f"{name}_count{_labels(*key)} {row[COUNT]}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,105 @@
+# Python imports
+import time
+
+# Django imports
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+# Third party imports
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+# App imports
+from monitoring import metrics, slow_queries
+
+
+class MetricsMiddleware:
+    """
+    Record each request's latency, DB queries and time, serializer time and
+    response size under its resolved URL name (see ``monitoring.metrics``).
+    Goes first in MIDDLEWARE so the latency covers the whole stack.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats, token = metrics.begin_request()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        self.record(request, response, time.perf_counter() - start, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats, token = metrics.begin_request()
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        self.record(request, response, time.perf_counter() - start, stats)
+        return response
+
+    @staticmethod
+    def record(request, response, seconds, stats):
+        match = request.resolver_match
+        # Unresolved paths share one label, so scanners can't grow the series.
+        endpoint = match.view_name if match else "unmatched"
+        if response.streaming:
+            size = int(response.get("Content-Length") or 0)
+        else:
+            size = len(response.content)
+        metrics.registry.observe((endpoint, request.method, str(response.status_code)), seconds, stats, size)
+        metrics.registry.maybe_flush()
+
+
+class SlowQueryMiddleware:
+    """
+    Attribute slow queries to the request's URL name and write the log
+    once the response is ready (see ``monitoring.slow_queries``). Only
+    installed when SLOW_QUERY_LOG is on.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_LOG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = slow_queries.begin_request(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            slow_queries.end_request(token)
+        slow_queries.log.maybe_flush()
+        return response
+
+    async def __acall__(self, request):
+        token = slow_queries.begin_request(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            slow_queries.end_request(token)
+        if slow_queries.log.due():
+            await sync_to_async(slow_queries.log.flush)()
+        return response
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-17 09:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=40)),
+                ('sql', models.TextField()),
+                ('endpoint', models.CharField(blank=True, max_length=200)),
+                ('call_site', models.CharField(blank=True, max_length=300)),
+                ('window', models.DateTimeField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total_ms', models.FloatField(default=0)),
+                ('max_ms', models.FloatField(default=0)),
+                ('last_seen', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Slow query',
+                'verbose_name_plural': 'Slow queries',
+                'db_table': 'SlowQueries',
+                'indexes': [models.Index(fields=['window'], name='slow_query_window_idx')],
+                'constraints': [models.UniqueConstraint(fields=('fingerprint', 'endpoint', 'call_site', 'window'), name='slow_query_group_window_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import models
+
+
+class SlowQuery(models.Model):
+    # Written by monitoring.slow_queries: one row per statement
+    # fingerprint, endpoint and calling code for each hour.
+    fingerprint = models.CharField(max_length=40)
+    sql = models.TextField()
+    endpoint = models.CharField(max_length=200, blank=True)
+    call_site = models.CharField(max_length=300, blank=True)
+    window = models.DateTimeField()
+    count = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    last_seen = models.DateTimeField()
+
+    def __str__(self):
+        return "{} - {} - {}".format(self.endpoint or "-", self.call_site or "-", self.fingerprint[:12])
+
+    @property
+    def mean_ms(self):
+        return self.total_ms / self.count if self.count else 0
+
+    class Meta:
+        verbose_name = 'Slow query'
+        verbose_name_plural = 'Slow queries'
+        db_table = "SlowQueries"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['fingerprint', 'endpoint', 'call_site', 'window'], name='slow_query_group_window_uniq'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['window'], name='slow_query_window_idx'),
+        ]
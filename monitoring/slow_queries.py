@@ -0,0 +1,193 @@
+"""
+Opt-in slow-query log (``SLOW_QUERY_LOG``).
+
+An execute_wrapper on every connection times each query. Queries slower
+than SLOW_QUERY_THRESHOLD_MS are grouped by fingerprint (the SQL with
+literals, parameters and IN / VALUES lists folded, so every run of the
+same statement matches), the URL name of the request that ran them and
+the application frame that issued them, e.g.
+``transactions/views.py:GetTransactions.get``.
+
+Each worker keeps count, total and max time per group and hour in memory
+and adds them to the SlowQuery table every SLOW_QUERY_FLUSH_SECONDS, after
+a request has been served. ``manage.py slow_queries`` and the admin read
+the table.
+"""
+
+# Python imports
+import atexit
+import contextvars
+import hashlib
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from functools import lru_cache
+from importlib import import_module
+
+# Django imports
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_request = contextvars.ContextVar("slow_query_request", default=None)
+# Set while the log writes its own rows, so they are never logged.
+_flushing = contextvars.ContextVar("slow_query_flushing", default=False)
+
+_PARAMS = re.compile(r"%s|\$\d+")
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROWS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_COMMENTS = re.compile(r"/\*.*?\*/|--[^\n]*", re.S)
+_SPACE = re.compile(r"\s+")
+
+_MONITORING_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+
+def normalize(sql):
+    """``sql`` with comments, literals and parameters replaced, lists folded."""
+    sql = _COMMENTS.sub(" ", sql)
+    sql = _PARAMS.sub("?", sql)
+    sql = _STRINGS.sub("?", sql)
+    sql = _NUMBERS.sub("?", sql)
+    sql = _LISTS.sub("(...)", sql)
+    sql = _ROWS.sub("(...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def fingerprint(normalized):
+    return hashlib.sha1(normalized.encode()).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _middleware_files():
+    return frozenset(import_module(path.rpartition(".")[0]).__file__ for path in settings.MIDDLEWARE)
+
+
+def call_site():
+    """
+    The innermost frame of project code: not an installed package, not this
+    app and not a middleware handing the request on.
+    """
+    base = os.path.join(str(settings.BASE_DIR), "")
+    frame = sys._getframe(1)
+    while frame is not None:
+        code = frame.f_code
+        filename = code.co_filename
+        if (
+            filename.startswith(base)
+            and not filename.startswith(_MONITORING_DIR)
+            and "site-packages" not in filename
+            and not (code.co_name in ("__call__", "__acall__") and filename in _middleware_files())
+        ):
+            return f"{os.path.relpath(filename, base)}:{code.co_qualname}"
+        frame = frame.f_back
+    return ""
+
+
+def begin_request(request):
+    return _request.set(request)
+
+
+def end_request(token):
+    _request.reset(token)
+
+
+def _endpoint():
+    request = _request.get()
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match else ""
+
+
+class SlowQueryLog:
+    """Slow queries seen by this worker since its last flush."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.last_flush = time.monotonic()
+
+    def add(self, sql, seconds):
+        normalized = normalize(sql)
+        now = timezone.now()
+        window = now.replace(minute=0, second=0, microsecond=0)
+        key = (fingerprint(normalized), _endpoint(), call_site(), window)
+        milliseconds = seconds * 1000
+        with self.lock:
+            row = self.pending.get(key)
+            if row is None:
+                self.pending[key] = [normalized, 1, milliseconds, milliseconds, now]
+            else:
+                row[1] += 1
+                row[2] += milliseconds
+                row[3] = max(row[3], milliseconds)
+                row[4] = now
+
+    def due(self):
+        return self.pending and time.monotonic() - self.last_flush >= settings.SLOW_QUERY_FLUSH_SECONDS
+
+    def maybe_flush(self):
+        if self.due():
+            self.flush()
+
+    def flush(self):
+        from monitoring.models import SlowQuery
+
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.last_flush = time.monotonic()
+        if not pending:
+            return
+
+        token = _flushing.set(True)
+        try:
+            for (digest, endpoint, site, window), (sql, count, total, worst, last) in pending.items():
+                group = SlowQuery.objects.filter(fingerprint=digest, endpoint=endpoint, call_site=site, window=window)
+                changes = dict(
+                    count=F("count") + count, total_ms=F("total_ms") + total,
+                    max_ms=Greatest("max_ms", Value(worst)), last_seen=last,
+                )
+                if group.update(**changes):
+                    continue
+                try:
+                    with transaction.atomic():
+                        SlowQuery.objects.create(
+                            fingerprint=digest, sql=sql, endpoint=endpoint, call_site=site, window=window,
+                            count=count, total_ms=total, max_ms=worst, last_seen=last,
+                        )
+                except IntegrityError:
+                    # Another worker created the row first.
+                    group.update(**changes)
+        except DatabaseError:
+            logger.warning("Could not write %d slow query groups", len(pending), exc_info=True)
+        finally:
+            _flushing.reset(token)
+
+
+log = SlowQueryLog()
+atexit.register(log.flush)
+
+
+def record_query(execute, sql, params, many, context):
+    if _flushing.get():
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        seconds = time.perf_counter() - start
+        if seconds * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+            log.add(sql, seconds)
+
+
+def instrument_connection(sender, connection, **kwargs):
+    """``connection_created`` receiver: time the queries of every new connection."""
+    if settings.SLOW_QUERY_LOG and record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
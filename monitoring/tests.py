@@ -0,0 +1,82 @@
+# Python imports
+import shutil
+import tempfile
+from unittest import mock
+
+# Django imports
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+# App imports
+from accounts.models import User
+from monitoring import metrics, slow_queries
+from monitoring.models import SlowQuery
+
+# rest_framework imports
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, THROTTLE_RATES={}, METRICS_TOKEN="scrape-me")
+class MetricsTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp(prefix="apexpay-metrics-test-")
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        directory_override = override_settings(METRICS_DIR=directory)
+        directory_override.enable()
+        self.addCleanup(directory_override.disable)
+        registry = mock.patch.object(metrics, "registry", metrics.Registry())
+        registry.start()
+        self.addCleanup(registry.stop)
+
+    def scrape(self, token="scrape-me"):
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"} if token else {}
+        return self.client.get("/metrics", **headers)
+
+    def test_requests_are_counted_per_endpoint(self):
+        user = User.objects.create_user(
+            email="ada@example.com", username="ada", password="Sup3r-secret!",
+            first_name="Ada", last_name="Lovelace", mobile="0800",
+        )
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+        for _ in range(3):
+            client.get(reverse("transactions"))
+
+        body = self.scrape().content.decode()
+
+        self.assertIn('apexpay_http_requests_total{endpoint="transactions",method="GET",status="200"} 3', body)
+        self.assertIn('apexpay_http_request_duration_seconds_count{endpoint="transactions",method="GET",status="200"} 3', body)
+
+    def test_scrapes_need_the_token(self):
+        self.assertEqual(self.scrape(token=None).status_code, 403)
+        self.assertEqual(self.scrape(token="guess").status_code, 403)
+        self.assertEqual(self.scrape().status_code, 200)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_without_a_token_metrics_are_only_served_in_debug(self):
+        self.assertEqual(self.scrape(token=None).status_code, 403)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.scrape(token=None).status_code, 200)
+
+
+class SlowQueryLogTests(TestCase):
+    def test_statements_differing_in_literals_share_a_fingerprint(self):
+        first = slow_queries.normalize("SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'a'")
+        second = slow_queries.normalize("SELECT  *  FROM t WHERE id IN (4) AND name = 'it''s'")
+
+        self.assertEqual(first, "SELECT * FROM t WHERE id IN (...) AND name = ?")
+        self.assertEqual(slow_queries.fingerprint(first), slow_queries.fingerprint(second))
+
+    def test_flushes_add_to_the_hourly_row(self):
+        log = slow_queries.SlowQueryLog()
+        log.add("SELECT * FROM t WHERE id = 1", 0.2)
+        log.add("SELECT * FROM t WHERE id = 2", 0.5)
+        log.flush()
+        log.add("SELECT * FROM t WHERE id = 3", 0.1)
+        log.flush()
+
+        row = SlowQuery.objects.get()
+        self.assertEqual(row.count, 3)
+        self.assertAlmostEqual(row.total_ms, 800)
+        self.assertAlmostEqual(row.max_ms, 500)
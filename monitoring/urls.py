@@ -0,0 +1,7 @@
+from django.urls import path
+
+from monitoring.views import prometheus_metrics
+
+urlpatterns = [
+    path('metrics', prometheus_metrics, name='metrics'),
+]
@@ -0,0 +1,25 @@
+# Python imports
+import hmac
+
+# Django imports
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+# App imports
+from monitoring import metrics
+
+
+@require_GET
+def prometheus_metrics(request):
+    """
+    Every worker's request metrics in the Prometheus text format. Requires
+    METRICS_TOKEN, except with DEBUG on and no token configured.
+    """
+    if settings.METRICS_TOKEN:
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(supplied, settings.METRICS_TOKEN):
+            return HttpResponseForbidden()
+    elif not settings.DEBUG:
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.render(metrics.collect()), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,6 +1,80 @@
 from django.contrib import admin
-from .models import Transaction, Wallet
+from django.db import transaction
+from django.utils import timezone
+from .models import IdempotencyKey, Transaction, TransactionSummary, Wallet
+from .services import SUMMARY_FIELDS, sync_latest_status, touch_wallets, update_summary
+
+
+class TransactionAdmin(admin.ModelAdmin):
+    list_display = ['user', 'transaction_type', 'amount', 'currency', 'status', 'date_created']
+    list_filter = ['transaction_type', 'status', 'currency']
+
+    def save_model(self, request, obj, form, change):
+        # Keep the running totals and latest-transaction pointers in step when
+        # an admin adds or processes a transaction by hand.
+        was_processed = change and form.initial.get("status") == "processed"
+        is_processed = obj.status == "processed"
+
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            if not obj.transaction_type:
+                return
+
+            wallet_id = (
+                Wallet.objects.select_for_update()
+                .filter(user=obj.user_id, currency=obj.currency)
+                .values_list("pk", flat=True)
+                .first()
+            )
+            if not wallet_id:
+                return
+            # Conditional GETs are validated against date_modified; a status
+            # change alone must still invalidate them.
+            Wallet.objects.filter(pk=wallet_id).update(date_modified=timezone.now())
+
+            if was_processed != is_processed:
+                sign = 1 if is_processed else -1
+                update_summary(wallet_id, obj.transaction_type, amount=sign * obj.amount, count=sign)
+            if change:
+                sync_latest_status(wallet_id, obj)
+            else:
+                update_summary(wallet_id, obj.transaction_type, latest=obj)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            touch_wallets([obj.user_id])
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            touch_wallets(queryset.values("user_id"))
+            super().delete_queryset(request, queryset)
+
+
+class TransactionSummaryAdmin(admin.ModelAdmin):
+    list_display = ['wallet', 'total_deposited', 'deposit_count', 'total_withdrawn', 'withdraw_count', 'last_activity']
+
+    def save_model(self, request, obj, form, change):
+        # Hand-corrected totals and pointers must invalidate the conditional
+        # GETs validated against them.
+        now = timezone.now()
+        for transaction_type, fields in SUMMARY_FIELDS.items():
+            if set(fields) & set(form.changed_data):
+                setattr(obj, f"last_{transaction_type}_activity", now)
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            Wallet.objects.filter(pk=obj.wallet_id).update(date_modified=now)
+
 
 # Register your models here.
-admin.site.register(Transaction)
-admin.site.register(Wallet)
\ No newline at end of file
+admin.site.register(Transaction, TransactionAdmin)
+admin.site.register(Wallet)
+admin.site.register(TransactionSummary, TransactionSummaryAdmin)
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ['user', 'key', 'status', 'response_status', 'date_created', 'expires_at']
+    list_filter = ['status']
+    search_fields = ['key', 'user__email']
+    raw_id_fields = ['user']
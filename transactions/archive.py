@@ -0,0 +1,368 @@
+"""
+Cold storage for old processed transactions.
+
+`manage.py archive_transactions` moves processed transactions older than
+TRANSACTION_ARCHIVE_AFTER_DAYS out of the Transactions table into
+append-only segments under TRANSACTION_ARCHIVE_DIR, grouped in one
+directory per month of ``date_created``. Ledger entries and the summaries'
+latest-transaction pointers keep the ids of the rows they reference (none
+of those foreign keys has a database constraint) and ``find`` resolves
+them once the rows are archived.
+
+A segment is gzip'd NDJSON with one gzip member per user, sorted by (user,
+date_created, id). Next to it, ``<segment>.index.json`` gives each user's
+byte range, row count, first and last ``date_created`` and totals, so one
+user's archived history decompresses only their rows and the totals never
+need the rows at all.
+
+MANIFEST lists the segments and readers only use the ``committed`` ones. A
+segment is listed as ``pending`` before its rows are deleted from the
+database and marked committed once that delete has committed; ``recover``
+settles segments a crashed run left pending.
+
+History pages, statement exports, reconciliation and summary rebuilds read
+through to the archive, so archiving changes where rows are stored but not
+what any of those return.
+"""
+
+# Python imports
+import datetime
+import fcntl
+import gzip
+import heapq
+import itertools
+import json
+import operator
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+
+# Django imports
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.lookups import Lookup
+from django.db.models.sql.where import AND, WhereNode
+from django.utils.dateparse import parse_datetime
+
+FIELDS = [
+    "id", "user_id", "transaction_type", "amount", "currency", "status",
+    "date_created", "claimed_by", "claimed_at", "date_processed",
+]
+DATE_FIELDS = ("date_created", "claimed_at", "date_processed")
+MANIFEST = "MANIFEST"
+PENDING = "pending"
+COMMITTED = "committed"
+
+_OPERATORS = {
+    "exact": operator.eq,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "in": lambda value, options: value in options,
+}
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def _path(*parts):
+    return os.path.join(settings.TRANSACTION_ARCHIVE_DIR, *parts)
+
+
+def _write_json(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(data, fh, cls=DjangoJSONEncoder, separators=(",", ":"))
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+
+def _sort_key(row):
+    return row["date_created"], row["id"]
+
+
+# -----------------------------------------------------------------------------
+# Writing (one archiver at a time, see writer_lock)
+# -----------------------------------------------------------------------------
+
+@contextmanager
+def writer_lock():
+    os.makedirs(_path(), exist_ok=True)
+    with open(_path(".lock"), "a") as fh:
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise ArchiveError("Another archive run holds the lock")
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def read_manifest():
+    try:
+        with open(_path(MANIFEST)) as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def _set_status(name, status):
+    manifest = read_manifest()
+    if status is None:
+        manifest.pop(name, None)
+    else:
+        manifest[name] = status
+    _write_json(_path(MANIFEST), manifest)
+
+
+def _totals(rows):
+    totals = {}
+    for row in rows:
+        key = (row["currency"], row["transaction_type"])
+        amount, count, last = totals.get(key, (0, 0, None))
+        totals[key] = (amount + row["amount"], count + 1, max(last, row["date_created"]) if last else row["date_created"])
+    return [[currency, kind, amount, count, last] for (currency, kind), (amount, count, last) in totals.items()]
+
+
+def write_segment(month, rows):
+    """
+    Write ``rows`` (dicts of FIELDS sorted by user_id, date_created, id)
+    as a new segment of ``month`` and list it as pending. Returns its name.
+    """
+    name = f"{month:%Y-%m}/{datetime.datetime.now(datetime.timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+    path = _path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    users = {}
+    with open(f"{path}.ndjson.gz.tmp", "wb") as fh:
+        for user_id, group in itertools.groupby(rows, key=operator.itemgetter("user_id")):
+            group = list(group)
+            offset = fh.tell()
+            lines = "".join(json.dumps(row, cls=DjangoJSONEncoder, separators=(",", ":")) + "\n" for row in group)
+            fh.write(gzip.compress(lines.encode(), mtime=0))
+            users[user_id] = {
+                "offset": offset, "length": fh.tell() - offset, "rows": len(group),
+                "first": group[0]["date_created"], "last": group[-1]["date_created"], "totals": _totals(group),
+            }
+        fh.flush()
+        os.fsync(fh.fileno())
+    _write_json(f"{path}.index.json", {"month": f"{month:%Y-%m}", "rows": len(rows), "users": users})
+    os.replace(f"{path}.ndjson.gz.tmp", f"{path}.ndjson.gz")
+
+    _set_status(name, PENDING)
+    return name
+
+
+def mark_committed(name):
+    _set_status(name, COMMITTED)
+
+
+def discard(name):
+    _set_status(name, None)
+    for suffix in (".ndjson.gz", ".index.json"):
+        try:
+            os.remove(_path(name) + suffix)
+        except FileNotFoundError:
+            pass
+
+
+def recover(still_in_database):
+    """
+    Settle the segments a previous run left pending. The delete that
+    follows a segment is all-or-nothing, so ``still_in_database(id)`` on
+    any one of its rows tells whether it committed. Returns
+    (committed, discarded) segment names.
+    """
+    committed, discarded = [], []
+    for name, status in read_manifest().items():
+        if status != PENDING:
+            continue
+        first = next(iter(Segment(name).all_rows()), None)
+        if first is not None and still_in_database(first["id"]):
+            discard(name)
+            discarded.append(name)
+        else:
+            mark_committed(name)
+            committed.append(name)
+    return committed, discarded
+
+
+# -----------------------------------------------------------------------------
+# Reading
+# -----------------------------------------------------------------------------
+
+def _decode(line):
+    row = json.loads(line)
+    for field in DATE_FIELDS:
+        if row[field] is not None:
+            row[field] = parse_datetime(row[field])
+    return row
+
+
+class Segment:
+    def __init__(self, name):
+        self.name = name
+        self.path = _path(name)
+        with open(f"{self.path}.index.json") as fh:
+            index = json.load(fh)
+        self.month = index["month"]
+        self.users = {}
+        for user_id, entry in index["users"].items():
+            entry["first"] = parse_datetime(entry["first"])
+            entry["last"] = parse_datetime(entry["last"])
+            self.users[int(user_id)] = entry
+
+    def read(self, user_id):
+        """One user's rows, oldest first."""
+        entry = self.users.get(user_id)
+        if entry is None:
+            return []
+        with open(f"{self.path}.ndjson.gz", "rb") as fh:
+            fh.seek(entry["offset"])
+            data = gzip.decompress(fh.read(entry["length"]))
+        return [_decode(line) for line in data.splitlines()]
+
+    def all_rows(self):
+        with gzip.open(f"{self.path}.ndjson.gz", "rb") as fh:
+            for line in fh:
+                yield _decode(line)
+
+
+class _Catalog:
+    """The committed segments, reloaded whenever MANIFEST is replaced."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.segments = []
+        self.by_user = {}
+
+    def load(self):
+        try:
+            stat = os.stat(_path(MANIFEST))
+        except FileNotFoundError:
+            # Nothing archived here (yet), or TRANSACTION_ARCHIVE_DIR changed.
+            if self.version is not None:
+                with self.lock:
+                    self.segments, self.by_user, self.version = [], {}, None
+            return self
+        version = (settings.TRANSACTION_ARCHIVE_DIR, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if version == self.version:
+            return self
+
+        with self.lock:
+            if version != self.version:
+                loaded = {segment.name: segment for segment in self.segments}
+                names = sorted(name for name, status in read_manifest().items() if status == COMMITTED)
+                segments = [loaded.get(name) or Segment(name) for name in names]
+                by_user = {}
+                for segment in segments:
+                    for user_id in segment.users:
+                        by_user.setdefault(user_id, []).append(segment)
+                self.segments, self.by_user, self.version = segments, by_user, version
+        return self
+
+
+_catalog = _Catalog()
+
+
+def segments():
+    return _catalog.load().segments
+
+
+def user_segments(user_id):
+    return _catalog.load().by_user.get(user_id, [])
+
+
+def _conditions(node):
+    if node.negated or (node.connector != AND and len(node.children) > 1):
+        raise ArchiveError("Only AND-ed filters can be applied to archived rows")
+    for child in node.children:
+        if isinstance(child, WhereNode):
+            yield from _conditions(child)
+        elif isinstance(child, Lookup) and child.lookup_name in _OPERATORS and hasattr(child.lhs, "target"):
+            yield child.lhs.target.attname, _OPERATORS[child.lookup_name], child.rhs
+        else:
+            raise ArchiveError(f"Cannot apply {child!r} to archived rows")
+
+
+def criteria(queryset):
+    """
+    The user a Transaction queryset is scoped to, and a predicate that
+    applies its filters to archived rows. Supports the plain field lookups
+    the views use (exact, in and comparisons), AND-ed together.
+    """
+    conditions = list(_conditions(queryset.query.where))
+    users = [value for name, test, value in conditions if name == "user_id" and test is operator.eq]
+    if not users:
+        raise ArchiveError("Archived rows are read one user at a time")
+
+    def matches(row):
+        return all(test(row[name], value) for name, test, value in conditions)
+
+    return users[0], matches
+
+
+def history(queryset, newest_first=False, before=None):
+    """
+    Archived rows ``queryset`` would have selected, as dicts of FIELDS in
+    (date_created, id) order. ``before`` skips rows at or after that
+    (date_created, id) position when reading newest first.
+    """
+    user_id, matches = criteria(queryset)
+    found = []
+    for segment in user_segments(user_id):
+        if before is not None and segment.users[user_id]["first"] > before[0]:
+            continue
+        rows = [row for row in segment.read(user_id) if matches(row)]
+        if before is not None:
+            rows = [row for row in rows if _sort_key(row) < before]
+        found.append(reversed(rows) if newest_first else rows)
+    return heapq.merge(*found, key=_sort_key, reverse=newest_first)
+
+
+def find(user_id, pk):
+    """The archived row with id ``pk`` among ``user_id``'s, or None."""
+    for segment in user_segments(user_id):
+        for row in segment.read(user_id):
+            if row["id"] == pk:
+                return row
+    return None
+
+
+def latest_archived(queryset):
+    """Newest archived ``date_created`` for the queryset's user, or None."""
+    user_id, _ = criteria(queryset)
+    entries = [segment.users[user_id]["last"] for segment in user_segments(user_id)]
+    return max(entries) if entries else None
+
+
+def merge_values(queryset, rows, columns):
+    """
+    Merge the archived rows of ``queryset`` into ``rows``, an iterable of
+    ``values_list(*columns)`` tuples ordered oldest first.
+    """
+    if not segments() or not user_segments(criteria(queryset)[0]):
+        return rows
+    date_index, id_index = columns.index("date_created"), columns.index("id")
+    archived = (tuple(row[column] for column in columns) for row in history(queryset))
+    return heapq.merge(archived, rows, key=lambda row: (row[date_index], row[id_index]))
+
+
+def totals(lo=None, hi=None):
+    """
+    Archived totals per user as (user_id, currency, transaction_type,
+    amount, count, last date_created), one tuple per segment and type, for
+    user ids in [lo, hi).
+    """
+    for segment in segments():
+        for user_id, entry in segment.users.items():
+            if (lo is not None and user_id < lo) or (hi is not None and user_id >= hi):
+                continue
+            for currency, kind, amount, count, last in entry["totals"]:
+                yield user_id, currency, kind, amount, count, parse_datetime(last)
@@ -0,0 +1,78 @@
+"""
+Async versions of the read-only transaction endpoints, served instead of the
+sync ones when ``settings.ASYNC_READ_VIEWS`` is on (the default under ASGI,
+see ``apexpay_core/asgi.py``). Each view reuses its sync counterpart's
+configuration and response building and only swaps the database access for
+Django's async ORM, so a worker's event loop can keep many slow polls in
+flight at once.
+"""
+
+# App imports
+from transactions import views
+from transactions.conditional import aconditional
+from transactions.models import Transaction
+
+# Third party imports
+from adrf.generics import GenericAPIView
+
+
+class AsyncWalletMixin:
+    async def aget_wallet(self):
+        wallets = self.request.__dict__.setdefault("_wallets", {})
+        currency = self.get_currency()
+        if currency not in wallets:
+            wallets[currency] = await self.get_wallet_queryset(currency).afirst()
+        return wallets[currency]
+
+    async def aget_summary(self):
+        return self.summary_of(await self.aget_wallet())
+
+
+class GetTransactions(views.GetTransactions, GenericAPIView):
+
+    @aconditional
+    async def get(self, request):
+        transactions = self.filter_queryset(Transaction.objects.filter(user=request.user))
+        return self.page_response(await self.paginator.apaginate_queryset(transactions, request, view=self))
+
+
+class GetWallet(AsyncWalletMixin, views.GetWallet, GenericAPIView):
+
+    @aconditional
+    async def get(self, request):
+        return self.wallet_response(await self.aget_wallet())
+
+
+class TransactionStatusView(AsyncWalletMixin, views.TransactionStatusView, GenericAPIView):
+
+    @aconditional
+    async def get(self, request):
+        last_tx = self.latest_of(await self.aget_summary())
+        history = None
+        if last_tx and self.wants_history():
+            history = await self.paginator.apaginate_queryset(self.get_history_queryset(), request, view=self)
+        return self.status_response(last_tx, history)
+
+
+class GetDepositStatus(TransactionStatusView):
+    transaction_type = views.GetDepositStatus.transaction_type
+    messages = views.GetDepositStatus.messages
+
+
+class GetWithdrawStatus(TransactionStatusView):
+    transaction_type = views.GetWithdrawStatus.transaction_type
+    messages = views.GetWithdrawStatus.messages
+
+
+class TotalDeposit(AsyncWalletMixin, views.TotalDeposit, GenericAPIView):
+
+    @aconditional
+    async def get(self, request):
+        return self.total_response(await self.aget_summary())
+
+
+class TotalWithdraw(AsyncWalletMixin, views.TotalWithdraw, GenericAPIView):
+
+    @aconditional
+    async def get(self, request):
+        return self.total_response(await self.aget_summary())
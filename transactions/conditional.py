@@ -0,0 +1,124 @@
+# Python imports
+import functools
+import hashlib
+
+# Django imports
+from django.db.models import Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+# App imports
+from transactions.models import Wallet
+from transactions.services import SUMMARY_FIELDS
+
+
+def _version_query(user, currency, totals=None):
+    wallets = Wallet.objects.filter(user=user)
+    if currency:
+        wallets = wallets.filter(currency=currency)
+    if totals:
+        return wallets, {
+            "modified": Max(f"summary__last_{totals}_activity"),
+            "count": Max(f"summary__{SUMMARY_FIELDS[totals][1]}"),
+        }
+    return wallets, {
+        "modified": Max("date_modified"),
+        "last_deposit": Max("summary__last_deposit"),
+        "last_withdraw": Max("summary__last_withdraw"),
+    }
+
+
+def _version(aggregate):
+    modified = aggregate.pop("modified")
+    return modified, max(value or 0 for value in aggregate.values())
+
+
+def resource_version(user, currency=None, totals=None):
+    """
+    One aggregate over the user's wallets (in ``currency`` if given): when
+    they last changed and the newest transaction they point at. Every
+    balance change and every status change touches ``Wallet.date_modified``.
+
+    With ``totals`` ("deposit" or "withdraw") only that type's running
+    totals count: when they last changed and how many transactions they hold.
+    """
+    wallets, aggregates = _version_query(user, currency, totals)
+    return _version(wallets.aggregate(**aggregates))
+
+
+async def aresource_version(user, currency=None, totals=None):
+    wallets, aggregates = _version_query(user, currency, totals)
+    return _version(await wallets.aaggregate(**aggregates))
+
+
+def _validators(request, modified, latest):
+    # The same data renders differently per URL (filters, cursor) and per
+    # negotiated format, so both are part of the tag.
+    etag = quote_etag(hashlib.md5(
+        "|".join([
+            str(request.user.pk), request.get_full_path(), request.META.get("HTTP_ACCEPT", ""),
+            modified.isoformat() if modified else "", str(latest),
+        ]).encode()
+    ).hexdigest())
+    last_modified = int(modified.timestamp()) if modified else None
+    return etag, last_modified
+
+
+def _add_validators(response, etag, last_modified):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    # Per-user data: never shared by caches, always revalidated.
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ["Authorization"])
+    return response
+
+
+def conditional(view_method):
+    """
+    Give a GET handler ETag / Last-Modified validators computed from
+    ``resource_version``, answering ``304 Not Modified`` before the handler
+    runs when the client's copy is still current. Views that expose
+    ``get_currency`` are versioned by that wallet only, and views that set
+    ``summary_totals`` by that transaction type's totals only.
+    """
+
+    @functools.wraps(view_method)
+    def wrapper(view, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return view_method(view, request, *args, **kwargs)
+
+        currency = view.get_currency() if hasattr(view, "get_currency") else None
+        totals = getattr(view, "summary_totals", None)
+        etag, last_modified = _validators(request, *resource_version(request.user, currency, totals))
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = view_method(view, request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        return _add_validators(response, etag, last_modified)
+
+    return wrapper
+
+
+def aconditional(view_method):
+    """``conditional`` for async handlers."""
+
+    @functools.wraps(view_method)
+    async def wrapper(view, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return await view_method(view, request, *args, **kwargs)
+
+        currency = view.get_currency() if hasattr(view, "get_currency") else None
+        totals = getattr(view, "summary_totals", None)
+        etag, last_modified = _validators(request, *(await aresource_version(request.user, currency, totals)))
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = await view_method(view, request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        return _add_validators(response, etag, last_modified)
+
+    return wrapper
@@ -0,0 +1,72 @@
+# Python imports
+import csv
+import io
+import json
+import tempfile
+
+# Django imports
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Third party imports
+from openpyxl import Workbook
+
+COLUMNS = ["id", "date_created", "transaction_type", "currency", "amount", "status", "date_processed"]
+
+# Rows are written out in blocks so each chunk sent to the client is a
+# reasonable size instead of one tiny write per row.
+ROWS_PER_CHUNK = 500
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+def stream_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_ndjson(rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(COLUMNS, row)), cls=DjangoJSONEncoder))
+        if len(lines) >= ROWS_PER_CHUNK:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def stream_xlsx(rows):
+    # XLSX is a zip archive, so nothing can be sent before the workbook is
+    # complete. Write-only mode keeps memory flat while it is built on disk;
+    # the finished file is then streamed back in chunks.
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Statement")
+    sheet.append(COLUMNS)
+    for row in rows:
+        sheet.append([
+            value.replace(tzinfo=None) if hasattr(value, "tzinfo") and value.tzinfo else value
+            for value in row
+        ])
+
+    with tempfile.TemporaryFile() as output:
+        workbook.save(output)
+        output.seek(0)
+        while True:
+            chunk = output.read(FILE_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+EXPORT_FORMATS = {
+    "csv": (stream_csv, "text/csv"),
+    "ndjson": (stream_ndjson, "application/x-ndjson"),
+    "xlsx": (stream_xlsx, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
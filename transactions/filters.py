@@ -0,0 +1,71 @@
+# Python imports
+from datetime import datetime, time
+
+# Django imports
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+# App imports
+from transactions.models import status, type
+
+# rest_framework imports
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+def parse_bound(name, value, end_of_day=False):
+    """Accepts an ISO date or datetime; a bare date covers the whole day."""
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValidationError({name: "Use an ISO 8601 date or datetime"})
+            moment = datetime.combine(day, time.max if end_of_day else time.min)
+    except ValueError:
+        # Well formed but impossible, e.g. 2024-02-30.
+        raise ValidationError({name: "Not a valid date"})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class TransactionFilter(BaseFilterBackend):
+    """
+    ?transaction_type=, ?status=, ?currency=, ?date_from=, ?date_to=
+
+    Pages walk one of the (user, [transaction_type], -date_created, -id)
+    indexes on Transaction; the other filters are applied on top.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+
+        transaction_type = params.get("transaction_type")
+        if transaction_type:
+            if transaction_type not in dict(type):
+                raise ValidationError({"transaction_type": "Unknown transaction type"})
+            queryset = queryset.filter(transaction_type=transaction_type)
+
+        transaction_status = params.get("status")
+        if transaction_status:
+            if transaction_status not in dict(status):
+                raise ValidationError({"status": "Unknown status"})
+            queryset = queryset.filter(status=transaction_status)
+
+        currency = params.get("currency")
+        if currency:
+            if currency.upper() not in settings.SUPPORTED_CURRENCIES:
+                raise ValidationError({"currency": "Unsupported currency"})
+            queryset = queryset.filter(currency=currency.upper())
+
+        date_from = params.get("date_from")
+        if date_from:
+            queryset = queryset.filter(date_created__gte=parse_bound("date_from", date_from))
+
+        date_to = params.get("date_to")
+        if date_to:
+            queryset = queryset.filter(date_created__lte=parse_bound("date_to", date_to, end_of_day=True))
+
+        return queryset
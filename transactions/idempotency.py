@@ -0,0 +1,195 @@
+# Python imports
+import functools
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+# Django imports
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+# App imports
+from transactions.models import IdempotencyKey
+
+# rest_framework imports
+from rest_framework import status
+from rest_framework.response import Response
+
+HEADER = "Idempotency-Key"
+
+
+class ResponseCache:
+    """Bounded in-process LRU of completed responses, each valid until its own expiry time."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[-1] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, fingerprint, response_status, response_body, expires_at):
+        with self._lock:
+            self._entries[key] = (fingerprint, response_status, response_body, expires_at.timestamp())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = ResponseCache(settings.IDEMPOTENCY_CACHE_SIZE)
+
+# Requests currently running in this process, so duplicates can wait on an
+# event instead of polling the database.
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def fingerprint_request(request):
+    payload = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f"{request.method} {request.path}\n{payload}".encode()).hexdigest()
+
+
+def _replay(fingerprint, entry):
+    stored_fingerprint, response_status, response_body = entry[:3]
+    if stored_fingerprint != fingerprint:
+        return Response(
+            {"message": "This Idempotency-Key was already used for a different request"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    return Response(response_body, status=response_status, headers={"Idempotent-Replayed": "true"})
+
+
+def _claim(user, key, fingerprint):
+    """Return (record, claimed). ``claimed`` is True when this request must run the view."""
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    try:
+        with transaction.atomic():
+            record = IdempotencyKey.objects.create(
+                user=user, key=key, fingerprint=fingerprint, date_claimed=now, expires_at=expires_at
+            )
+        return record, True
+    except IntegrityError:
+        record = IdempotencyKey.objects.get(user=user, key=key)
+
+    abandoned = record.status == "in_progress" and record.date_claimed < now - timedelta(
+        seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT
+    )
+    if record.expires_at <= now or abandoned:
+        # Expired or left behind by a crashed worker: take it over, unless
+        # another retry gets there first.
+        taken = IdempotencyKey.objects.filter(
+            pk=record.pk, status=record.status, date_claimed=record.date_claimed
+        ).update(
+            status="in_progress", fingerprint=fingerprint, date_claimed=now, expires_at=expires_at,
+            response_status=None, response_body=None,
+        )
+        if taken:
+            record.fingerprint, record.date_claimed, record.expires_at = fingerprint, now, expires_at
+            return record, True
+        record = IdempotencyKey.objects.get(pk=record.pk)
+    return record, False
+
+
+def _wait_for(cache_key, record):
+    """Wait for the in-flight request holding ``record`` to finish; None on timeout."""
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+
+    event = _inflight.get(cache_key)
+    if event is not None:
+        event.wait(settings.IDEMPOTENCY_WAIT_SECONDS)
+        entry = response_cache.get(cache_key)
+        if entry is not None:
+            return entry
+
+    while True:
+        record = IdempotencyKey.objects.filter(pk=record.pk).first()
+        if record is None:
+            return None
+        if record.status == "completed":
+            return (record.fingerprint, record.response_status, record.response_body, record.expires_at.timestamp())
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(0.05)
+
+
+def idempotent(view_method):
+    """
+    Make a POST handler honour the ``Idempotency-Key`` header: the first
+    non-5xx response for each (user, key) is stored and replayed to retries
+    without running the handler again.
+    """
+
+    @functools.wraps(view_method)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key or not request.user.is_authenticated:
+            return view_method(view, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response(
+                {"message": "Idempotency-Key must be at most 255 characters"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fingerprint = fingerprint_request(request)
+        cache_key = (request.user.pk, key)
+        entry = response_cache.get(cache_key)
+        if entry is not None:
+            return _replay(fingerprint, entry)
+
+        record, claimed = _claim(request.user, key, fingerprint)
+        if not claimed:
+            if record.fingerprint != fingerprint:
+                return _replay(fingerprint, (record.fingerprint, None, None))
+            entry = _wait_for(cache_key, record)
+            if entry is None:
+                return Response(
+                    {"message": "A request with this Idempotency-Key is still being processed"},
+                    status=status.HTTP_409_CONFLICT
+                )
+            response_cache.set(cache_key, entry[0], entry[1], entry[2], record.expires_at)
+            return _replay(fingerprint, entry)
+
+        event = threading.Event()
+        with _inflight_lock:
+            _inflight[cache_key] = event
+        try:
+            # The stored response commits together with the writes it
+            # describes.
+            with transaction.atomic():
+                response = view_method(view, request, *args, **kwargs)
+                if response.status_code < 500:
+                    IdempotencyKey.objects.filter(pk=record.pk).update(
+                        status="completed", response_status=response.status_code, response_body=response.data
+                    )
+            if response.status_code < 500:
+                response_cache.set(cache_key, fingerprint, response.status_code, response.data, record.expires_at)
+            else:
+                IdempotencyKey.objects.filter(pk=record.pk).delete()
+            return response
+        except Exception:
+            IdempotencyKey.objects.filter(pk=record.pk).delete()
+            raise
+        finally:
+            with _inflight_lock:
+                _inflight.pop(cache_key, None)
+            event.set()
+
+    return wrapper
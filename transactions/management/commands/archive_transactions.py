@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from transactions import archive
+from transactions.models import Transaction
+from transactions.partitions import add_months, month_start
+from transactions.services import touch_wallets
+
+DELETE_BATCH = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Move processed transactions older than --older-than-days out of the database into "
+        "compressed archive segments, one month at a time. See transactions/archive.py."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-days", type=int, default=settings.TRANSACTION_ARCHIVE_AFTER_DAYS)
+        parser.add_argument(
+            "--segment-rows", type=int, default=settings.TRANSACTION_ARCHIVE_SEGMENT_ROWS,
+            help="Most rows written to one segment.",
+        )
+
+    def handle(self, *args, **options):
+        if options["older_than_days"] < 1:
+            raise CommandError("--older-than-days must be at least 1")
+        cutoff = timezone.now() - timedelta(days=options["older_than_days"])
+
+        candidates = Transaction.objects.filter(status="processed", date_created__lt=cutoff)
+
+        try:
+            with archive.writer_lock():
+                committed, discarded = archive.recover(lambda pk: Transaction.objects.filter(pk=pk).exists())
+                for name in committed:
+                    self.stdout.write(f"Recovered {name}")
+                for name in discarded:
+                    self.stdout.write(f"Discarded {name}, its rows were never removed")
+
+                archived = segments = 0
+                oldest = candidates.aggregate(oldest=Min("date_created"))["oldest"]
+                month = month_start(oldest) if oldest else None
+                while month is not None and month < cutoff:
+                    end = min(add_months(month, 1), cutoff)
+                    rows = candidates.filter(date_created__gte=month, date_created__lt=end)
+                    while True:
+                        count = self.archive_segment(month, end, rows, options["segment_rows"])
+                        if not count:
+                            break
+                        archived += count
+                        segments += 1
+                    month = add_months(month, 1)
+        except archive.ArchiveError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} transactions into {segments} segments"))
+
+    def archive_segment(self, month, end, rows, limit):
+        with transaction.atomic():
+            batch = list(rows.order_by("user_id", "date_created", "id").values(*archive.FIELDS)[:limit])
+            if not batch:
+                return 0
+            name = archive.write_segment(month, batch)
+            # Read-through serves the same history, but the rows' owners get
+            # fresh validators rather than trusting that.
+            touch_wallets({row["user_id"] for row in batch})
+            ids = [row["id"] for row in batch]
+            for start in range(0, len(ids), DELETE_BATCH):
+                self.delete_rows(ids[start:start + DELETE_BATCH], month, end)
+        archive.mark_committed(name)
+        self.stdout.write(f"{name}: {len(batch)} transactions")
+        return len(batch)
+
+    def delete_rows(self, ids, month, end):
+        # A plain DELETE rather than the ORM's: ledger entries (PROTECT) and
+        # summary pointers (SET_NULL) are meant to keep the archived ids, and
+        # archive.find resolves them from the segment just written.
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {qn(Transaction._meta.db_table)} WHERE id IN ({', '.join(['%s'] * len(ids))}) "
+                "AND date_created >= %s AND date_created < %s",
+                [*ids, month, end],
+            )
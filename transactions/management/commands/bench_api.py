@@ -0,0 +1,308 @@
+import asyncio
+import json
+import os
+import re
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import OutboxEmail
+from apexpay_core.benchmark import (
+    SERVERS, Timer, benchmark_database, database_url, http_request, run_server, summarize_latencies, write_report,
+)
+
+STEPS = ["register", "activate", "login", "deposit", "withdraw", "balance", "transactions"]
+PASSWORD = "Bench-api-Passw0rd!"
+ACTIVATION_PATH = re.compile(r"/api/v1/auth/confirm-email/[^/\s]+/[^/\s]+")
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the register -> activate -> login -> deposit -> withdraw -> balance -> transactions flow "
+        "through the real URLconf, in-process and under gunicorn (WSGI) / uvicorn (ASGI), and report "
+        "throughput, latency percentiles and DB queries per endpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50, help="Flows per mode; each registers a new user.")
+        parser.add_argument("--concurrency", type=int, default=8, help="Flows running at once.")
+        parser.add_argument(
+            "--reads", type=int, default=5, help="Balance and transaction history requests per flow.",
+        )
+        parser.add_argument(
+            "--modes", nargs="+", choices=["inprocess", *sorted(SERVERS)], default=["inprocess", "wsgi", "asgi"],
+        )
+        parser.add_argument("--workers", type=int, default=2, help="Server worker processes for wsgi and asgi.")
+        parser.add_argument("--port", type=int, default=8766)
+        parser.add_argument("--output", help="Write the results as JSON to this path.")
+        parser.add_argument("--baseline", help="A previous --output file to compare against.")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            try:
+                with open(options["baseline"]) as fh:
+                    baseline = json.load(fh)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read baseline {options['baseline']}: {exc}")
+
+        # benchmark_database switches throttling off in this process only; an
+        # empty rate switches each scope off in the servers too.
+        throttling_off = ",".join(f"{name}=" for name in settings.THROTTLE_RATES)
+        report = {
+            "options": {k: options[k] for k in ("users", "concurrency", "reads", "workers")},
+            "database": connection.vendor,
+            "modes": {},
+        }
+        with benchmark_database() as db:
+            queries = None
+            for mode in options["modes"]:
+                if mode == "inprocess":
+                    result = run_inprocess(mode, options["users"], options["concurrency"], options["reads"])
+                    queries = {step: row["queries_per_request"] for step, row in result["endpoints"].items()}
+                else:
+                    if queries is None:
+                        # Queries run in the server processes, out of sight:
+                        # count them on a couple of in-process flows instead.
+                        calibration = run_inprocess("calibrate", 2, 1, options["reads"])
+                        queries = {step: row["queries_per_request"] for step, row in calibration["endpoints"].items()}
+                    env = dict(
+                        os.environ, DATABASE_URL=database_url(db), DEBUG="False", PYTHONUNBUFFERED="1",
+                        THROTTLE_RATES=throttling_off,
+                    )
+                    env.pop("ASYNC_READ_VIEWS", None)
+                    # The servers share the database (file) with this process.
+                    db.close()
+                    with run_server(mode, options["port"], options["workers"], env):
+                        result = asyncio.run(
+                            run_servers_load(mode, options["port"], options["users"], options["concurrency"], options["reads"])
+                        )
+                    for step, row in result["endpoints"].items():
+                        row["queries_per_request"] = queries.get(step)
+                report["modes"][mode] = result
+                self.print_mode(mode, result)
+
+        if baseline is not None:
+            report["baseline"] = {"path": options["baseline"], "changes": compare(baseline, report)}
+            self.print_changes(report["baseline"]["changes"])
+
+        self.stdout.write(self.style.SUCCESS("Done"))
+        if options["output"]:
+            write_report(options["output"], report)
+
+    def print_mode(self, mode, result):
+        self.stdout.write(
+            f"{mode}: {result['flows_per_second']:.2f} flows/s, {result['requests_per_second']:.1f} req/s, "
+            f"errors={result['errors']}"
+        )
+        for step, row in result["endpoints"].items():
+            latency = row["latency"]
+            self.stdout.write(
+                f"  {step:<12} {row['requests_per_second']:8.1f} req/s  p50={latency.get('p50_ms')}ms "
+                f"p95={latency.get('p95_ms')}ms p99={latency.get('p99_ms')}ms  "
+                f"queries={row['queries_per_request']}  errors={row['errors']}"
+            )
+
+    def print_changes(self, changes):
+        for mode, steps in changes.items():
+            for step, change in steps.items():
+                self.stdout.write(
+                    f"{mode} {step}: p95 {change['p95_ms_change_pct']:+.1f}%, "
+                    f"req/s {change['requests_per_second_change_pct']:+.1f}%, "
+                    f"queries {change['queries_per_request_change']:+}"
+                )
+
+
+class Recorder:
+    """Per-endpoint latencies, error counts and query counts, shared by the clients."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {step: [] for step in STEPS}
+        self.errors = dict.fromkeys(STEPS, 0)
+        self.queries = {step: [] for step in STEPS}
+        self.flows = 0
+
+    def add(self, step, elapsed, status, queries=None):
+        with self.lock:
+            self.latencies[step].append(elapsed)
+            if status is None or status >= 400:
+                self.errors[step] += 1
+            if queries is not None:
+                self.queries[step].append(queries)
+
+    def flow_done(self):
+        with self.lock:
+            self.flows += 1
+
+    def report(self, elapsed):
+        endpoints = {}
+        for step in STEPS:
+            latencies = self.latencies[step]
+            endpoints[step] = {
+                "requests": len(latencies),
+                "errors": self.errors[step],
+                "requests_per_second": len(latencies) / elapsed,
+                "queries_per_request": round(statistics.fmean(self.queries[step]), 2) if self.queries[step] else None,
+                "latency": summarize_latencies(latencies),
+            }
+        requests = sum(row["requests"] for row in endpoints.values())
+        return {
+            "flows": self.flows,
+            "elapsed_seconds": round(elapsed, 3),
+            "flows_per_second": self.flows / elapsed,
+            "requests_per_second": requests / elapsed,
+            "errors": sum(self.errors.values()),
+            "endpoints": endpoints,
+        }
+
+
+def activation_path(email):
+    """The link Register emailed to ``email``, taken from the outbox."""
+    message = OutboxEmail.objects.filter(recipients__0=email).order_by("-id").first()
+    match = message and ACTIVATION_PATH.search(message.body)
+    if not match:
+        raise CommandError(f"No activation email queued for {email}")
+    return match[0] + "/"
+
+
+def registration(tag, n):
+    email = f"bench-api-{tag}-{n}@example.com"
+    return email, {
+        "email": email, "username": f"bench-api-{tag}-{n}", "password": PASSWORD,
+        "first_name": "Bench", "last_name": str(n),
+    }
+
+
+# -----------------------------------------------------------------------------
+# In-process: the Django test client, one thread per concurrent flow
+# -----------------------------------------------------------------------------
+
+def run_inprocess(tag, users, concurrency, reads):
+    recorder = Recorder()
+    with Timer() as timer, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(inprocess_flow, recorder, tag, n, reads) for n in range(users)]:
+            future.result()
+    return recorder.report(timer.elapsed)
+
+
+def inprocess_flow(recorder, tag, n, reads):
+    client = APIClient()
+
+    def call(step, method, path, data=None):
+        with CaptureQueriesContext(connection) as queries, Timer() as timer:
+            if method == "post":
+                response = client.post(path, data, format="json", secure=True)
+            else:
+                response = client.get(path, secure=True)
+        recorder.add(step, timer.elapsed, response.status_code, len(queries))
+        return response
+
+    try:
+        email, body = registration(tag, n)
+        call("register", "post", reverse("register"), body)
+        call("activate", "get", activation_path(email))
+        response = call("login", "post", reverse("login"), {"email": email, "password": PASSWORD})
+        if response.status_code != 200:
+            return
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['data']['access']}")
+        call("deposit", "post", reverse("deposit"), {"transaction_type": "deposit", "amount": 1000})
+        call("withdraw", "post", reverse("withdraw"), {"transaction_type": "withdraw", "amount": 100})
+        for _ in range(reads):
+            call("balance", "get", reverse("acc-balance"))
+            call("transactions", "get", reverse("transactions"))
+        recorder.flow_done()
+    finally:
+        connections.close_all()
+
+
+# -----------------------------------------------------------------------------
+# gunicorn / uvicorn: asyncio clients over keep-alive connections
+# -----------------------------------------------------------------------------
+
+async def run_servers_load(tag, port, users, concurrency, reads):
+    recorder = Recorder()
+    limit = asyncio.Semaphore(concurrency)
+    find_activation = sync_to_async(activation_path)
+
+    async def flow(n):
+        async with limit:
+            await server_flow(recorder, port, tag, n, reads, find_activation)
+
+    with Timer() as timer:
+        await asyncio.gather(*(flow(n) for n in range(users)))
+    return recorder.report(timer.elapsed)
+
+
+async def server_flow(recorder, port, tag, n, reads, find_activation):
+    stream = None
+    token = None
+
+    async def call(step, method, path, body=None):
+        nonlocal stream
+        start = time.perf_counter()
+        try:
+            if stream is None:
+                stream = await asyncio.open_connection("127.0.0.1", port)
+            status, keep_alive, content = await http_request(*stream, method, path, token, body)
+        except (OSError, asyncio.IncompleteReadError):
+            recorder.add(step, time.perf_counter() - start, None)
+            stream = None
+            return None, None
+        recorder.add(step, time.perf_counter() - start, status)
+        if not keep_alive:
+            stream[1].close()
+            stream = None
+        return status, content
+
+    try:
+        email, body = registration(tag, n)
+        await call("register", "POST", reverse("register"), body)
+        await call("activate", "GET", await find_activation(email))
+        status, content = await call("login", "POST", reverse("login"), {"email": email, "password": PASSWORD})
+        if status != 200:
+            return
+        token = json.loads(content)["data"]["access"]
+        await call("deposit", "POST", reverse("deposit"), {"transaction_type": "deposit", "amount": 1000})
+        await call("withdraw", "POST", reverse("withdraw"), {"transaction_type": "withdraw", "amount": 100})
+        for _ in range(reads):
+            await call("balance", "GET", reverse("acc-balance"))
+            await call("transactions", "GET", reverse("transactions"))
+        recorder.flow_done()
+    finally:
+        if stream is not None:
+            stream[1].close()
+
+
+def compare(baseline, report):
+    """Per mode and endpoint changes from ``baseline``, for the modes both runs measured."""
+    changes = {}
+    for mode, result in report["modes"].items():
+        before = baseline.get("modes", {}).get(mode)
+        if not before:
+            continue
+        for step, row in result["endpoints"].items():
+            old = before["endpoints"].get(step)
+            if not old or not old["latency"].get("count") or not row["latency"].get("count"):
+                continue
+            changes.setdefault(mode, {})[step] = {
+                "p95_ms_change_pct": percent_change(old["latency"]["p95_ms"], row["latency"]["p95_ms"]),
+                "requests_per_second_change_pct": percent_change(old["requests_per_second"], row["requests_per_second"]),
+                "queries_per_request_change": round(
+                    (row["queries_per_request"] or 0) - (old["queries_per_request"] or 0), 2
+                ),
+            }
+    return changes
+
+
+def percent_change(old, new):
+    return round((new - old) / old * 100, 1) if old else 0.0
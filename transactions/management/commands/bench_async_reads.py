@@ -0,0 +1,112 @@
+import asyncio
+import itertools
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from apexpay_core.benchmark import (
+    SERVERS, benchmark_database, database_url, http_request, run_server, summarize_latencies, write_report,
+)
+from transactions.services import deposit_funds, withdraw_funds
+
+ENDPOINTS = [
+    "/api/v1/balance/",
+    "/api/v1/transactions/",
+    "/api/v1/deposit-status/",
+    "/api/v1/withdraw-status/",
+    "/api/v1/total-deposit/",
+    "/api/v1/total-withdraw/",
+]
+
+class Command(BaseCommand):
+    help = "Compare requests/sec and latency of the read endpoints under gunicorn (WSGI) and uvicorn (ASGI)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--transactions", type=int, default=40, help="Transactions per user.")
+        parser.add_argument("--workers", type=int, default=2, help="Server worker processes for both modes.")
+        parser.add_argument("--concurrency", type=int, default=64, help="Open client connections.")
+        parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per mode.")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--modes", nargs="+", choices=sorted(SERVERS), default=["wsgi", "asgi"])
+        parser.add_argument("--output", help="Write the results as JSON to this path.")
+
+    def handle(self, *args, **options):
+        report = {"options": {k: options[k] for k in ("users", "transactions", "workers", "concurrency", "duration")}}
+        with benchmark_database() as connection:
+            tokens = self.seed(options["users"], options["transactions"])
+            env = dict(os.environ, DATABASE_URL=database_url(connection), DEBUG="False", PYTHONUNBUFFERED="1")
+            env.pop("ASYNC_READ_VIEWS", None)
+            # The servers share the database file with this process.
+            connection.close()
+
+            for mode in options["modes"]:
+                with run_server(mode, options["port"], options["workers"], env):
+                    report[mode] = asyncio.run(
+                        run_load(options["port"], tokens, options["concurrency"], options["duration"])
+                    )
+
+                row = report[mode]
+                self.stdout.write(
+                    f"{mode}: {row['requests_per_second']:.0f} req/s, errors={row['errors']}, "
+                    f"p50={row['latency'].get('p50_ms')}ms p99={row['latency'].get('p99_ms')}ms"
+                )
+
+        self.stdout.write(self.style.SUCCESS("Done"))
+        if options["output"]:
+            write_report(options["output"], report)
+
+    def seed(self, users, transactions):
+        tokens = []
+        for n in range(users):
+            user = User.objects.create(email=f"bench-async-{n}@example.com", username=f"bench-async-{n}", is_active=True)
+            for _ in range(transactions):
+                deposit_funds(user, 100)
+            withdraw_funds(user, 50)
+            tokens.append(str(RefreshToken.for_user(user).access_token))
+        return tokens
+
+
+async def run_load(port, tokens, concurrency, duration):
+    requests = itertools.cycle(
+        (path, token) for token in tokens for path in ENDPOINTS
+    )
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    async def client():
+        nonlocal errors
+        connection = None
+        while time.monotonic() < deadline:
+            path, token = next(requests)
+            start = time.perf_counter()
+            try:
+                if connection is None:
+                    connection = await asyncio.open_connection("127.0.0.1", port)
+                status, keep_alive, _ = await http_request(*connection, "GET", path, token)
+            except (OSError, asyncio.IncompleteReadError):
+                errors += 1
+                connection = None
+                continue
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors += 1
+            if not keep_alive:
+                connection[1].close()
+                connection = None
+        if connection is not None:
+            connection[1].close()
+
+    started = time.monotonic()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.monotonic() - started
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": len(latencies) / elapsed,
+        "latency": summarize_latencies(latencies),
+    }
@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from apexpay_core.benchmark import Timer, benchmark_database, write_report
+from transactions.models import Transaction, Wallet
+
+
+class Command(BaseCommand):
+    help = "Compare items/second of the batch endpoint against one-request-per-deposit."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--items", type=int, default=2000, help="Deposits submitted per mode.")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--output", help="Write the results as JSON to this path.")
+
+    def handle(self, *args, **options):
+        report = {}
+        with benchmark_database():
+            partner = User.objects.create(email="bench-partner@example.com", username="partner", is_superuser=True)
+            users = [
+                User.objects.create(email=f"bench-{i}@example.com", username=f"bench-{i}")
+                for i in range(options["users"])
+            ]
+
+            report["single"] = self.run_single(users, options["items"])
+            report["batch"] = self.run_batch(partner, users, options["items"], options["batch_size"])
+
+            expected = 2 * options["items"]
+            rows = Transaction.objects.count()
+            total = sum(Wallet.objects.values_list("available_amount", flat=True))
+            report["rows"] = rows
+            report["speedup"] = round(report["batch"]["items_per_second"] / report["single"]["items_per_second"], 2)
+
+        for mode in ("single", "batch"):
+            self.stdout.write(f"{mode}: {report[mode]}")
+        style = self.style.SUCCESS if rows == expected and total == expected else self.style.ERROR
+        self.stdout.write(style(f"rows={rows} total_balance={total} (expected {expected}), speedup x{report['speedup']}"))
+
+        if options["output"]:
+            write_report(options["output"], report)
+
+    def run_single(self, users, count):
+        clients = []
+        for user in users:
+            client = APIClient()
+            client.force_authenticate(user)
+            clients.append(client)
+
+        url = reverse("deposit")
+        with Timer() as timer:
+            for i in range(count):
+                response = clients[i % len(clients)].post(url, {"amount": 1}, format="json", secure=True)
+                assert response.status_code == 201, response.content
+        return {"items": count, "requests": count, "seconds": round(timer.elapsed, 3),
+                "items_per_second": round(count / timer.elapsed, 1)}
+
+    def run_batch(self, partner, users, count, batch_size):
+        client = APIClient()
+        client.force_authenticate(partner)
+        url = reverse("transactions-batch")
+        items = [{"transaction_type": "deposit", "amount": 1, "user": users[i % len(users)].pk} for i in range(count)]
+
+        requests = 0
+        with Timer() as timer:
+            for offset in range(0, count, batch_size):
+                response = client.post(url, {"transactions": items[offset:offset + batch_size]}, format="json", secure=True)
+                assert response.status_code == 200, response.content
+                assert all(row["status"] == "accepted" for row in response.json()["data"])
+                requests += 1
+        return {"items": count, "requests": requests, "seconds": round(timer.elapsed, 3),
+                "items_per_second": round(count / timer.elapsed, 1)}
@@ -0,0 +1,166 @@
+import json
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import User
+from apexpay_core.benchmark import Timer, benchmark_database, summarize_latencies, write_report
+from transactions import partitions
+from transactions.models import Transaction
+from transactions.pagination import TransactionCursorPagination, encode_cursor
+
+PLAIN_TABLE = "Transactions_plain"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare insert and history query latency on the partitioned Transactions table against an "
+        "unpartitioned copy holding the same rows. PostgreSQL only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50_000_000)
+        parser.add_argument("--users", type=int, default=100_000)
+        parser.add_argument("--months", type=int, default=36, help="Months of history the rows are spread over.")
+        parser.add_argument("--batch-size", type=int, default=1_000_000)
+        parser.add_argument("--repeat", type=int, default=300)
+        parser.add_argument("--output", help="Write the results as JSON to this path.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Partitioning is PostgreSQL only; run this against a PostgreSQL DATABASE_URL")
+
+        report = {"options": {k: options[k] for k in ("rows", "users", "months", "repeat")}}
+        with benchmark_database() as db:
+            now = timezone.now()
+            since = now - timedelta(days=31 * options["months"])
+            created = partitions.ensure_partitions(db, 3, now=now, since=since)
+            report["partitions"] = len(partitions.list_partitions(db))
+            self.stdout.write(f"{report['partitions']} monthly partitions ({len(created)} created for the seed)")
+
+            user_ids = self.seed_users(options["users"])
+            with db.cursor() as cursor:
+                cursor.execute(f'CREATE TABLE "{PLAIN_TABLE}" (LIKE "{partitions.TABLE}" INCLUDING ALL)')
+            for table in (partitions.TABLE, PLAIN_TABLE):
+                with Timer() as timer:
+                    self.seed_rows(db, table, user_ids, options["rows"], options["batch_size"], since, now)
+                self.stdout.write(f"Loaded {options['rows']} rows into {table} in {timer.elapsed:.1f}s")
+
+            rng = random.Random(7)
+            samples = [rng.choice(user_ids) for _ in range(options["repeat"])]
+            for label, table, windowed in (("partitioned", partitions.TABLE, True), ("plain", PLAIN_TABLE, False)):
+                report[label] = self.measure(db, table, samples, now, windowed)
+                for name, row in report[label].items():
+                    self.stdout.write(f"{label} {name}: {row}")
+
+        self.stdout.write(self.style.SUCCESS("Done"))
+        if options["output"]:
+            write_report(options["output"], report)
+
+    def seed_users(self, count):
+        users = User.objects.bulk_create(
+            (User(email=f"bench-partition-{n}@example.com", username=f"bench-partition-{n}") for n in range(count)),
+            batch_size=5000,
+        )
+        return [user.pk for user in users]
+
+    def seed_rows(self, db, table, user_ids, rows, batch_size, since, now):
+        # The users were bulk-created in one go, so their ids are contiguous.
+        # Generated server-side: at tens of millions of rows a round trip per
+        # batch of ORM objects would dominate the run.
+        with db.cursor() as cursor:
+            for start in range(0, rows, batch_size):
+                cursor.execute(
+                    f'INSERT INTO "{table}" (user_id, transaction_type, amount, currency, status, date_created) '
+                    "SELECT %s + (g %% %s), CASE WHEN g %% 3 = 0 THEN 'withdraw' ELSE 'deposit' END, "
+                    "1 + (g %% 10000), 'NGN', 'processed', %s + (%s - %s) * random() "
+                    "FROM generate_series(%s, %s) AS g",
+                    [min(user_ids), len(user_ids), since, now, since, start, min(start + batch_size, rows) - 1],
+                )
+            cursor.execute(f'VACUUM ANALYZE "{table}"')
+
+    def measure(self, db, table, samples, now, windowed):
+        """
+        GetTransactions' page queries, built by the paginator and pointed at
+        ``table``. Without ``windowed`` each page is the single unbounded
+        query the app ran before partitioning.
+        """
+        paginator = TransactionCursorPagination()
+        if not windowed:
+            paginator.history_windows = [None]
+        factory = APIRequestFactory()
+        pages = {
+            "recent_history": ({}, {}),
+            # The page behind a cursor six months back.
+            "history_after_cursor": ({"cursor": encode_cursor(now - timedelta(days=180), 0)}, {}),
+            # ?date_from= / ?date_to= over the last 30 days.
+            "date_bounded": ({}, {"date_created__gte": now - timedelta(days=30), "date_created__lte": now}),
+        }
+
+        results = {}
+        with db.cursor() as cursor:
+            for name, (params, filters) in pages.items():
+                request = Request(factory.get("/", params))
+                latencies = []
+                for n, user_id in enumerate(samples):
+                    queryset = Transaction.objects.filter(user_id=user_id, **filters)
+                    with Timer() as timer:
+                        plans = self.run_page(cursor, paginator, queryset, request, table, explain=n == 0)
+                    if n == 0:
+                        results[name] = plans
+                    else:
+                        latencies.append(timer.elapsed)
+                results[name]["latency"] = summarize_latencies(latencies)
+
+            latencies = []
+            for user_id in samples:
+                with Timer() as timer:
+                    cursor.execute(
+                        f'INSERT INTO "{table}" (user_id, transaction_type, amount, currency, status, date_created) '
+                        "VALUES (%s, 'deposit', 100, 'NGN', 'pending', now()) RETURNING id",
+                        [user_id],
+                    )
+                    cursor.fetchone()
+                latencies.append(timer.elapsed)
+            results["insert"] = {"latency": summarize_latencies(latencies)}
+        return results
+
+    def run_page(self, cursor, paginator, queryset, request, table, explain=False):
+        """``paginator.paginate_queryset`` in raw SQL, optionally EXPLAINing each query."""
+        rows = 0
+        plans = {"queries": 0, "relations_planned": 0, "relations_read": 0}
+        for window in paginator.get_windows(queryset, request):
+            sql, params = window[: paginator.page_size_used + 1 - rows].query.sql_with_params()
+            sql = sql.replace(f'"{partitions.TABLE}"', f'"{table}"')
+            if explain:
+                for key, value in self.partitions_scanned(cursor, sql, params).items():
+                    plans[key] += value
+            cursor.execute(sql, params)
+            rows += len(cursor.fetchall())
+            plans["queries"] += 1
+            if rows > paginator.page_size_used:
+                break
+        return plans
+
+    def partitions_scanned(self, cursor, sql, params):
+        """Relations the plan includes, and those it actually read from."""
+        cursor.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + sql, params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        planned, executed = set(), set()
+        nodes = [plan[0]["Plan"]]
+        while nodes:
+            node = nodes.pop()
+            nodes.extend(node.get("Plans", []))
+            if "Relation Name" in node:
+                planned.add(node["Relation Name"])
+                if node.get("Actual Loops"):
+                    executed.add(node["Relation Name"])
+        return {"relations_planned": len(planned), "relations_read": len(executed)}
@@ -0,0 +1,91 @@
+import os
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from django.utils import timezone
+
+from accounts.models import User
+from apexpay_core.benchmark import Timer, benchmark_database, explicit_timestamps, write_report
+from transactions.models import Transaction, Wallet
+from transactions.reconciliation import HELD_WITHDRAW_STATUSES, reconcile
+
+
+class Command(BaseCommand):
+    help = "Seed consistent wallets, corrupt a few, and time reconcile_wallets at different worker counts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--transactions", type=int, default=1000000)
+        parser.add_argument("--corrupt", type=int, default=25, help="Wallets to knock out of balance.")
+        parser.add_argument("--workers", default=f"1,{os.cpu_count() or 1}", help="Comma-separated worker counts.")
+        parser.add_argument("--chunk-size", type=int, default=100000)
+        parser.add_argument("--batch-size", type=int, default=10000)
+        parser.add_argument("--output", help="Write the results as JSON to this path.")
+
+    def handle(self, *args, **options):
+        report = {"transactions": options["transactions"], "users": options["users"], "runs": []}
+
+        with benchmark_database():
+            with Timer() as seeding:
+                corrupted = self.seed(options)
+            report["seed_seconds"] = round(seeding.elapsed, 1)
+            self.stdout.write(f"Seeded in {seeding.elapsed:.1f}s")
+
+            for workers in sorted({int(w) for w in options["workers"].split(",")}):
+                with Timer() as timer:
+                    discrepancies, stats = reconcile(workers * 4, workers, options["chunk_size"])
+                found = set(discrepancies["user_id"])
+                run = {
+                    "workers": workers,
+                    "seconds": round(timer.elapsed, 2),
+                    "rows_per_second": round(sum(s["transactions"] for s in stats) / timer.elapsed),
+                    "discrepancies": len(discrepancies),
+                    "all_corruptions_found": found == corrupted,
+                }
+                report["runs"].append(run)
+                style = self.style.SUCCESS if run["all_corruptions_found"] else self.style.ERROR
+                self.stdout.write(style(str(run)))
+
+        if options["output"]:
+            write_report(options["output"], report)
+
+    def seed(self, options):
+        rng = random.Random(14)
+        User.objects.bulk_create(
+            (User(email=f"recon-{i}@example.com", username=f"recon-{i}") for i in range(options["users"])),
+            batch_size=options["batch_size"],
+        )
+        user_ids = list(User.objects.values_list("pk", flat=True))
+        balances = dict.fromkeys(user_ids, 0)
+
+        origin = timezone.now() - timedelta(days=365)
+        statuses = ["processed"] * 8 + ["pending", "processing"]
+        batch = []
+        with explicit_timestamps(Transaction):
+            for i in range(options["transactions"]):
+                user_id = user_ids[i % len(user_ids)]
+                transaction_type = rng.choice(["deposit", "deposit", "withdraw"])
+                amount = rng.randint(1, 10000)
+                tx_status = rng.choice(statuses)
+                if transaction_type == "deposit" and tx_status == "processed":
+                    balances[user_id] += amount
+                elif transaction_type == "withdraw" and tx_status in HELD_WITHDRAW_STATUSES:
+                    balances[user_id] -= amount
+                batch.append(Transaction(
+                    user_id=user_id, transaction_type=transaction_type, amount=amount,
+                    status=tx_status, date_created=origin + timedelta(seconds=i),
+                ))
+                if len(batch) >= options["batch_size"]:
+                    Transaction.objects.bulk_create(batch)
+                    batch = []
+            Transaction.objects.bulk_create(batch)
+
+        Wallet.objects.bulk_create(
+            (Wallet(user_id=user_id, available_amount=balance) for user_id, balance in balances.items()),
+            batch_size=options["batch_size"],
+        )
+        corrupted = set(rng.sample(user_ids, options["corrupt"]))
+        Wallet.objects.filter(user_id__in=corrupted).update(available_amount=F("available_amount") + 1)
+        return corrupted
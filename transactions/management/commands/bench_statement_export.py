@@ -0,0 +1,77 @@
+import random
+import tracemalloc
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from apexpay_core.benchmark import Timer, benchmark_database, explicit_timestamps, write_report
+from transactions.exports import EXPORT_FORMATS
+from transactions.models import Transaction
+
+
+class Command(BaseCommand):
+    help = "Measure peak Python memory and time of streaming statement exports as the history grows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", default="10000,100000", help="Comma-separated history sizes.")
+        parser.add_argument("--formats", default=",".join(EXPORT_FORMATS))
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--output", help="Write the results as JSON to this path.")
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options["rows"].split(","))
+        formats = [name.strip() for name in options["formats"].split(",")]
+        report = {"runs": []}
+
+        with benchmark_database():
+            user = User.objects.create(email="bench-statement@example.com", username="bench-statement")
+            client = APIClient()
+            client.force_authenticate(user)
+            url = reverse("transactions-statement")
+
+            seeded = 0
+            for size in sizes:
+                self.seed(user, seeded, size, options["batch_size"])
+                seeded = size
+                for export_format in formats:
+                    tracemalloc.start()
+                    with Timer() as timer:
+                        response = client.get(url, {"export_format": export_format}, secure=True)
+                        assert response.status_code == 200, response
+                        size_bytes = sum(len(chunk) for chunk in response.streaming_content)
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+
+                    run = {
+                        "rows": size,
+                        "format": export_format,
+                        "seconds": round(timer.elapsed, 3),
+                        "rows_per_second": round(size / timer.elapsed, 1),
+                        "bytes": size_bytes,
+                        "peak_memory_kib": round(peak / 1024, 1),
+                    }
+                    report["runs"].append(run)
+                    self.stdout.write(str(run))
+
+        if options["output"]:
+            write_report(options["output"], report)
+
+    def seed(self, user, start, stop, batch_size):
+        rng = random.Random(start)
+        origin = timezone.now() - timedelta(days=365)
+        with explicit_timestamps(Transaction):
+            for offset in range(start, stop, batch_size):
+                Transaction.objects.bulk_create(
+                    Transaction(
+                        user=user,
+                        transaction_type=rng.choice(["deposit", "withdraw"]),
+                        amount=rng.randint(1, 10000),
+                        status="processed",
+                        date_created=origin + timedelta(seconds=i),
+                    )
+                    for i in range(offset, min(offset + batch_size, stop))
+                )
@@ -0,0 +1,92 @@
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from apexpay_core.benchmark import Timer, benchmark_database, explicit_timestamps, summarize_latencies, write_report
+from transactions.models import Transaction
+from transactions.pagination import encode_cursor
+
+
+class Command(BaseCommand):
+    help = "Compare GetTransactions page latency at page 1 and at a deep page."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pages", type=int, default=10000, help="Depth of the deep page.")
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--output", help="Write the results as JSON to this path.")
+
+    def handle(self, *args, **options):
+        page_size = options["page_size"]
+        total = page_size * options["pages"]
+
+        with benchmark_database():
+            user = User.objects.create(email="bench-pages@example.com", username="bench-pages")
+            self.seed(user, total, options["batch_size"])
+
+            client = APIClient()
+            client.force_authenticate(user)
+            url = reverse("transactions")
+
+            ordered = Transaction.objects.filter(user=user).order_by("-date_created", "-id")
+            deep = ordered.values_list("date_created", "pk")[total - page_size - 1]
+            cursors = {
+                "page_1": None,
+                f"page_{options['pages']}": encode_cursor(*deep),
+            }
+
+            report = {"rows": total, "page_size": page_size}
+            for label, cursor in cursors.items():
+                params = {"page_size": page_size}
+                if cursor:
+                    params["cursor"] = cursor
+                for filters in ({}, {"transaction_type": "deposit", "status": "processed"}):
+                    name = label + ("_filtered" if filters else "")
+                    report[name] = self.measure(client, url, dict(params, **filters), options["repeat"])
+                    self.stdout.write(f"{name}: {report[name]}")
+
+            # What the same deep page costs with OFFSET, for comparison.
+            latencies = []
+            for _ in range(options["repeat"]):
+                with Timer() as timer:
+                    list(ordered[total - page_size:total])
+                latencies.append(timer.elapsed)
+            report["offset_deep_page_orm_only"] = summarize_latencies(latencies)
+            self.stdout.write(f"offset_deep_page_orm_only: {report['offset_deep_page_orm_only']}")
+
+        if options["output"]:
+            write_report(options["output"], report)
+
+    def seed(self, user, total, batch_size):
+        rng = random.Random(42)
+        start = timezone.now() - timedelta(days=365 * 3)
+        step = timedelta(days=365 * 3) / max(total, 1)
+        statuses = ["processed"] * 8 + ["pending", "processing"]
+
+        with explicit_timestamps(Transaction):
+            for offset in range(0, total, batch_size):
+                Transaction.objects.bulk_create(
+                    Transaction(
+                        user=user,
+                        transaction_type=rng.choice(["deposit", "withdraw"]),
+                        amount=rng.randint(1, 10000),
+                        status=rng.choice(statuses),
+                        date_created=start + step * i,
+                    )
+                    for i in range(offset, min(offset + batch_size, total))
+                )
+
+    def measure(self, client, url, params, repeat):
+        latencies = []
+        for _ in range(repeat):
+            with Timer() as timer:
+                response = client.get(url, params, secure=True)
+            assert response.status_code == 200, response.content
+            latencies.append(timer.elapsed)
+        return summarize_latencies(latencies)
@@ -0,0 +1,117 @@
+import random
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from accounts.models import User
+from apexpay_core.benchmark import Timer, benchmark_database, write_report
+from transactions.models import Transaction, Wallet
+from transactions.services import InsufficientFunds, PendingTransaction, deposit_funds, withdraw_funds
+
+
+def legacy_deposit(user, amount):
+    # The read-modify-write the views used before the balance service.
+    wallet = Wallet.objects.get(user=user)
+    wallet.available_amount += amount
+    wallet.save()
+    Transaction.objects.create(user=user, transaction_type="deposit", amount=amount, status="processed")
+
+
+def legacy_withdraw(user, amount):
+    wallet = Wallet.objects.get(user=user)
+    if wallet.available_amount < amount:
+        raise InsufficientFunds("Insufficient funds")
+    wallet.available_amount -= amount
+    wallet.save()
+    Transaction.objects.create(user=user, transaction_type="withdraw", amount=amount)
+
+
+class Command(BaseCommand):
+    help = "Hammer a single wallet from many threads and check that no balance update is lost."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--operations", type=int, default=200, help="Operations per thread.")
+        parser.add_argument("--amount", type=int, default=1)
+        parser.add_argument("--initial-balance", type=int, default=1000)
+        parser.add_argument("--legacy", action="store_true", help="Also run the old read-modify-write path for comparison.")
+        parser.add_argument("--output", help="Write the results as JSON to this path.")
+
+    def handle(self, *args, **options):
+        modes = [("atomic", deposit_funds, withdraw_funds)]
+        if options["legacy"]:
+            modes.append(("legacy", legacy_deposit, legacy_withdraw))
+
+        report = {}
+        with benchmark_database():
+            for name, deposit, withdraw in modes:
+                report[name] = self.run_mode(name, deposit, withdraw, options)
+
+        if options["output"]:
+            write_report(options["output"], report)
+
+    def run_mode(self, name, deposit, withdraw, options):
+        user = User.objects.create(email=f"bench-{name}@example.com", username=f"bench-{name}")
+        Wallet.objects.create(user=user, available_amount=options["initial_balance"])
+        amount = options["amount"]
+
+        lock = threading.Lock()
+        counts = {"deposit": 0, "withdraw": 0, "insufficient": 0, "pending": 0, "errors": 0}
+
+        def worker(seed):
+            rng = random.Random(seed)
+            local = {"deposit": 0, "withdraw": 0, "insufficient": 0, "pending": 0, "errors": 0}
+            try:
+                for _ in range(options["operations"]):
+                    try:
+                        if rng.random() < 0.5:
+                            deposit(user, amount)
+                            local["deposit"] += 1
+                        else:
+                            withdraw(user, amount)
+                            local["withdraw"] += 1
+                    except InsufficientFunds:
+                        local["insufficient"] += 1
+                    except PendingTransaction:
+                        # Withdrawals stay pending until settled, so most
+                        # are rejected (and rolled back) by the pending check.
+                        local["pending"] += 1
+                    except Exception:
+                        local["errors"] += 1
+            finally:
+                connection.close()
+            with lock:
+                for key, value in local.items():
+                    counts[key] += value
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(options["threads"])]
+        with Timer() as timer:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        expected = options["initial_balance"] + (counts["deposit"] - counts["withdraw"]) * amount
+        actual = Wallet.objects.get(user=user).available_amount
+        rows = Transaction.objects.filter(user=user).count()
+        committed = counts["deposit"] + counts["withdraw"]
+
+        result = dict(
+            counts,
+            threads=options["threads"],
+            seconds=round(timer.elapsed, 3),
+            ops_per_second=round(committed / timer.elapsed, 1) if timer.elapsed else 0,
+            expected_balance=expected,
+            actual_balance=actual,
+            balance_drift=actual - expected,
+            transaction_rows=rows,
+        )
+
+        style = self.style.SUCCESS if actual == expected and rows == committed else self.style.ERROR
+        self.stdout.write(style(
+            f"[{name}] {committed} ops in {result['seconds']}s ({result['ops_per_second']} ops/s), "
+            f"balance expected={expected} actual={actual}, rows={rows}, "
+            f"insufficient={counts['insufficient']}, pending={counts['pending']}, errors={counts['errors']}"
+        ))
+        return result
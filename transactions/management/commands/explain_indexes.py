@@ -0,0 +1,241 @@
+import io
+import random
+import re
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from accounts.revocation import revocation_filter
+from accounts.services import claim_outbox, queue_email
+from apexpay_core.benchmark import benchmark_database, explicit_timestamps, write_report
+from ledger.services import balance_as_of
+from transactions.models import Transaction, Wallet
+from transactions.pagination import encode_cursor
+from transactions.services import claim_pending, release_claimed, settle_claimed
+
+APP_LABELS = ["accounts", "transactions", "ledger", "kyc"]
+
+PLAN_INDEX_PATTERNS = {
+    "sqlite": re.compile(r"USING (?:COVERING )?INDEX (\S+)"),
+    "postgresql": re.compile(r"(?:Index(?: Only)? Scan(?: Backward)? using|Bitmap Index Scan on) (\S+)"),
+    "mysql": re.compile(r"\bkey=(\S+)"),
+}
+WRITE_TABLE = re.compile(r'^\s*(INSERT INTO|UPDATE|DELETE FROM)\s+[`"]?(\w+)[`"]?', re.IGNORECASE)
+SET_COLUMNS = re.compile(r'[`"]?(\w+)[`"]?\s*=', re.IGNORECASE)
+
+
+class Command(BaseCommand):
+    help = (
+        "Record the queries each endpoint issues against a synthetic dataset, EXPLAIN them and "
+        "report which indexes are used, unused or rewritten by writes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--transactions", type=int, default=200, help="Transactions per user.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--show-plans", action="store_true", help="Print every statement with its plan.")
+        parser.add_argument("--output", help="Write the results as JSON to this path.")
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            users = self.seed(options["users"], options["transactions"], options["batch_size"])
+            statements = self.record(users)
+            plans = [self.explain(scenario, sql) for scenario, sql in statements]
+            indexes = self.inventory()
+            report = self.analyse(indexes, plans)
+
+        if options["show_plans"]:
+            for plan in plans:
+                self.stdout.write(f"[{plan['scenario']}] {plan['sql']}")
+                for line in plan["plan"]:
+                    self.stdout.write(f"    {line}")
+
+        for row in report["indexes"]:
+            style = self.style.WARNING if {"UNUSED", "WRITE-AMPLIFYING"} & set(row["flags"]) else self.style.SUCCESS
+            self.stdout.write(style(
+                f"{row['table']:22} {row['name']:48} {','.join(row['columns']):42} "
+                f"used_by={len(row['used_by']):2} inserts={row['inserts']:3} updates={row['updates']:3} "
+                f"{' '.join(row['flags'])}"
+            ))
+
+        if options["output"]:
+            write_report(options["output"], {"statements": plans, **report})
+
+    def seed(self, user_count, per_user, batch_size):
+        rng = random.Random(7)
+        users = User.objects.bulk_create(
+            User(email=f"explain-{i}@example.com", username=f"explain-{i}", is_active=True)
+            for i in range(user_count)
+        )
+        users = list(User.objects.order_by("pk"))
+        Wallet.objects.bulk_create(Wallet(user=user, available_amount=1_000_000) for user in users)
+
+        start = timezone.now() - timedelta(days=365)
+        rows = (
+            Transaction(
+                user=users[i % user_count],
+                transaction_type=rng.choice(["deposit", "withdraw"]),
+                amount=rng.randint(1, 10000),
+                status=rng.choice(["processed"] * 18 + ["pending", "processing"]),
+                date_created=start + timedelta(seconds=i),
+            )
+            for i in range(user_count * per_user)
+        )
+        with explicit_timestamps(Transaction):
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    Transaction.objects.bulk_create(batch)
+                    batch = []
+            Transaction.objects.bulk_create(batch)
+
+        # The probe users start with settled histories so writes go through.
+        Transaction.objects.filter(user__in=users[:2]).update(status="processed")
+        call_command("rebuild_transaction_summaries", stdout=io.StringIO())
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        return users
+
+    def record(self, users):
+        reader, writer = users[0], users[1]
+        client = APIClient()
+        client.force_authenticate(reader)
+        second_page = encode_cursor(
+            *Transaction.objects.filter(user=reader).order_by("-date_created", "-id").values_list("date_created", "pk")[19]
+        )
+
+        reads = [
+            ("balance", "acc-balance", {}),
+            ("transactions", "transactions", {}),
+            ("transactions?cursor", "transactions", {"cursor": second_page}),
+            ("transactions?type", "transactions", {"transaction_type": "deposit"}),
+            ("transactions?status", "transactions", {"status": "pending"}),
+            ("transactions?type&status", "transactions", {"transaction_type": "withdraw", "status": "processed"}),
+            ("transactions?date", "transactions", {"date_from": (timezone.now() - timedelta(days=30)).isoformat()}),
+            ("deposit-status", "deposit-status", {}),
+            ("withdraw-status?history", "withdraw-status", {"history": "true"}),
+            ("total-deposit", "total-deposit", {}),
+            ("total-withdraw", "total-withdraw", {}),
+        ]
+        statements = []
+        for scenario, name, params in reads:
+            statements += self.capture(scenario, lambda: client.get(reverse(name), params, secure=True))
+
+        client.force_authenticate(writer)
+        statements += self.capture(
+            "deposit", lambda: client.post(reverse("deposit"), {"amount": 10}, format="json", secure=True)
+        )
+        statements += self.capture(
+            "withdraw", lambda: client.post(reverse("withdraw"), {"transaction_type": "withdraw", "amount": 5}, format="json", secure=True)
+        )
+        batch = {"transactions": [{"transaction_type": "deposit", "amount": 1}] * 3}
+        statements += self.capture(
+            "batch", lambda: client.post(reverse("transactions-batch"), batch, format="json", secure=True)
+        )
+
+        def settle():
+            ids = claim_pending("explain", 100)
+            settle_claimed(ids[:50])
+            release_claimed(ids=ids[50:], worker_id="explain")
+            release_claimed(older_than=timezone.now() - timedelta(minutes=5))
+
+        statements += self.capture("process_transactions", settle)
+        wallet = Wallet.objects.get(user=writer)
+        statements += self.capture("balance_as_of", lambda: balance_as_of(wallet, timezone.now()))
+
+        queue_email("Explain", "Body", [writer.email])
+        statements += self.capture("send_queued_emails", lambda: claim_outbox(100))
+        revocation_filter.refresh(force=True)
+        statements += self.capture("revocation_refresh", revocation_filter._load_new)
+        return statements
+
+    def capture(self, scenario, call):
+        with CaptureQueriesContext(connection) as queries:
+            response = call()
+        status_code = getattr(response, "status_code", 200)
+        if status_code >= 400:
+            raise AssertionError(f"{scenario} returned {status_code}: {response.content}")
+        return [
+            (scenario, query["sql"]) for query in queries
+            if not re.match(r"\s*(SAVEPOINT|RELEASE|ROLLBACK|BEGIN|COMMIT)\b", query["sql"], re.IGNORECASE)
+        ]
+
+    def explain(self, scenario, sql):
+        plan = []
+        if re.match(r"\s*(SELECT|UPDATE|DELETE)\b", sql, re.IGNORECASE):
+            prefix = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute(prefix + sql)
+                    plan = [" ".join(str(col) for col in row) for row in cursor.fetchall()]
+                transaction.set_rollback(True)
+
+        pattern = PLAN_INDEX_PATTERNS.get(connection.vendor)
+        used = sorted({name.strip('"`') for line in plan for name in pattern.findall(line)}) if pattern else []
+        return {"scenario": scenario, "sql": sql, "plan": plan, "indexes": used}
+
+    def inventory(self):
+        indexes = []
+        with connection.cursor() as cursor:
+            for app_label in APP_LABELS:
+                for model in apps.get_app_config(app_label).get_models():
+                    table = model._meta.db_table
+                    partial = {index.name for index in model._meta.indexes if index.condition is not None}
+                    for name, info in connection.introspection.get_constraints(cursor, table).items():
+                        if info["primary_key"] or not info["index"] and not info["unique"]:
+                            continue
+                        if info["unique"] and not info["index"] and connection.vendor != "sqlite":
+                            continue
+                        indexes.append({
+                            "table": table,
+                            "name": name,
+                            "columns": info["columns"],
+                            "unique": bool(info["unique"]),
+                            "partial": name in partial,
+                        })
+        return indexes
+
+    def analyse(self, indexes, plans):
+        writes = []
+        for plan in plans:
+            match = WRITE_TABLE.match(plan["sql"])
+            if not match:
+                continue
+            kind, table = match.group(1).upper(), match.group(2)
+            columns = set()
+            if kind == "UPDATE":
+                set_clause = re.split(r"\bWHERE\b", re.split(r"\bSET\b", plan["sql"], 1)[-1], 1)[0]
+                columns = set(SET_COLUMNS.findall(set_clause))
+            writes.append((kind, table, columns, plan["scenario"]))
+
+        rows = []
+        for index in indexes:
+            used_by = sorted({plan["scenario"] for plan in plans if index["name"] in plan["indexes"]})
+            inserts = sum(1 for kind, table, _, _ in writes if kind == "INSERT INTO" and table == index["table"])
+            updates = sum(
+                1 for kind, table, columns, _ in writes
+                if kind == "UPDATE" and table == index["table"] and columns & set(index["columns"])
+            )
+            flags = []
+            if not used_by:
+                flags.append("unique-only" if index["unique"] else "UNUSED")
+            if index["partial"]:
+                # Rows are meant to enter and leave partial (queue) indexes.
+                flags.append("partial")
+            elif updates:
+                # Every matching UPDATE has to move the row inside this index.
+                flags.append("WRITE-AMPLIFYING")
+            rows.append(dict(index, used_by=used_by, inserts=inserts, updates=updates, flags=flags))
+
+        rows.sort(key=lambda row: (row["table"], row["name"]))
+        return {"vendor": connection.vendor, "indexes": rows}
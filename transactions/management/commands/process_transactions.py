@@ -0,0 +1,112 @@
+import multiprocessing
+import os
+import socket
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from transactions.services import claim_pending, release_claimed, settle_claimed
+
+
+def run_worker(index, options, stdout, results=None):
+    connections.close_all()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    stats = {"worker": index, "rows": 0, "batches": 0, "lag_total": 0.0, "lag_max": 0.0, "seconds": 0.0}
+    started = time.perf_counter()
+
+    try:
+        while True:
+            if options["max_batches"] and stats["batches"] >= options["max_batches"]:
+                break
+
+            ids = claim_pending(worker_id, options["batch_size"])
+            if not ids:
+                if options["once"]:
+                    break
+                time.sleep(options["sleep"])
+                continue
+
+            batch_started = time.perf_counter()
+            try:
+                settled = settle_claimed(ids)
+            except Exception:
+                release_claimed(ids=ids, worker_id=worker_id)
+                raise
+            elapsed = time.perf_counter() - batch_started
+
+            now = timezone.now()
+            lags = [(now - date_created).total_seconds() for date_created, _ in settled]
+            stats["rows"] += len(settled)
+            stats["batches"] += 1
+            stats["lag_total"] += sum(lags)
+            stats["lag_max"] = max([stats["lag_max"]] + lags)
+
+            if options["verbosity"] >= 2 or not options["once"]:
+                stdout.write(
+                    f"[worker {index}] settled {len(settled)} in {elapsed:.3f}s "
+                    f"({len(settled) / elapsed if elapsed else 0:.0f} rows/s), "
+                    f"lag avg {sum(lags) / len(lags) if lags else 0:.1f}s max {max(lags) if lags else 0:.1f}s"
+                )
+                # Forked workers share the parent's stream; don't sit in a buffer.
+                stdout.flush()
+    finally:
+        stats["seconds"] = time.perf_counter() - started
+        connections.close_all()
+        if results is not None:
+            results.put(stats)
+
+    return stats
+
+
+class Command(BaseCommand):
+    help = "Settle pending transactions (pending -> processing -> processed) with one or more workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=1, help="Number of worker processes.")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--once", action="store_true", help="Drain the queue and exit instead of polling.")
+        parser.add_argument("--sleep", type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument("--max-batches", type=int, default=0, help="Stop each worker after N batches (0 = no limit).")
+        parser.add_argument(
+            "--reclaim-after", type=int, default=300,
+            help="Return rows stuck in 'processing' for longer than this many seconds to the queue.",
+        )
+
+    def handle(self, *args, **options):
+        if options["reclaim_after"]:
+            released = release_claimed(older_than=timezone.now() - timedelta(seconds=options["reclaim_after"]))
+            if released:
+                self.stdout.write(self.style.WARNING(f"Released {released} stale claims"))
+
+        started = time.perf_counter()
+        if options["workers"] <= 1:
+            stats = [run_worker(0, options, self.stdout)]
+        else:
+            # Forked workers inherit the parent's settings (including a
+            # benchmark database); every process opens its own connection.
+            connections.close_all()
+            context = multiprocessing.get_context("fork")
+            results = context.Queue()
+            processes = [
+                context.Process(target=run_worker, args=(index, options, self.stdout, results))
+                for index in range(options["workers"])
+            ]
+            for process in processes:
+                process.start()
+            stats = [results.get() for _ in processes]
+            for process in processes:
+                process.join()
+
+        elapsed = time.perf_counter() - started
+        rows = sum(s["rows"] for s in stats)
+        lag_avg = sum(s["lag_total"] for s in stats) / rows if rows else 0.0
+        lag_max = max((s["lag_max"] for s in stats), default=0.0)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Settled {rows} transactions with {len(stats)} worker(s) in {elapsed:.2f}s "
+            f"({rows / elapsed if elapsed else 0:.0f} rows/s); lag avg {lag_avg:.1f}s, max {lag_max:.1f}s"
+        ))
@@ -0,0 +1,76 @@
+import itertools
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+
+from transactions import archive
+from transactions.models import Transaction, TransactionSummary, Wallet
+from transactions.services import SUMMARY_FIELDS
+
+
+class Command(BaseCommand):
+    help = "Recompute every wallet's TransactionSummary from the Transaction table and the archive."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Wallets per batch.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        wallets = Wallet.objects.order_by("user_id", "currency").values_list("pk", "user_id", "currency")
+        rebuilt = 0
+        last = None
+
+        while True:
+            page = wallets
+            if last is not None:
+                page = wallets.filter(Q(user_id__gt=last[1]) | Q(user_id=last[1], currency__gt=last[2]))
+            batch = list(page[:batch_size])
+            if not batch:
+                break
+            last = batch[-1]
+            rebuilt += self.rebuild(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} summaries"))
+
+    def rebuild(self, batch):
+        summaries = {
+            (user_id, currency): TransactionSummary(wallet_id=wallet_id) for wallet_id, user_id, currency in batch
+        }
+        totals = (
+            Transaction.objects.filter(
+                status="processed",
+                user_id__gte=batch[0][1],
+                user_id__lte=batch[-1][1],
+            )
+            .values_list("user_id", "currency", "transaction_type")
+            .annotate(total=Sum("amount"), count=Count("id"), last=Max("date_created"))
+            .order_by()
+        )
+        # Archived transactions are all processed ones.
+        archived = archive.totals(batch[0][1], batch[-1][1] + 1)
+
+        for user_id, currency, transaction_type, total, count, last in itertools.chain(totals, archived):
+            summary = summaries.get((user_id, currency))
+            if summary is None or transaction_type not in SUMMARY_FIELDS:
+                continue
+            total_field, count_field = SUMMARY_FIELDS[transaction_type]
+            setattr(summary, total_field, getattr(summary, total_field) + total)
+            setattr(summary, count_field, getattr(summary, count_field) + count)
+            if summary.last_activity is None or last > summary.last_activity:
+                summary.last_activity = last
+            activity_field = f"last_{transaction_type}_activity"
+            if getattr(summary, activity_field) is None or last > getattr(summary, activity_field):
+                setattr(summary, activity_field, last)
+
+        with transaction.atomic():
+            TransactionSummary.objects.bulk_create(
+                summaries.values(),
+                update_conflicts=True,
+                unique_fields=["wallet"],
+                update_fields=[
+                    "total_deposited", "total_withdrawn", "deposit_count", "withdraw_count",
+                    "last_activity", "last_deposit_activity", "last_withdraw_activity",
+                ],
+            )
+        return len(summaries)
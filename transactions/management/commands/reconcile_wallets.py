@@ -0,0 +1,39 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from transactions.reconciliation import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Check every wallet balance against its transactions (processed deposits minus withdrawals "
+        "that have been debited) and write a discrepancy report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes.")
+        parser.add_argument("--shards", type=int, default=0, help="User-id ranges to split into (default: 4 per worker).")
+        parser.add_argument("--chunk-size", type=int, default=100000, help="Transactions fetched and aggregated at a time.")
+        parser.add_argument("--report", help="CSV path for the discrepancy report (default: reconciliation-<timestamp>.csv).")
+
+    def handle(self, *args, **options):
+        shards = options["shards"] or options["workers"] * 4
+        path = options["report"] or "reconciliation-{}.csv".format(timezone.now().strftime("%Y%m%d%H%M%S"))
+
+        started = time.perf_counter()
+        report, stats = reconcile(shards, options["workers"], options["chunk_size"])
+        elapsed = time.perf_counter() - started
+
+        report.to_csv(path, index=False)
+
+        rows = sum(s["transactions"] for s in stats)
+        wallets = sum(s["wallets"] for s in stats)
+        self.stdout.write(
+            f"Reconciled {wallets} wallets against {rows} transactions in {len(stats)} shard(s) "
+            f"with {options['workers']} worker(s) in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:.0f} rows/s)"
+        )
+        style = self.style.ERROR if len(report) else self.style.SUCCESS
+        self.stdout.write(style(f"{len(report)} discrepancies; report written to {path}"))
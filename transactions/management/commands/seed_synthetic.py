@@ -0,0 +1,383 @@
+import csv
+import io
+import multiprocessing
+import os
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from accounts.models import User
+from apexpay_core.benchmark import explicit_timestamps
+from kyc.models import KYC, KYC_CHOICES
+from ledger.models import BalanceSnapshot, LedgerEntry
+from ledger.services import CLEARING_ACCOUNTS, OPPOSITE
+from transactions import partitions
+from transactions.models import Transaction, Wallet
+from transactions.reconciliation import HELD_WITHDRAW_STATUSES
+
+USER_COLUMNS = [
+    "password", "last_login", "is_superuser", "username", "email",
+    "first_name", "last_name", "mobile", "address", "is_staff", "is_active",
+]
+TRANSACTION_COLUMNS = [
+    "user_id", "transaction_type", "amount", "currency", "status",
+    "date_created", "claimed_by", "claimed_at", "date_processed",
+]
+WALLET_COLUMNS = ["user_id", "currency", "available_amount", "ledger_sequence", "date_created", "date_modified"]
+KYC_COLUMNS = ["user_id", "kyc_type", "kyc_number", "kyc_image", "kyc_status", "kyc_date"]
+LEDGER_COLUMNS = [
+    "wallet_id", "transaction_id", "account", "entry_type", "amount", "balance_after", "sequence", "date_created",
+]
+SNAPSHOT_COLUMNS = ["wallet_id", "sequence", "balance", "date_created"]
+
+TYPES = [value for value, _ in Transaction._meta.get_field("transaction_type").choices]
+STATUSES = [value for value, _ in Transaction._meta.get_field("status").choices]
+MAX_AMOUNT = 10_000_000
+
+
+def parse_mix(value, choices):
+    """"deposit=65,withdraw=35" -> (names, probabilities summing to 1)."""
+    weights = {}
+    for entry in value.split(","):
+        name, _, weight = entry.strip().partition("=")
+        if name not in choices:
+            raise CommandError(f"Unknown value {name!r} in {value!r}; expected one of {', '.join(choices)}")
+        try:
+            weights[name] = float(weight)
+        except ValueError:
+            raise CommandError(f"Weight of {name!r} in {value!r} is not a number")
+    total = sum(weights.values())
+    if total <= 0 or any(weight < 0 for weight in weights.values()):
+        raise CommandError(f"Weights in {value!r} must be non-negative and not all zero")
+    return list(weights), [weight / total for weight in weights.values()]
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic users, wallets, KYC records and transactions in bulk for benchmarking: "
+        "heavy-tailed activity per user, configurable type/status mix and date spread. Wallet "
+        "balances match the generated transactions, so reconcile_wallets reports no discrepancies, "
+        "and every balance change gets its ledger entries and snapshots. Uses COPY on PostgreSQL "
+        "and bulk_create elsewhere."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1_000_000)
+        parser.add_argument("--prefix", default="synthetic", help="Usernames and emails start with this.")
+        parser.add_argument("--password", default="synthetic-password", help="Hashed once and shared by every user.")
+        parser.add_argument(
+            "--mean-transactions", type=float, default=20.0, help="Mean transactions per active user.",
+        )
+        parser.add_argument(
+            "--activity-alpha", type=float, default=1.5,
+            help="Pareto shape of transactions per user; closer to 1 gives a heavier tail of very active users.",
+        )
+        parser.add_argument("--max-transactions", type=int, default=100_000, help="Cap on transactions per user.")
+        parser.add_argument("--dormant", type=float, default=0.2, help="Share of users with no transactions.")
+        parser.add_argument("--type-mix", default="deposit=65,withdraw=35")
+        parser.add_argument("--status-mix", default="processed=92,pending=5,processing=3")
+        parser.add_argument("--days", type=int, default=730, help="Transactions spread over this many past days.")
+        parser.add_argument(
+            "--recency", type=float, default=1.5,
+            help="Skew of dates toward now; 1 spreads them evenly over --days.",
+        )
+        parser.add_argument("--amount-median", type=int, default=2000)
+        parser.add_argument("--amount-sigma", type=float, default=1.2, help="Log-normal spread of amounts.")
+        parser.add_argument("--kyc", type=float, default=0.6, help="Share of users with a KYC record.")
+        parser.add_argument("--kyc-verified", type=float, default=0.8, help="Share of KYC records that are verified.")
+        parser.add_argument("--chunk-users", type=int, default=10_000, help="Users generated per task.")
+        parser.add_argument("--batch-size", type=int, default=50_000, help="Rows per COPY or INSERT.")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed; the same seed gives the same data.")
+        parser.add_argument("--skip-summaries", action="store_true", help="Do not rebuild TransactionSummary rows.")
+
+    def handle(self, *args, **options):
+        if options["activity_alpha"] <= 1:
+            raise CommandError("--activity-alpha must be greater than 1 for the mean to exist")
+        if options["mean_transactions"] < 1:
+            raise CommandError("--mean-transactions must be at least 1")
+        for name in ("dormant", "kyc", "kyc_verified"):
+            if not 0 <= options[name] <= 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be between 0 and 1")
+        if User.objects.filter(email__startswith=f"{options['prefix']}-").exists():
+            raise CommandError(f"Users prefixed {options['prefix']!r} already exist; pick another --prefix")
+
+        now = timezone.now()
+        types, type_weights = parse_mix(options["type_mix"], TYPES)
+        statuses, status_weights = parse_mix(options["status_mix"], STATUSES)
+        plan = {
+            key: options[key] for key in (
+                "prefix", "mean_transactions", "activity_alpha", "max_transactions", "dormant", "days",
+                "recency", "amount_median", "amount_sigma", "kyc", "kyc_verified", "batch_size", "seed",
+            )
+        }
+        plan.update(
+            now=now, types=types, type_weights=type_weights, statuses=statuses, status_weights=status_weights,
+            password_hash=make_password(options["password"]),
+        )
+
+        workers = options["workers"]
+        if connection.vendor == "sqlite" and workers > 1:
+            self.stdout.write("SQLite takes one writer at a time; generating in a single process")
+            workers = 1
+
+        if partitions.is_partitioned(connection):
+            created = partitions.ensure_partitions(
+                connection, settings.TRANSACTION_PARTITIONS_AHEAD, now=now, since=now - timedelta(days=options["days"]),
+            )
+            if created:
+                self.stdout.write(f"Created {len(created)} monthly partitions for the date range")
+
+        chunks = [
+            (plan, start, min(start + options["chunk_users"], options["users"]))
+            for start in range(0, options["users"], options["chunk_users"])
+        ]
+        totals = dict.fromkeys(("users", "wallets", "kyc", "transactions", "ledger_entries"), 0)
+        started = time.perf_counter()
+        if workers <= 1:
+            results = map(seed_chunk, chunks)
+        else:
+            # Each forked worker opens its own database connection.
+            connections.close_all()
+            pool = multiprocessing.get_context("fork").Pool(workers)
+            results = pool.imap_unordered(_run_chunk, chunks)
+        try:
+            for done, counts in enumerate(results, 1):
+                for key, value in counts.items():
+                    totals[key] += value
+                self.stdout.write(f"{done}/{len(chunks)} chunks, {totals['transactions']} transactions")
+        finally:
+            if workers > 1:
+                pool.close()
+                pool.join()
+        elapsed = time.perf_counter() - started
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                for model in (User, Wallet, KYC, Transaction, LedgerEntry, BalanceSnapshot):
+                    cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+        if not options["skip_summaries"]:
+            call_command("rebuild_transaction_summaries", stdout=self.stdout)
+
+        rows = sum(totals.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {totals['users']} users, {totals['wallets']} wallets, {totals['kyc']} KYC records, "
+            f"{totals['transactions']} transactions and {totals['ledger_entries']} ledger entries in {elapsed:.1f}s "
+            f"({rows / elapsed if elapsed else 0:.0f} rows/s)"
+        ))
+
+
+def _run_chunk(args):
+    try:
+        return seed_chunk(args)
+    finally:
+        connections.close_all()
+
+
+def seed_chunk(args):
+    """Generate and insert users [start, end) with their wallets, KYC, transactions and ledger."""
+    plan, start, end = args
+    # Seeded per chunk, so the data does not depend on --workers.
+    rng = np.random.default_rng([plan["seed"], start])
+    count = end - start
+    now = plan["now"]
+
+    with transaction.atomic():
+        user_ids = np.asarray(create_users(plan, start, end), dtype=np.int64)
+
+        # Heavy-tailed activity: a Lomax (Pareto II) draw scaled to the
+        # requested mean, so most users transact a little and a few a lot.
+        alpha, mean = plan["activity_alpha"], plan["mean_transactions"]
+        activity = 1 + np.floor(rng.pareto(alpha, count) * (mean - 1) * (alpha - 1)).astype(np.int64)
+        activity = np.minimum(activity, plan["max_transactions"])
+        activity[rng.random(count) < plan["dormant"]] = 0
+        total = int(activity.sum())
+
+        owners = np.repeat(np.arange(count), activity)
+        types = np.asarray(plan["types"])[rng.choice(len(plan["types"]), total, p=plan["type_weights"])]
+        statuses = np.asarray(plan["statuses"])[rng.choice(len(plan["statuses"]), total, p=plan["status_weights"])]
+        amounts = np.clip(
+            np.rint(rng.lognormal(np.log(plan["amount_median"]), plan["amount_sigma"], total)), 1, MAX_AMOUNT,
+        ).astype(np.int64)
+        ages = (plan["days"] * 86_400_000_000 * rng.random(total) ** plan["recency"]).astype(np.int64)
+
+        # Balances follow the reconciliation rule, and the ledger posts each
+        # movement in date order. A user whose balance would dip below zero
+        # on the way gets an opening deposit covering the deepest dip.
+        credited = (types == "deposit") & (statuses == "processed")
+        debited = (types == "withdraw") & np.isin(statuses, HELD_WITHDRAW_STATUSES)
+        deltas = np.where(credited, amounts, 0) - np.where(debited, amounts, 0)
+        order, starts, running = walk(owners, ages, deltas)
+        lowest = np.zeros(count, dtype=np.int64)
+        if len(starts):
+            lowest[owners[order][starts]] = np.minimum.reduceat(running, starts)
+        short = np.flatnonzero(lowest < 0)
+        owners = np.concatenate([owners, short])
+        types = np.concatenate([types, np.full(len(short), "deposit")])
+        statuses = np.concatenate([statuses, np.full(len(short), "processed")])
+        amounts = np.concatenate([amounts, -lowest[short]])
+        ages = np.concatenate([ages, np.full(len(short), plan["days"] * 86_400_000_000)])
+        deltas = np.concatenate([deltas, -lowest[short]])
+
+        # Rows are written per user, oldest first, like the services would
+        # have created them.
+        order, _, running = walk(owners, ages, deltas)
+        owners, types, statuses, amounts, ages, deltas = (
+            values[order] for values in (owners, types, statuses, amounts, ages, deltas)
+        )
+        moves = deltas != 0
+        balances = np.bincount(owners, weights=deltas, minlength=count).astype(np.int64)
+        sequences = np.bincount(owners[moves], minlength=count)
+        # Each movement's position in its wallet's ledger sequence.
+        positions = np.cumsum(moves) - np.repeat(np.cumsum(sequences) - sequences, np.bincount(owners, minlength=count))
+
+        currency = settings.DEFAULT_CURRENCY
+        wallet_ids = np.asarray(insert_rows(
+            Wallet, WALLET_COLUMNS,
+            [
+                (owner, currency, balance, sequence, now, now)
+                for owner, balance, sequence in zip(user_ids.tolist(), balances.tolist(), sequences.tolist())
+            ],
+            plan["batch_size"],
+        ), dtype=np.int64)
+        # Seeded wallets start empty, when the seeded history does.
+        opened = now - timedelta(days=plan["days"])
+        write_rows(
+            BalanceSnapshot, SNAPSHOT_COLUMNS,
+            [(wallet, 0, 0, opened) for wallet in wallet_ids[sequences > 0].tolist()],
+            plan["batch_size"],
+        )
+
+        interval = settings.LEDGER_SNAPSHOT_INTERVAL
+        ledger_entries = 0
+        for offset in range(0, len(owners), plan["batch_size"]):
+            window = slice(offset, offset + plan["batch_size"])
+            rows, moved = [], []
+            for owner, kind, status, amount, age, move, balance, position in zip(
+                user_ids[owners[window]].tolist(), types[window].tolist(), statuses[window].tolist(),
+                amounts[window].tolist(), ages[window].tolist(), moves[window].tolist(),
+                running[window].tolist(), positions[window].tolist(),
+            ):
+                created = now - timedelta(microseconds=age)
+                rows.append((
+                    owner, kind, amount, currency, status, created,
+                    "synthetic" if status == "processing" else None,
+                    created if status == "processing" else None,
+                    created if status == "processed" else None,
+                ))
+                moved.append((kind, amount, balance, position, created) if move else None)
+            transaction_ids = insert_rows(Transaction, TRANSACTION_COLUMNS, rows, plan["batch_size"])
+
+            entries, snapshots = [], []
+            for wallet, transaction_id, movement in zip(
+                wallet_ids[owners[window]].tolist(), transaction_ids, moved,
+            ):
+                if movement is None:
+                    continue
+                kind, amount, balance, position, created = movement
+                entry_type_ = "credit" if kind == "deposit" else "debit"
+                entries.append((wallet, transaction_id, "wallet", entry_type_, amount, balance, position, created))
+                entries.append((
+                    wallet, transaction_id, CLEARING_ACCOUNTS[entry_type_], OPPOSITE[entry_type_], amount,
+                    None, None, created,
+                ))
+                if position % interval == 0:
+                    snapshots.append((wallet, position, balance, created))
+            write_rows(LedgerEntry, LEDGER_COLUMNS, entries, plan["batch_size"])
+            write_rows(BalanceSnapshot, SNAPSHOT_COLUMNS, snapshots, plan["batch_size"])
+            ledger_entries += len(entries)
+
+        kyc_users = np.flatnonzero(rng.random(count) < plan["kyc"])
+        kyc_types = rng.integers(0, len(KYC_CHOICES), len(kyc_users))
+        kyc_numbers = rng.integers(10**10, 10**11, len(kyc_users))
+        verified = rng.random(len(kyc_users)) < plan["kyc_verified"]
+        write_rows(
+            KYC, KYC_COLUMNS,
+            [
+                (user_id, KYC_CHOICES[kind][0], str(number), "", status, now.date())
+                for user_id, kind, number, status in zip(
+                    user_ids[kyc_users].tolist(), kyc_types.tolist(), kyc_numbers.tolist(), verified.tolist(),
+                )
+            ],
+            plan["batch_size"],
+        )
+
+    return {
+        "users": count, "wallets": count, "kyc": len(kyc_users), "transactions": len(owners),
+        "ledger_entries": ledger_entries,
+    }
+
+
+def walk(owners, ages, deltas):
+    """
+    The order that sorts rows per owner, oldest first, where each owner's
+    rows start in it, and the running balance after each row in that order.
+    """
+    order = np.lexsort((-ages, owners))
+    owners, deltas = owners[order], deltas[order]
+    running = np.cumsum(deltas)
+    starts = np.flatnonzero(np.diff(owners, prepend=-1))
+    running -= np.repeat(running[starts] - deltas[starts], np.diff(np.append(starts, len(owners))))
+    return order, starts, running
+
+
+def create_users(plan, start, end):
+    """Insert the chunk's users; returns their ids in order."""
+    prefix = plan["prefix"]
+    rows = [
+        (plan["password_hash"], None, False, f"{prefix}-{n}", f"{prefix}-{n}@example.com",
+         "Synthetic", str(n), None, None, False, True)
+        for n in range(start, end)
+    ]
+    return insert_rows(User, USER_COLUMNS, rows, plan["batch_size"])
+
+
+def insert_rows(model, columns, rows, batch_size):
+    """write_rows for rows whose new ids are needed; returns them in order."""
+    if connection.vendor == "postgresql":
+        # COPY returns nothing, so take the ids from the sequence up front.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+                [connection.ops.quote_name(model._meta.db_table), len(rows)],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        write_rows(model, ["id", *columns], [(pk, *row) for pk, row in zip(ids, rows)], batch_size)
+        return ids
+    with explicit_timestamps(model):
+        created = model.objects.bulk_create((model(**dict(zip(columns, row))) for row in rows), batch_size=batch_size)
+    return [row.pk for row in created]
+
+
+def write_rows(model, columns, rows, batch_size):
+    """COPY ``rows`` into ``model``'s table on PostgreSQL, bulk_create them elsewhere."""
+    if connection.vendor != "postgresql":
+        with explicit_timestamps(model):
+            model.objects.bulk_create((model(**dict(zip(columns, row))) for row in rows), batch_size=batch_size)
+        return
+
+    qn = connection.ops.quote_name
+    sql = (
+        f"COPY {qn(model._meta.db_table)} ({', '.join(qn(model._meta.get_field(c).column) for c in columns)}) "
+        "FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    )
+    for offset in range(0, len(rows), batch_size):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows[offset:offset + batch_size]:
+            writer.writerow("\\N" if value is None else value for value in row)
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, "copy_expert"):
+                raw.copy_expert(sql, buffer)
+            else:
+                with raw.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
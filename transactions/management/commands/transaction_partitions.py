@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+from transactions import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the upcoming monthly partitions of the Transactions table and, with --detach, "
+        "detach the ones older than the retention window once archive_transactions has emptied "
+        "them. PostgreSQL only; elsewhere a no-op."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ahead", type=int, default=settings.TRANSACTION_PARTITIONS_AHEAD,
+            help="Months after the current one to keep partitions ready for.",
+        )
+        parser.add_argument("--detach", action="store_true", help="Detach partitions older than --retain-months.")
+        parser.add_argument(
+            "--retain-months", type=int, default=settings.TRANSACTION_PARTITIONS_RETAIN_MONTHS,
+            help="Whole months before the current one to keep attached.",
+        )
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        if not partitions.is_partitioned(connection):
+            self.stdout.write(f"Transactions is not partitioned on this {connection.vendor} database; nothing to do")
+            return
+
+        created = partitions.ensure_partitions(connection, options["ahead"])
+        for name in created:
+            self.stdout.write(f"Created {name}")
+
+        detached = []
+        if options["detach"]:
+            if options["retain_months"] < 1:
+                raise CommandError("--detach needs --retain-months of at least 1")
+            before = partitions.add_months(partitions.month_start(timezone.now()), -options["retain_months"])
+            try:
+                detached = partitions.detach_partitions(connection, before)
+            except partitions.PartitionError as exc:
+                raise CommandError(str(exc))
+            for name in detached:
+                self.stdout.write(f"Detached {name}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(created)} and detached {len(detached)} partitions"
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallet',
+            name='ledger_sequence',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
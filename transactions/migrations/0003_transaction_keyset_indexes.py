@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0002_wallet_ledger_sequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='Transaction_user_id_a370c4_idx',
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', '-date_created', '-id'], name='Transaction_user_id_b612cd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'transaction_type', '-date_created', '-id'], name='Transaction_user_id_de5010_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'status', '-date_created', '-id'], name='Transaction_user_id_02ab59_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'transaction_type', 'status', '-date_created', '-id'], name='Transaction_user_id_fdb89e_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def build_summaries(apps, schema_editor):
+    Transaction = apps.get_model("transactions", "Transaction")
+    Wallet = apps.get_model("transactions", "Wallet")
+    TransactionSummary = apps.get_model("transactions", "TransactionSummary")
+
+    summaries = {
+        user_id: TransactionSummary(wallet_id=wallet_id)
+        for wallet_id, user_id in Wallet.objects.values_list("pk", "user_id")
+    }
+    totals = (
+        Transaction.objects.filter(status="processed")
+        .values("user_id", "transaction_type")
+        .annotate(total=Sum("amount"), count=Count("id"), last=Max("date_created"))
+    )
+    for row in totals:
+        summary = summaries.get(row["user_id"])
+        if summary is None:
+            continue
+        if row["transaction_type"] == "deposit":
+            summary.total_deposited, summary.deposit_count = row["total"], row["count"]
+        elif row["transaction_type"] == "withdraw":
+            summary.total_withdrawn, summary.withdraw_count = row["total"], row["count"]
+        summary.last_activity = max(filter(None, [summary.last_activity, row["last"]]))
+
+    TransactionSummary.objects.bulk_create(summaries.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0003_transaction_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionSummary',
+            fields=[
+                ('wallet', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='transactions.wallet')),
+                ('total_deposited', models.BigIntegerField(default=0)),
+                ('total_withdrawn', models.BigIntegerField(default=0)),
+                ('deposit_count', models.PositiveIntegerField(default=0)),
+                ('withdraw_count', models.PositiveIntegerField(default=0)),
+                ('last_activity', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Transaction summaries',
+                'db_table': 'TransactionSummaries',
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
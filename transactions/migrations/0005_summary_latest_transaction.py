@@ -0,0 +1,52 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def set_latest_pointers(apps, schema_editor):
+    Transaction = apps.get_model("transactions", "Transaction")
+    TransactionSummary = apps.get_model("transactions", "TransactionSummary")
+
+    for summary in TransactionSummary.objects.select_related("wallet").iterator():
+        for transaction_type in ("deposit", "withdraw"):
+            latest = (
+                Transaction.objects.filter(user_id=summary.wallet.user_id, transaction_type=transaction_type)
+                .order_by("-date_created", "-id")
+                .first()
+            )
+            if latest:
+                setattr(summary, f"last_{transaction_type}", latest)
+                setattr(summary, f"last_{transaction_type}_status", latest.status)
+        summary.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0004_transactionsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transactionsummary',
+            name='last_deposit',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='transactions.transaction'),
+        ),
+        migrations.AddField(
+            model_name='transactionsummary',
+            name='last_deposit_status',
+            field=models.CharField(blank=True, choices=[('pending', 'PENDING'), ('processing', 'PROCESSING'), ('processed', 'PROCESSED')], max_length=225, null=True),
+        ),
+        migrations.AddField(
+            model_name='transactionsummary',
+            name='last_withdraw',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='transactions.transaction'),
+        ),
+        migrations.AddField(
+            model_name='transactionsummary',
+            name='last_withdraw_status',
+            field=models.CharField(blank=True, choices=[('pending', 'PENDING'), ('processing', 'PROCESSING'), ('processed', 'PROCESSED')], max_length=225, null=True),
+        ),
+        migrations.RunPython(set_latest_pointers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def normalize_pending_status(apps, schema_editor):
+    # The old default stored "PENDING", which is not one of the choices and
+    # was never matched by the pending check.
+    Transaction = apps.get_model("transactions", "Transaction")
+    TransactionSummary = apps.get_model("transactions", "TransactionSummary")
+
+    Transaction.objects.filter(status="PENDING").update(status="pending")
+    TransactionSummary.objects.filter(last_deposit_status="PENDING").update(last_deposit_status="pending")
+    TransactionSummary.objects.filter(last_withdraw_status="PENDING").update(last_withdraw_status="pending")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0005_summary_latest_transaction'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='claimed_by',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='date_processed',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='status',
+            field=models.CharField(choices=[('pending', 'PENDING'), ('processing', 'PROCESSING'), ('processed', 'PROCESSED')], default='pending', max_length=225, null=True),
+        ),
+        migrations.RunPython(normalize_pending_status, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['id'], name='transaction_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0006_settlement_worker'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='Transaction_user_id_02ab59_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='Transaction_user_id_fdb89e_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='wallet',
+            name='Wallets_user_id_5a8788_idx',
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='transactionsummary',
+            name='last_deposit',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='transactions.transaction'),
+        ),
+        migrations.AlterField(
+            model_name='transactionsummary',
+            name='last_withdraw',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='transactions.transaction'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('status', 'processing')), fields=['claimed_at'], name='transaction_processing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transactionsummary',
+            index=models.Index(condition=models.Q(('last_deposit_status__in', ['pending', 'processing'])), fields=['last_deposit'], name='summary_open_deposit_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transactionsummary',
+            index=models.Index(condition=models.Q(('last_withdraw_status__in', ['pending', 'processing'])), fields=['last_withdraw'], name='summary_open_withdraw_idx'),
+        ),
+    ]
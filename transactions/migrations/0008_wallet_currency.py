@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0007_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='currency',
+            field=models.CharField(default='NGN', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='wallet',
+            name='currency',
+            field=models.CharField(default='NGN', max_length=3),
+        ),
+    ]
@@ -0,0 +1,77 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def merge_duplicate_wallets(apps, schema_editor):
+    # Concurrent activation and deposit could create several wallets for one
+    # user. Fold each extra wallet into the oldest one before the
+    # (user, currency) constraint goes on: balances and totals are added to
+    # the survivor and the extra is marked merged_into it. Ledger rows are
+    # append-only, so both keep theirs as they are; each gets one closing
+    # snapshot (the extra at zero, the survivor at the merged balance).
+    Wallet = apps.get_model("transactions", "Wallet")
+    TransactionSummary = apps.get_model("transactions", "TransactionSummary")
+    BalanceSnapshot = apps.get_model("ledger", "BalanceSnapshot")
+
+    duplicates = (
+        Wallet.objects.values("user_id", "currency")
+        .annotate(wallets=Count("id"))
+        .filter(wallets__gt=1)
+        .order_by()
+    )
+    for row in duplicates:
+        keeper, *extras = Wallet.objects.filter(user_id=row["user_id"], currency=row["currency"]).order_by("id")
+        summary = TransactionSummary.objects.filter(wallet=keeper).first()
+
+        snapshots = []
+        for extra in extras:
+            keeper.available_amount += extra.available_amount
+            extra.available_amount = 0
+            extra.ledger_sequence += 1
+            extra.merged_into = keeper
+            extra.save(update_fields=["available_amount", "ledger_sequence", "merged_into"])
+            snapshots.append(BalanceSnapshot(wallet=extra, sequence=extra.ledger_sequence, balance=0))
+
+            extra_summary = TransactionSummary.objects.filter(wallet=extra).first()
+            if extra_summary is not None:
+                if summary is None:
+                    summary = TransactionSummary(wallet=keeper)
+                summary.total_deposited += extra_summary.total_deposited
+                summary.total_withdrawn += extra_summary.total_withdrawn
+                summary.deposit_count += extra_summary.deposit_count
+                summary.withdraw_count += extra_summary.withdraw_count
+                if extra_summary.last_activity and (
+                    summary.last_activity is None or extra_summary.last_activity > summary.last_activity
+                ):
+                    summary.last_activity = extra_summary.last_activity
+                for kind in ("deposit", "withdraw"):
+                    pointer = getattr(extra_summary, f"last_{kind}_id")
+                    if pointer and pointer > (getattr(summary, f"last_{kind}_id") or 0):
+                        setattr(summary, f"last_{kind}_id", pointer)
+                        setattr(summary, f"last_{kind}_status", getattr(extra_summary, f"last_{kind}_status"))
+                extra_summary.delete()
+
+        keeper.ledger_sequence += 1
+        keeper.save(update_fields=["available_amount", "ledger_sequence"])
+        if summary is not None:
+            summary.save()
+        snapshots.append(BalanceSnapshot(wallet=keeper, sequence=keeper.ledger_sequence, balance=keeper.available_amount))
+        BalanceSnapshot.objects.bulk_create(snapshots)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0008_wallet_currency'),
+        ('ledger', '0003_drop_wallet_fk_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallet',
+            name='merged_into',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='transactions.wallet'),
+        ),
+        migrations.RunPython(merge_duplicate_wallets, migrations.RunPython.noop),
+    ]
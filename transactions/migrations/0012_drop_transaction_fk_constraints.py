@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-17 08:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0011_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transactionsummary',
+            name='last_deposit',
+            field=models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='transactions.transaction'),
+        ),
+        migrations.AlterField(
+            model_name='transactionsummary',
+            name='last_withdraw',
+            field=models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='transactions.transaction'),
+        ),
+    ]
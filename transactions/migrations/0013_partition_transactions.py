@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.db import migrations
+
+from transactions import partitions
+
+
+def partition_transactions(apps, schema_editor):
+    # Postgres only: elsewhere Transactions stays a plain table.
+    if schema_editor.connection.vendor == "postgresql":
+        partitions.convert_to_partitioned(schema_editor.connection, settings.TRANSACTION_PARTITIONS_AHEAD)
+
+
+def unpartition_transactions(apps, schema_editor):
+    if partitions.is_partitioned(schema_editor.connection):
+        partitions.convert_to_plain(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0012_drop_transaction_fk_constraints'),
+        ('ledger', '0004_drop_transaction_fk_constraints'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_transactions, unpartition_transactions),
+    ]
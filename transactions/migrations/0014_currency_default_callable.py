@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-17 09:42
+
+import transactions.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0013_partition_transactions'),
+    ]
+
+    # Defaults live in Python only, so this changes the migration state and
+    # nothing else (SQLite would otherwise rebuild both tables).
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='transaction',
+                    name='currency',
+                    field=models.CharField(default=transactions.models.default_currency, max_length=3),
+                ),
+                migrations.AlterField(
+                    model_name='wallet',
+                    name='currency',
+                    field=models.CharField(default=transactions.models.default_currency, max_length=3),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-17 10:10
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def set_activity_per_type(apps, schema_editor):
+    # Each type's latest processed transaction still in the hot table; wallets
+    # whose history is all archived fall back to the shared last_activity
+    # (`manage.py rebuild_transaction_summaries` recomputes it exactly).
+    Transaction = apps.get_model("transactions", "Transaction")
+    TransactionSummary = apps.get_model("transactions", "TransactionSummary")
+
+    latest = {
+        (user_id, currency, transaction_type): last
+        for user_id, currency, transaction_type, last in Transaction.objects.filter(status="processed")
+        .values_list("user_id", "currency", "transaction_type")
+        .annotate(last=Max("date_created"))
+        .order_by()
+    }
+    summaries = []
+    for summary in TransactionSummary.objects.select_related("wallet").iterator():
+        for transaction_type in ("deposit", "withdraw"):
+            if getattr(summary, f"{transaction_type}_count"):
+                key = (summary.wallet.user_id, summary.wallet.currency, transaction_type)
+                setattr(summary, f"last_{transaction_type}_activity", latest.get(key, summary.last_activity))
+        summaries.append(summary)
+    TransactionSummary.objects.bulk_update(
+        summaries, ["last_deposit_activity", "last_withdraw_activity"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0014_currency_default_callable'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transactionsummary',
+            name='last_deposit_activity',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transactionsummary',
+            name='last_withdraw_activity',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(set_activity_per_type, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 10:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0015_summary_activity_per_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'status', '-date_created', '-id'], name='Transaction_user_id_02ab59_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'transaction_type', 'status', '-date_created', '-id'], name='Transaction_user_id_fdb89e_idx'),
+        ),
+    ]
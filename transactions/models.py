@@ -1,4 +1,5 @@
 # Django imports
+from django.conf import settings
 from django.db import models
 
 # App imports
@@ -16,14 +17,32 @@ type = [
     ("withdraw", "WITHDRAWAL")
 ]
 
+
+def default_currency():
+    # A callable, so the migration state records the function rather than
+    # whatever DEFAULT_CURRENCY was when makemigrations ran.
+    return settings.DEFAULT_CURRENCY
+
     
-    
+# On PostgreSQL the Transactions table is range-partitioned by month of
+# date_created (migration 0013, `manage.py transaction_partitions`). A
+# partitioned table's unique keys must include the partition key, so its
+# primary key there is (id, date_created) and foreign keys to Transaction
+# are declared with db_constraint=False; Django still enforces on_delete.
+
+
 class Transaction(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Covered by the (user, date_created, id) index below.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     transaction_type = models.CharField(max_length=225, null=True, choices=type)
     amount = models.IntegerField()
-    status = models.CharField(max_length=225, null=True, choices=status, default="PENDING")
+    currency = models.CharField(max_length=3, default=default_currency)
+    status = models.CharField(max_length=225, null=True, choices=status, default="pending")
     date_created = models.DateTimeField(auto_now_add=True)
+    # Set by `manage.py process_transactions` while settling the row.
+    claimed_by = models.CharField(max_length=100, null=True, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    date_processed = models.DateTimeField(null=True, blank=True)
     
     def __str__(self):
         return "User: {} - Transaction Type: {} - Status: {} - Modified at: {}".format(self.user.first_name, self.transaction_type, self.status, self.date_created)
@@ -31,22 +50,121 @@ class Transaction(models.Model):
     class Meta:
         verbose_name_plural = "Transactions"
         db_table = "Transactions"
+        # Keyset pagination walks (date_created, id) newest first, per user
+        # and optionally per type and status: one index per filter
+        # combination. Settlement rewrites the status ones once per row.
+        # On PostgreSQL they are created on the partitioned parent, so every
+        # partition gets them.
         indexes = [
-            models.Index(fields=['user', 'transaction_type', 'status', 'date_created'])
+            models.Index(fields=['user', '-date_created', '-id']),
+            models.Index(fields=['user', 'transaction_type', '-date_created', '-id']),
+            models.Index(fields=['user', 'status', '-date_created', '-id']),
+            models.Index(fields=['user', 'transaction_type', 'status', '-date_created', '-id']),
+            # Work queue for the settlement worker, and stale claims for
+            # release_claimed(older_than=...).
+            models.Index(fields=['id'], condition=models.Q(status='pending'), name='transaction_pending_idx'),
+            models.Index(fields=['claimed_at'], condition=models.Q(status='processing'), name='transaction_processing_idx'),
         ]
     
+class OpenWalletManager(models.Manager):
+    def get_queryset(self):
+        return super().get_queryset().filter(merged_into=None)
+
+
 class Wallet(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Covered by the (user, currency) unique constraint.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    currency = models.CharField(max_length=3, default=default_currency)
     available_amount = models.IntegerField(default=0)
+    ledger_sequence = models.PositiveBigIntegerField(default=0)
     date_created = models.DateTimeField(auto_now_add=True)
     date_modified = models.DateTimeField(auto_now=True)
+    # Set on the duplicate wallets migration 0009 folded into this user's
+    # oldest one. Their ledger history is append-only, so they stay, emptied
+    # and left out of Wallet.objects and of the (user, currency) constraint.
+    merged_into = models.ForeignKey("self", on_delete=models.PROTECT, null=True, blank=True, editable=False, related_name="+", db_index=False)
+
+    objects = OpenWalletManager()
+    all_objects = models.Manager()
     
     def __str__(self):
-        return "Name: {} - Amount: {} - Created at: {} - Modified at: {}".format(self.user.first_name, self.available_amount, self.date_created, self.date_modified)
+        return "Name: {} - Amount: {} {} - Created at: {} - Modified at: {}".format(self.user.first_name, self.available_amount, self.currency, self.date_created, self.date_modified)
 
     class Meta:
         verbose_name_plural = "Wallets"
         db_table = "Wallets"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'currency'], condition=models.Q(merged_into=None), name='wallet_user_currency')
+        ]
+
+class TransactionSummary(models.Model):
+    # Running totals of processed transactions, maintained in the same DB
+    # transaction that processes them. Rebuild with
+    # `manage.py rebuild_transaction_summaries` if they ever drift.
+    wallet = models.OneToOneField(Wallet, on_delete=models.CASCADE, primary_key=True, related_name="summary")
+    total_deposited = models.BigIntegerField(default=0)
+    total_withdrawn = models.BigIntegerField(default=0)
+    deposit_count = models.PositiveIntegerField(default=0)
+    withdraw_count = models.PositiveIntegerField(default=0)
+    last_activity = models.DateTimeField(null=True, blank=True)
+    # When each type's totals last changed; the total endpoints are
+    # validated against their own type only.
+    last_deposit_activity = models.DateTimeField(null=True, blank=True)
+    last_withdraw_activity = models.DateTimeField(null=True, blank=True)
+
+    # Latest transaction of each type and its status, so the pending check
+    # and the status endpoints never scan a user's history.
+    # Only pointers that are still pending/processing are ever looked up by
+    # transaction id, so they get partial indexes instead of full FK ones.
+    # No DB-level constraint: see the partitioning note above Transaction.
+    last_deposit = models.ForeignKey(Transaction, on_delete=models.SET_NULL, null=True, blank=True, related_name="+", db_index=False, db_constraint=False)
+    last_deposit_status = models.CharField(max_length=225, null=True, blank=True, choices=status)
+    last_withdraw = models.ForeignKey(Transaction, on_delete=models.SET_NULL, null=True, blank=True, related_name="+", db_index=False, db_constraint=False)
+    last_withdraw_status = models.CharField(max_length=225, null=True, blank=True, choices=status)
+
+    def __str__(self):
+        return "Wallet: {} - Deposited: {} - Withdrawn: {} - Last activity: {}".format(self.wallet_id, self.total_deposited, self.total_withdrawn, self.last_activity)
+
+    class Meta:
+        verbose_name_plural = "Transaction summaries"
+        db_table = "TransactionSummaries"
         indexes = [
-            models.Index(fields=['user', 'available_amount', 'date_created', 'date_modified'])
-        ]
\ No newline at end of file
+            models.Index(
+                fields=['last_deposit'], name='summary_open_deposit_idx',
+                condition=models.Q(last_deposit_status__in=['pending', 'processing']),
+            ),
+            models.Index(
+                fields=['last_withdraw'], name='summary_open_withdraw_idx',
+                condition=models.Q(last_withdraw_status__in=['pending', 'processing']),
+            ),
+        ]
+
+
+idempotency_status = [
+    ("in_progress", "IN PROGRESS"),
+    ("completed", "COMPLETED"),
+]
+
+
+class IdempotencyKey(models.Model):
+    # First response to each (user, Idempotency-Key) pair, replayed to
+    # retries until expires_at. Purged by `manage.py purge_idempotency_keys`.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=idempotency_status, default="in_progress")
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_claimed = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return "User: {} - Key: {} - Status: {}".format(self.user_id, self.key, self.status)
+
+    class Meta:
+        verbose_name_plural = "Idempotency keys"
+        db_table = "IdempotencyKeys"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key')
+        ]
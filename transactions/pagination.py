@@ -0,0 +1,159 @@
+# Python imports
+import base64
+import binascii
+import heapq
+import itertools
+import json
+from datetime import timedelta
+
+# Django imports
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+# rest_framework imports
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+# App imports
+from transactions import archive, partitions
+from transactions.models import Transaction
+
+# Third party imports
+from asgiref.sync import sync_to_async
+
+
+def encode_cursor(date_created, pk):
+    raw = json.dumps([date_created.isoformat(), pk], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        date_created, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        date_created = parse_datetime(date_created)
+        pk = int(pk)
+    except (binascii.Error, TypeError, ValueError):
+        raise ValidationError({"cursor": "Invalid cursor"})
+    if date_created is None:
+        raise ValidationError({"cursor": "Invalid cursor"})
+    return date_created, pk
+
+
+class TransactionCursorPagination(BasePagination):
+    """
+    Keyset pagination on (date_created, id), newest first. Every page is a
+    single index range scan, so page 10,000 costs the same as page 1.
+
+    Where Transactions is partitioned by month (PostgreSQL), a page is read
+    in date windows going back from the cursor, stopping once it is full, so
+    the planner usually opens the recent partitions only instead of merging
+    an index scan of every month.
+    """
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    # Lower bounds tried in turn, relative to the cursor (or now); None
+    # reads the rest of the history. Each extra window costs a round trip,
+    # so the first one is wide enough to fill most pages on its own.
+    history_windows = [timedelta(days=183), None]
+
+    def get_page_size(self, request):
+        value = request.query_params.get(self.page_size_query_param)
+        if value is None:
+            return self.page_size
+        try:
+            size = int(value)
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: "A valid integer is required"})
+        return max(1, min(size, self.max_page_size))
+
+    def get_page_queryset(self, queryset, request):
+        self.page_size_used = self.get_page_size(request)
+        self.anchor = self.position = None
+        queryset = queryset.order_by("-date_created", "-id")
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            date_created, pk = decode_cursor(cursor)
+            self.anchor, self.position = date_created, (date_created, pk)
+            # The redundant ``date_created <= X`` keeps the predicate a plain
+            # index range condition on every backend, and prunes the newer
+            # partitions on PostgreSQL.
+            queryset = queryset.filter(date_created__lte=date_created).filter(
+                Q(date_created__lt=date_created) | Q(id__lt=pk)
+            )
+        return queryset
+
+    def get_windows(self, queryset, request):
+        """
+        Querysets that together cover the page, newest first and disjoint.
+        Slice each to the rows still missing before evaluating it.
+        """
+        queryset = self.get_page_queryset(queryset, request)
+        if not partitions.prunes_by_date(connections[queryset.db]):
+            yield queryset
+            return
+
+        anchor = self.anchor or timezone.now()
+        newer = None
+        for span in self.history_windows:
+            window = queryset if newer is None else queryset.filter(date_created__lt=newer)
+            if span is None:
+                yield window
+                return
+            newer = anchor - span
+            yield window.filter(date_created__gte=newer)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # One extra row tells us whether there is a next page.
+        rows = []
+        for window in self.get_windows(queryset, request):
+            rows += window[: self.page_size_used + 1 - len(rows)]
+            if len(rows) > self.page_size_used:
+                break
+        return self.set_page(self.read_through(queryset, rows))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        rows = []
+        for window in self.get_windows(queryset, request):
+            rows += [row async for row in window[: self.page_size_used + 1 - len(rows)]]
+            if len(rows) > self.page_size_used:
+                break
+        if archive.segments():
+            rows = await sync_to_async(self.read_through, thread_sensitive=False)(queryset, rows)
+        return self.set_page(rows)
+
+    def read_through(self, queryset, rows):
+        """
+        Merge archived rows (see ``transactions.archive``) into the page when
+        it reaches back past the newest of them.
+        """
+        if not archive.segments():
+            return rows
+        latest = archive.latest_archived(queryset)
+        if latest is None or (len(rows) > self.page_size_used and rows[-1].date_created > latest):
+            return rows
+
+        archived = (
+            Transaction(**row) for row in archive.history(queryset, newest_first=True, before=self.position)
+        )
+        merged = heapq.merge(rows, archived, key=lambda row: (row.date_created, row.pk), reverse=True)
+        return list(itertools.islice(merged, self.page_size_used + 1))
+
+    def set_page(self, rows):
+        has_next = len(rows) > self.page_size_used
+        rows = rows[: self.page_size_used]
+
+        self.next_cursor = encode_cursor(rows[-1].date_created, rows[-1].pk) if has_next else None
+        return rows
+
+    def get_paginated_data(self, data):
+        return {"data": data, "next_cursor": self.next_cursor}
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
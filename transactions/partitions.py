@@ -0,0 +1,242 @@
+"""
+Monthly range partitioning of the Transactions table on PostgreSQL.
+
+Each month of ``date_created`` (UTC) lives in its own partition,
+``Transactions_yYYYYmMM``, plus a ``Transactions_default`` partition that
+catches rows no monthly partition covers, so an insert never fails because
+`manage.py transaction_partitions` ran late. Queries bounded on
+``date_created`` only touch the partitions in range, and old months that
+`manage.py archive_transactions` has emptied can be detached.
+
+On any other database the table stays a plain one and everything here is a
+no-op; the ORM code is the same either way.
+"""
+
+# Python imports
+import datetime
+import re
+
+# Django imports
+from django.db import transaction
+
+TABLE = "Transactions"
+DEFAULT_PARTITION = f"{TABLE}_default"
+PRIMARY_KEY = f"{TABLE}_pkey"
+_PARTITION_NAME = re.compile(rf"^{TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+
+class PartitionError(Exception):
+    pass
+
+
+def month_start(when):
+    when = when.astimezone(datetime.timezone.utc)
+    return datetime.datetime(when.year, when.month, 1, tzinfo=datetime.timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month):
+    return f"{TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def prunes_by_date(connection):
+    """
+    Whether queries on ``connection`` benefit from date bounds. Migration
+    0013 partitions Transactions on every PostgreSQL database, so this
+    avoids a catalog lookup on the request path.
+    """
+    return connection.vendor == "postgresql"
+
+
+def is_partitioned(connection):
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [connection.ops.quote_name(TABLE)]
+        )
+        row = cursor.fetchone()
+    return row is not None and row[0] == "p"
+
+
+def list_partitions(connection):
+    """The monthly partitions currently attached, as sorted (month, name) pairs."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)",
+            [connection.ops.quote_name(TABLE)],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    months = []
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            months.append((datetime.datetime(int(match[1]), int(match[2]), 1, tzinfo=datetime.timezone.utc), name))
+    return sorted(months)
+
+
+def _create_partition(connection, cursor, month):
+    qn = connection.ops.quote_name
+    bounds = [month, add_months(month, 1)]
+    name = qn(partition_name(month))
+
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+    if cursor.fetchone()[0]:
+        raise PartitionError(f"{partition_name(month)} exists but is not attached; it was detached earlier")
+
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [qn(DEFAULT_PARTITION)])
+    has_default = cursor.fetchone()[0]
+    if has_default:
+        cursor.execute(
+            f"SELECT 1 FROM {qn(DEFAULT_PARTITION)} WHERE date_created >= %s AND date_created < %s LIMIT 1", bounds
+        )
+        has_default = cursor.fetchone() is not None
+
+    if not has_default:
+        cursor.execute(f"CREATE TABLE {name} PARTITION OF {qn(TABLE)} FOR VALUES FROM (%s) TO (%s)", bounds)
+        return
+
+    # The month already has rows in the default partition, which Postgres
+    # refuses to leave there once a partition covers them: move them over
+    # while the default partition is detached.
+    cursor.execute(f"ALTER TABLE {qn(TABLE)} DETACH PARTITION {qn(DEFAULT_PARTITION)}")
+    cursor.execute(f"CREATE TABLE {name} PARTITION OF {qn(TABLE)} FOR VALUES FROM (%s) TO (%s)", bounds)
+    cursor.execute(
+        f"WITH moved AS (DELETE FROM {qn(DEFAULT_PARTITION)} WHERE date_created >= %s AND date_created < %s "
+        f"RETURNING *) INSERT INTO {name} SELECT * FROM moved",
+        bounds,
+    )
+    cursor.execute(f"ALTER TABLE {qn(TABLE)} ATTACH PARTITION {qn(DEFAULT_PARTITION)} DEFAULT")
+
+
+def ensure_partitions(connection, ahead, now=None, since=None):
+    """
+    Create any missing monthly partitions from the current month (or the
+    month of ``since``, if earlier) through ``ahead`` months after the
+    current one. Returns the names created.
+    """
+    current = month_start(now or datetime.datetime.now(datetime.timezone.utc))
+    month = min(current, month_start(since)) if since else current
+    existing = {month for month, _ in list_partitions(connection)}
+    created = []
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        while month <= add_months(current, ahead):
+            if month not in existing:
+                _create_partition(connection, cursor, month)
+                created.append(partition_name(month))
+            month = add_months(month, 1)
+    return created
+
+
+def detach_partitions(connection, before):
+    """
+    Detach every monthly partition that ends on or before the month of
+    ``before``; they stay behind as empty tables. Only archived months can
+    go: rows removed any other way would vanish from history, the summaries
+    and reconciliation, and the ledger entries that keep their ids could no
+    longer resolve them. archive_transactions empties a month once every row
+    in it is processed. Raises PartitionError, detaching nothing, if any of
+    them still holds a transaction.
+    """
+    qn = connection.ops.quote_name
+    cutoff = month_start(before)
+    old = [name for month, name in list_partitions(connection) if add_months(month, 1) <= cutoff]
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        for name in old:
+            # Detached first, so no row can arrive between the check and
+            # the detach; a failed check rolls every detach back.
+            cursor.execute(f"ALTER TABLE {qn(TABLE)} DETACH PARTITION {qn(name)}")
+            cursor.execute(f"SELECT 1 FROM {qn(name)} LIMIT 1")
+            if cursor.fetchone() is not None:
+                raise PartitionError(
+                    f"{name} still holds transactions; archive them with archive_transactions first"
+                )
+    return old
+
+
+def _rebuild(connection, partitioned, ahead=0):
+    """
+    Recreate Transactions as a partitioned (or plain) table with the same
+    columns, rows, identity sequence, indexes and foreign keys. Takes an
+    exclusive lock for the whole copy, so run it in a maintenance window on
+    a large table.
+    """
+    qn = connection.ops.quote_name
+    table, old = qn(TABLE), qn(f"{TABLE}_old")
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT conrelid::regclass::text FROM pg_constraint WHERE contype = 'f' AND confrelid = to_regclass(%s)",
+            [table],
+        )
+        referencing = [row[0] for row in cursor.fetchall()]
+        if referencing:
+            raise PartitionError(f"{TABLE} is referenced by foreign keys from {', '.join(referencing)}")
+
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = %s AND indexname <> %s",
+            [TABLE, PRIMARY_KEY],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE contype = 'f' AND conrelid = to_regclass(%s)",
+            [table],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+        cursor.execute(f"SELECT CASE WHEN is_called THEN last_value ELSE last_value - 1 END FROM {cursor.fetchone()[0]}")
+        last_id = cursor.fetchone()[0]
+
+        # Free the names the new table's objects will take.
+        for name, _ in foreign_keys:
+            cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {qn(name)}")
+        for name, _ in indexes:
+            cursor.execute(f"DROP INDEX {qn(name)}")
+        cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {qn(PRIMARY_KEY)}")
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {old}")
+
+        cursor.execute(
+            f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            + (" PARTITION BY RANGE (date_created)" if partitioned else "")
+        )
+        if partitioned:
+            cursor.execute(f"SELECT MIN(date_created) FROM {old}")
+            first = cursor.fetchone()[0]
+            current = month_start(datetime.datetime.now(datetime.timezone.utc))
+            month = month_start(first) if first and first < current else current
+            while month <= add_months(current, ahead):
+                _create_partition(connection, cursor, month)
+                month = add_months(month, 1)
+            cursor.execute(f"CREATE TABLE {qn(DEFAULT_PARTITION)} PARTITION OF {table} DEFAULT")
+
+        cursor.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+        cursor.execute(f"DROP TABLE {old}")
+
+        cursor.execute(f"ALTER TABLE {table} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY")
+        cursor.execute(f"SELECT MAX(id) FROM {table}")
+        last_id = max(last_id, cursor.fetchone()[0] or 0)
+        if last_id:
+            cursor.execute("SELECT setval(pg_get_serial_sequence(%s, 'id'), %s)", [table, last_id])
+        # A partitioned table's unique keys must include the partition key.
+        primary_key = "id, date_created" if partitioned else "id"
+        cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {qn(PRIMARY_KEY)} PRIMARY KEY ({primary_key})")
+        for _, definition in indexes:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {qn(name)} {definition}")
+        cursor.execute(f"ANALYZE {table}")
+
+
+def convert_to_partitioned(connection, ahead):
+    _rebuild(connection, partitioned=True, ahead=ahead)
+
+
+def convert_to_plain(connection):
+    _rebuild(connection, partitioned=False)
@@ -0,0 +1,155 @@
+# Python imports
+import multiprocessing
+
+# Django imports
+from django.db import connections
+from django.db.models import Max, Min
+
+# Third party imports
+import numpy as np
+import pandas as pd
+
+# App imports
+from transactions import archive
+from transactions.models import Transaction, Wallet
+
+# Withdrawals are debited when they are requested, so every one that has
+# not been rejected counts against the balance; deposits only count once
+# processed.
+HELD_WITHDRAW_STATUSES = ["pending", "processing", "processed"]
+
+KEYS = ["user_id", "currency"]
+REPORT_COLUMNS = [
+    "user_id", "currency", "wallet_balance", "expected_balance", "difference",
+    "deposited", "withdrawn", "transactions", "issue",
+]
+
+
+def user_ranges(shards):
+    """Split the user ids that own wallets or transactions into ``shards`` [lo, hi) ranges."""
+    bounds = [
+        Wallet.objects.aggregate(lo=Min("user_id"), hi=Max("user_id")),
+        Transaction.objects.aggregate(lo=Min("user_id"), hi=Max("user_id")),
+    ]
+    lows = [b["lo"] for b in bounds if b["lo"] is not None]
+    highs = [b["hi"] for b in bounds if b["hi"] is not None]
+    if not lows:
+        return []
+
+    lo, hi = min(lows), max(highs) + 1
+    step = max(1, -(-(hi - lo) // max(shards, 1)))
+    return [(start, min(start + step, hi)) for start in range(lo, hi, step)]
+
+
+def expected_balances(lo, hi, chunk_size):
+    """
+    Stream (user_id, currency, type, status, amount) for users in [lo, hi)
+    and fold each chunk into per-wallet sums with vectorised operations,
+    plus the archived totals of those users. Returns (DataFrame indexed by
+    user_id/currency, rows read from the database).
+    """
+    rows = (
+        Transaction.objects.filter(user_id__gte=lo, user_id__lt=hi)
+        .values_list("user_id", "currency", "transaction_type", "status", "amount")
+        .iterator(chunk_size=chunk_size)
+    )
+
+    partials = []
+    total = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            partials.append(_aggregate(chunk))
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        partials.append(_aggregate(chunk))
+        total += len(chunk)
+
+    archived = [row[:5] for row in archive.totals(lo, hi)]
+    if archived:
+        partials.append(_aggregate_archived(archived))
+
+    if not partials:
+        return pd.DataFrame(columns=["deposited", "withdrawn", "transactions"]).rename_axis(KEYS), 0
+    return pd.concat(partials).groupby(level=KEYS).sum(), total
+
+
+def _aggregate(chunk):
+    frame = pd.DataFrame.from_records(chunk, columns=KEYS + ["transaction_type", "status", "amount"])
+    amount = frame["amount"].to_numpy(dtype=np.int64)
+    is_deposit = (frame["transaction_type"] == "deposit").to_numpy()
+    is_withdraw = (frame["transaction_type"] == "withdraw").to_numpy()
+
+    frame["deposited"] = np.where(is_deposit & (frame["status"] == "processed").to_numpy(), amount, 0)
+    frame["withdrawn"] = np.where(is_withdraw & frame["status"].isin(HELD_WITHDRAW_STATUSES).to_numpy(), amount, 0)
+    frame["transactions"] = 1
+    return frame.groupby(KEYS)[["deposited", "withdrawn", "transactions"]].sum()
+
+
+def _aggregate_archived(totals):
+    # Archived transactions are all processed, so each type counts in full.
+    frame = pd.DataFrame.from_records(totals, columns=KEYS + ["transaction_type", "amount", "transactions"])
+    amount = frame["amount"].to_numpy(dtype=np.int64)
+    frame["deposited"] = np.where((frame["transaction_type"] == "deposit").to_numpy(), amount, 0)
+    frame["withdrawn"] = np.where((frame["transaction_type"] == "withdraw").to_numpy(), amount, 0)
+    return frame.groupby(KEYS)[["deposited", "withdrawn", "transactions"]].sum()
+
+
+def reconcile_range(bounds, chunk_size):
+    """Reconcile one user-id range; returns (discrepancy records, stats)."""
+    lo, hi = bounds
+    expected, rows = expected_balances(lo, hi, chunk_size)
+
+    wallets = pd.DataFrame.from_records(
+        list(
+            Wallet.objects.filter(user_id__gte=lo, user_id__lt=hi)
+            .values_list("user_id", "currency", "available_amount")
+        ),
+        columns=KEYS + ["wallet_balance"],
+    ).set_index(KEYS)
+
+    merged = wallets.join(expected, how="outer")
+    has_wallet = merged["wallet_balance"].notna()
+    merged = merged.fillna(0).astype(np.int64)
+    merged["expected_balance"] = merged["deposited"] - merged["withdrawn"]
+    merged["difference"] = merged["wallet_balance"] - merged["expected_balance"]
+
+    merged["issue"] = np.where(
+        ~has_wallet, "missing_wallet", np.where(merged["difference"] != 0, "balance_mismatch", "")
+    )
+    discrepancies = merged[merged["issue"] != ""].reset_index()
+
+    stats = {"range": [lo, hi], "transactions": rows, "wallets": int(has_wallet.sum())}
+    return discrepancies[REPORT_COLUMNS].to_dict("records"), stats
+
+
+def _run_shard(args):
+    bounds, chunk_size = args
+    try:
+        return reconcile_range(bounds, chunk_size)
+    finally:
+        connections.close_all()
+
+
+def reconcile(shards, workers, chunk_size):
+    """
+    Reconcile every wallet, sharding by user-id range across a pool of
+    ``workers`` forked processes. Returns (DataFrame of discrepancies, list
+    of per-shard stats).
+    """
+    ranges = user_ranges(shards)
+    tasks = [(bounds, chunk_size) for bounds in ranges]
+
+    if workers <= 1:
+        results = [reconcile_range(bounds, chunk_size) for bounds in ranges]
+    else:
+        # Each forked worker opens its own database connection.
+        connections.close_all()
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            results = list(pool.imap_unordered(_run_shard, tasks))
+
+    records = [record for shard_records, _ in results for record in shard_records]
+    report = pd.DataFrame.from_records(records, columns=REPORT_COLUMNS).sort_values(KEYS, ignore_index=True)
+    return report, [stats for _, stats in results]
@@ -1,28 +1,60 @@
+# Django imports
+from django.conf import settings
+
 # rest_framework imports
 from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
 
 # App imports
 from transactions.models import Transaction, Wallet
 
         
 class TransactionSerializer(serializers.ModelSerializer):
+    currency = serializers.ChoiceField(choices=settings.SUPPORTED_CURRENCIES, default=settings.DEFAULT_CURRENCY)
+
     class Meta:
         model = Transaction
-        fields = ['id', 'transaction_type', 'amount', 'status', 'date_created']
+        fields = ['id', 'transaction_type', 'amount', 'currency', 'status', 'date_created']
+
+    def validate_amount(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Amount must be greater than zero")
+        return value
         
         
+class BatchListSerializer(serializers.ListSerializer):
+    # Items are validated one by one and an invalid item is reported in its
+    # own slot, so one bad row does not reject other users' items.
+    def run_child_validation(self, data):
+        try:
+            return {"item": self.child.run_validation(data), "errors": None}
+        except ValidationError as exc:
+            return {"item": None, "errors": exc.detail}
+
+
+class BatchTransactionSerializer(TransactionSerializer):
+    user = serializers.IntegerField(required=False)
+
+    class Meta(TransactionSerializer.Meta):
+        fields = ['transaction_type', 'amount', 'currency', 'user']
+        extra_kwargs = {
+            "transaction_type": {"required": True, "allow_null": False},
+        }
+        list_serializer_class = BatchListSerializer
+
+
 class WalletSerializer(serializers.ModelSerializer):
     class Meta:
         model = Wallet
-        fields = ['id', 'user', 'available_amount', 'date_modified']
+        fields = ['id', 'user', 'currency', 'available_amount', 'date_modified']
         
         
 class StatusSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transaction
-        fields = ['amount', 'status']
+        fields = ['amount', 'currency', 'status']
 
-class TotalSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Transaction
-        fields = ['amount']
\ No newline at end of file
+class TotalSerializer(serializers.Serializer):
+    total = serializers.IntegerField()
+    count = serializers.IntegerField()
+    last_activity = serializers.DateTimeField(allow_null=True)
\ No newline at end of file
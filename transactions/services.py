@@ -0,0 +1,384 @@
+# Django imports
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+# App imports
+from ledger.services import post_entries, post_entry
+from transactions.models import Transaction, TransactionSummary, Wallet
+
+
+class InsufficientFunds(Exception):
+    pass
+
+
+class PendingTransaction(Exception):
+    pass
+
+
+# Balance changes are applied with a single conditional UPDATE so concurrent
+# requests can never overwrite each other's writes. The affected-row count
+# tells us whether the wallet existed / had enough funds. The same UPDATE bumps
+# the wallet's ledger sequence; everything else (pending check, transaction
+# row, ledger entry, summary) happens while that row lock is held.
+
+def _apply_delta(wallets, delta, entries=1):
+    return wallets.update(
+        available_amount=F("available_amount") + delta,
+        ledger_sequence=F("ledger_sequence") + entries,
+        date_modified=timezone.now(),
+    )
+
+
+def ensure_wallet(user_id, currency=None):
+    """
+    Create the user's wallet in ``currency`` unless it exists. The insert
+    ignores conflicts on the (user, currency) constraint, so concurrent
+    callers can never end up with two wallets.
+    """
+    Wallet.objects.bulk_create(
+        [Wallet(user_id=user_id, currency=currency or settings.DEFAULT_CURRENCY)],
+        ignore_conflicts=True,
+    )
+
+
+def _locked_wallet_state(user, currency):
+    wallet_id, balance, sequence, deposit_status, withdraw_status = (
+        Wallet.objects.filter(user=user, currency=currency)
+        .values_list(
+            "pk", "available_amount", "ledger_sequence",
+            "summary__last_deposit_status", "summary__last_withdraw_status",
+        )
+        .get()
+    )
+    return wallet_id, balance, sequence, {"deposit": deposit_status, "withdraw": withdraw_status}
+
+
+def deposit_funds(user, amount, currency=None):
+    if amount <= 0:
+        raise ValueError("Amount must be greater than zero")
+    currency = currency or settings.DEFAULT_CURRENCY
+
+    with transaction.atomic():
+        wallets = Wallet.objects.filter(user=user, currency=currency)
+        if not _apply_delta(wallets, amount):
+            ensure_wallet(user.pk, currency)
+            _apply_delta(wallets, amount)
+
+        wallet_id, balance, sequence, last_status = _locked_wallet_state(user, currency)
+        if last_status["deposit"] == "pending":
+            raise PendingTransaction("You have a pending transaction")
+
+        tx = Transaction.objects.create(
+            user=user,
+            transaction_type="deposit",
+            amount=amount,
+            currency=currency,
+            status="processed",
+        )
+        post_entry(wallet_id, balance, sequence, tx, "credit", amount)
+        update_summary(wallet_id, "deposit", amount=amount, count=1, latest=tx, when=tx.date_created)
+        return tx
+
+
+def withdraw_funds(user, amount, currency=None):
+    if amount <= 0:
+        raise ValueError("Amount must be greater than zero")
+    currency = currency or settings.DEFAULT_CURRENCY
+
+    with transaction.atomic():
+        wallets = Wallet.objects.filter(user=user, currency=currency, available_amount__gte=amount)
+        if not _apply_delta(wallets, -amount):
+            raise InsufficientFunds("Insufficient funds")
+
+        wallet_id, balance, sequence, last_status = _locked_wallet_state(user, currency)
+        if last_status["withdraw"] == "pending":
+            raise PendingTransaction("You have a pending transaction")
+
+        tx = Transaction.objects.create(
+            user=user,
+            transaction_type="withdraw",
+            amount=amount,
+            currency=currency,
+        )
+        post_entry(wallet_id, balance, sequence, tx, "debit", amount)
+        update_summary(wallet_id, "withdraw", latest=tx, when=tx.date_created)
+        return tx
+
+
+def apply_batch(user_id, items):
+    """
+    Apply a batch of deposits/withdrawals for one user, all or nothing. Each
+    wallet moves by its net amount in one conditional UPDATE and the rows are
+    written with bulk_create. Items apply in order, so a withdrawal must be
+    covered by the balance and the deposits listed before it. ``items`` are validated dicts with
+    ``transaction_type``, ``amount`` and optionally ``currency``; the created
+    transactions are returned in the same order.
+    """
+    by_currency = {}
+    for position, item in enumerate(items):
+        by_currency.setdefault(item.get("currency") or settings.DEFAULT_CURRENCY, []).append((position, item))
+
+    created = [None] * len(items)
+    with transaction.atomic():
+        # Wallets are always locked in currency order.
+        for currency, group in sorted(by_currency.items()):
+            transactions = _apply_wallet_batch(user_id, currency, [item for _, item in group])
+            for (position, _), tx in zip(group, transactions):
+                created[position] = tx
+    return created
+
+
+def _apply_wallet_batch(user_id, currency, items):
+    deltas = [item["amount"] if item["transaction_type"] == "deposit" else -item["amount"] for item in items]
+    net = sum(deltas)
+
+    wallets = Wallet.objects.filter(user_id=user_id, currency=currency)
+    if net < 0:
+        wallets = wallets.filter(available_amount__gte=-net)
+
+    if not _apply_delta(wallets, net, entries=len(items)):
+        if net < 0:
+            raise InsufficientFunds("Insufficient funds")
+        ensure_wallet(user_id, currency)
+        _apply_delta(wallets, net, entries=len(items))
+
+    wallet_id, balance, sequence, last_status = _locked_wallet_state(user_id, currency)
+    # The UPDATE only checked the net amount. Every item must also fit in
+    # order, or the ledger would record a negative balance_after; raising
+    # here rolls the UPDATE back.
+    running = balance - net
+    for delta in deltas:
+        running += delta
+        if running < 0:
+            raise InsufficientFunds("Insufficient funds")
+    types = {item["transaction_type"] for item in items}
+    if any(last_status[transaction_type] == "pending" for transaction_type in types):
+        raise PendingTransaction("You have a pending transaction")
+    # Withdrawals stay pending until settled, so only one fits per wallet.
+    if sum(item["transaction_type"] == "withdraw" for item in items) > 1:
+        raise PendingTransaction("Only one withdrawal can be pending at a time")
+
+    transactions = Transaction.objects.bulk_create(
+        Transaction(
+            user_id=user_id,
+            transaction_type=item["transaction_type"],
+            amount=item["amount"],
+            currency=currency,
+            **({"status": "processed"} if item["transaction_type"] == "deposit" else {}),
+        )
+        for item in items
+    )
+
+    post_entries(wallet_id, balance, sequence, [
+        (tx, "credit" if tx.transaction_type == "deposit" else "debit", tx.amount)
+        for tx in transactions
+    ])
+
+    deposits = [tx for tx in transactions if tx.transaction_type == "deposit"]
+    withdrawals = [tx for tx in transactions if tx.transaction_type == "withdraw"]
+    if deposits:
+        update_summary(
+            wallet_id, "deposit",
+            amount=sum(tx.amount for tx in deposits), count=len(deposits),
+            latest=deposits[-1], when=deposits[-1].date_created,
+        )
+    if withdrawals:
+        update_summary(wallet_id, "withdraw", latest=withdrawals[-1], when=withdrawals[-1].date_created)
+
+    return transactions
+
+
+SUMMARY_FIELDS = {
+    "deposit": ("total_deposited", "deposit_count"),
+    "withdraw": ("total_withdrawn", "withdraw_count"),
+}
+
+
+def update_summary(wallet_id, transaction_type, amount=0, count=0, latest=None, when=None):
+    """
+    Apply one change to the wallet's TransactionSummary in a single UPDATE:
+    ``amount``/``count`` are added to the processed totals (negative values
+    take a transaction back out) and ``latest`` becomes the type's latest
+    transaction pointer. Call it inside the atomic block that changes the
+    transaction, after the wallet row has been locked, so the first-row
+    insert cannot race.
+    """
+    total_field, count_field = SUMMARY_FIELDS[transaction_type]
+    values = {}
+    if count:
+        values[total_field] = amount
+        values[count_field] = count
+        values["last_activity"] = values[f"last_{transaction_type}_activity"] = when or timezone.now()
+    if latest is not None:
+        values[f"last_{transaction_type}"] = latest
+        values[f"last_{transaction_type}_status"] = latest.status
+    if not values:
+        return
+
+    updated = TransactionSummary.objects.filter(pk=wallet_id).update(
+        **{
+            field: F(field) + value if field in (total_field, count_field) else value
+            for field, value in values.items()
+        }
+    )
+    if not updated:
+        TransactionSummary.objects.create(wallet_id=wallet_id, **values)
+
+
+def sync_latest_status(wallet_id, tx):
+    """Refresh the denormalized status if ``tx`` is its type's latest transaction."""
+    TransactionSummary.objects.filter(
+        pk=wallet_id, **{f"last_{tx.transaction_type}": tx}
+    ).update(**{f"last_{tx.transaction_type}_status": tx.status})
+
+
+# Settlement: `manage.py process_transactions` claims pending rows, moves them
+# to "processing", then settles them to "processed" in bulk. Pending deposits
+# are credited on settlement; withdrawals were already debited when they were
+# requested, so settling them only updates the totals.
+
+def claim_pending(worker_id, batch_size):
+    """Claim up to ``batch_size`` pending transactions for ``worker_id``."""
+    now = timezone.now()
+    pending = Transaction.objects.filter(status="pending").order_by("id")
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(pending.select_for_update(skip_locked=True).values_list("pk", flat=True)[:batch_size])
+            Transaction.objects.filter(pk__in=ids).update(status="processing", claimed_by=worker_id, claimed_at=now)
+            _sync_pointer_status(ids, "processing")
+            _touch_wallets(ids, now)
+        return ids
+
+    # Portable fallback (SQLite): the conditional UPDATE decides which worker
+    # wins each row, then we read back what we actually got. Each statement
+    # commits on its own so competing workers never wait on a lock upgrade.
+    candidates = list(pending.values_list("pk", flat=True)[:batch_size])
+    Transaction.objects.filter(pk__in=candidates, status="pending").update(
+        status="processing", claimed_by=worker_id, claimed_at=now
+    )
+    ids = list(
+        Transaction.objects.filter(pk__in=candidates, status="processing", claimed_by=worker_id)
+        .values_list("pk", flat=True)
+    )
+    _sync_pointer_status(ids, "processing")
+    _touch_wallets(ids, now)
+    return ids
+
+
+def settle_claimed(ids):
+    """
+    Settle claimed transactions in one DB transaction and return their
+    (date_created, amount) pairs for metrics.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # Write first: on SQLite this takes the write lock up front instead of
+        # upgrading a read lock later, which is what deadlocks concurrent
+        # workers.
+        Transaction.objects.filter(pk__in=ids, status="processing").update(status="processed", date_processed=now)
+        rows = list(
+            Transaction.objects.filter(pk__in=ids, status="processed", date_processed=now)
+            .order_by("user_id", "currency", "id")
+            .values_list("pk", "user_id", "currency", "transaction_type", "amount", "date_created")
+        )
+        by_wallet = {}
+        for row in rows:
+            by_wallet.setdefault((row[1], row[2]), []).append(row)
+
+        # Lock every affected wallet up front, in (user, currency) order, so
+        # concurrent workers always take the locks in the same order.
+        wallets = {
+            (user_id, currency): wallet_id
+            for user_id, currency, wallet_id in Wallet.objects.select_for_update()
+            .filter(user_id__in={user_id for user_id, _ in by_wallet})
+            .order_by("user_id", "currency")
+            .values_list("user_id", "currency", "pk")
+        }
+        # Settled withdrawals don't move a balance; bump date_modified anyway
+        # so conditional GETs notice the status change.
+        Wallet.objects.filter(pk__in=wallets.values()).update(date_modified=now)
+
+        for (user_id, currency), wallet_rows in by_wallet.items():
+            deposits = [row for row in wallet_rows if row[3] == "deposit"]
+            withdrawals = [row for row in wallet_rows if row[3] == "withdraw"]
+
+            if deposits:
+                credit = sum(row[4] for row in deposits)
+                user_wallets = Wallet.objects.filter(user_id=user_id, currency=currency)
+                if not _apply_delta(user_wallets, credit, entries=len(deposits)):
+                    ensure_wallet(user_id, currency)
+                    _apply_delta(user_wallets, credit, entries=len(deposits))
+                wallet_id, balance, sequence, _ = _locked_wallet_state(user_id, currency)
+                post_entries(wallet_id, balance, sequence, [
+                    (Transaction(pk=row[0]), "credit", row[4]) for row in deposits
+                ])
+                update_summary(wallet_id, "deposit", amount=credit, count=len(deposits), when=now)
+                wallets[(user_id, currency)] = wallet_id
+
+            if withdrawals and (user_id, currency) in wallets:
+                update_summary(
+                    wallets[(user_id, currency)], "withdraw",
+                    amount=sum(row[4] for row in withdrawals), count=len(withdrawals), when=now,
+                )
+
+        _sync_pointer_status([row[0] for row in rows], "processed")
+
+    return [(row[5], row[4]) for row in rows]
+
+
+def release_claimed(ids=None, worker_id=None, older_than=None):
+    """Put claimed rows back in the queue (after a crash or a failed batch)."""
+    claimed = Transaction.objects.filter(status="processing")
+    if ids is not None:
+        claimed = claimed.filter(pk__in=ids)
+    if worker_id is not None:
+        claimed = claimed.filter(claimed_by=worker_id)
+    if older_than is not None:
+        claimed = claimed.filter(claimed_at__lt=older_than)
+
+    with transaction.atomic():
+        released = list(claimed.values_list("pk", flat=True))
+        Transaction.objects.filter(pk__in=released).update(status="pending", claimed_by=None, claimed_at=None)
+        _sync_pointer_status(released, "pending")
+        _touch_wallets(released, timezone.now())
+    return len(released)
+
+
+def _sync_pointer_status(ids, new_status):
+    # Claimed rows are always pending or processing, so the lookup can use
+    # the partial summary_open_*_idx indexes.
+    if not ids:
+        return
+    open_statuses = ["pending", "processing"]
+    TransactionSummary.objects.filter(
+        last_deposit__in=ids, last_deposit_status__in=open_statuses
+    ).update(last_deposit_status=new_status)
+    TransactionSummary.objects.filter(
+        last_withdraw__in=ids, last_withdraw_status__in=open_statuses
+    ).update(last_withdraw_status=new_status)
+
+
+def _touch_wallets(ids, now):
+    # Bump date_modified on the wallets owning ``ids`` so the conditional GET
+    # validators change when only a transaction's status does.
+    if not ids:
+        return
+    touch_wallets(Transaction.objects.filter(pk__in=ids).values("user_id"), now)
+
+
+def touch_wallets(user_ids, now=None):
+    """
+    Bump ``date_modified`` on every wallet of ``user_ids`` (a list or a
+    ``user_id`` values queryset), so conditional GETs revalidate after a
+    change that moves no balance: admin edits and deletes, archiving.
+    """
+    wallets = Wallet.objects.filter(user_id__in=user_ids)
+    if connection.features.has_select_for_update:
+        # Lock in the same (user, currency) order as settle_claimed.
+        wallets = Wallet.objects.filter(pk__in=list(
+            wallets.select_for_update().order_by("user_id", "currency").values_list("pk", flat=True)
+        ))
+    wallets.update(date_modified=now or timezone.now())
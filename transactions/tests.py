@@ -1,3 +1,625 @@
-from django.test import TestCase
+# Python imports
+import io
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import skipUnless
 
-# Create your tests here.
+# Django imports
+from django.contrib.admin.sites import site
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+# App imports
+from accounts.authentication import user_cache
+from accounts.models import User
+from apexpay_core import db_router
+from ledger.models import BalanceSnapshot, LedgerEntry
+from ledger.services import balance_as_of, unbalanced_transactions
+from transactions import partitions
+from transactions.idempotency import response_cache
+from transactions.models import Transaction, TransactionSummary, Wallet
+from transactions.reconciliation import reconcile
+from transactions.services import (
+    InsufficientFunds,
+    PendingTransaction,
+    claim_pending,
+    deposit_funds,
+    ensure_wallet,
+    release_claimed,
+    settle_claimed,
+    withdraw_funds,
+)
+
+# rest_framework imports
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+def make_user(email="ada@example.com", **extra):
+    return User.objects.create_user(
+        email=email, username=email.split("@")[0], password="Sup3r-secret!",
+        first_name="Ada", last_name="Lovelace", mobile="0800", **extra,
+    )
+
+
+def balance_of(user, currency="NGN"):
+    return Wallet.objects.get(user=user, currency=currency).available_amount
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, THROTTLE_RATES={}, DEFAULT_CURRENCY="NGN")
+class APITestBase(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        response_cache.clear()
+        self.user = make_user()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+
+
+class WalletServiceTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+
+    def test_deposit_and_withdraw_move_the_balance_and_totals(self):
+        deposit_funds(self.user, 500)
+        withdraw_funds(self.user, 200)
+
+        self.assertEqual(balance_of(self.user), 300)
+        summary = TransactionSummary.objects.get(wallet__user=self.user)
+        self.assertEqual((summary.total_deposited, summary.deposit_count), (500, 1))
+        self.assertEqual(summary.last_withdraw_status, "pending")
+
+    def test_withdraw_above_the_balance_changes_nothing(self):
+        deposit_funds(self.user, 100)
+
+        with self.assertRaises(InsufficientFunds):
+            withdraw_funds(self.user, 101)
+
+        self.assertEqual(balance_of(self.user), 100)
+        self.assertFalse(Transaction.objects.filter(transaction_type="withdraw").exists())
+
+    def test_second_withdrawal_waits_for_the_pending_one(self):
+        deposit_funds(self.user, 100)
+        withdraw_funds(self.user, 10)
+
+        with self.assertRaises(PendingTransaction):
+            withdraw_funds(self.user, 10)
+
+        self.assertEqual(balance_of(self.user), 90)
+
+    def test_currency_defaults_follow_the_setting(self):
+        with override_settings(DEFAULT_CURRENCY="USD"):
+            self.assertEqual(Transaction().currency, "USD")
+            self.assertEqual(Wallet().currency, "USD")
+
+    def test_default_currency_does_not_leak_into_migrations(self):
+        with override_settings(DEFAULT_CURRENCY="USD"):
+            call_command("makemigrations", "transactions", check=True, dry_run=True, stdout=io.StringIO())
+
+
+class ConcurrentBalanceTests(TransactionTestCase):
+    """Many requests on one wallet at once: no lost updates, no overdraft."""
+
+    workers = 8
+
+    def run_concurrently(self, operation):
+        outcomes = []
+        lock = threading.Lock()
+        start = threading.Barrier(self.workers)
+
+        def worker():
+            start.wait()
+            try:
+                while True:
+                    try:
+                        operation()
+                        outcome = "ok"
+                    except (InsufficientFunds, PendingTransaction) as exc:
+                        outcome = type(exc).__name__
+                    except OperationalError:
+                        # SQLite's shared in-memory test database reports a
+                        # locked table instead of waiting; try again.
+                        time.sleep(0.005)
+                        continue
+                    with lock:
+                        outcomes.append(outcome)
+                    return
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_concurrent_deposits_are_all_counted(self):
+        user = make_user()
+        ensure_wallet(user.pk, "NGN")
+
+        outcomes = self.run_concurrently(lambda: deposit_funds(user, 10, "NGN"))
+
+        self.assertEqual(outcomes, ["ok"] * self.workers)
+        self.assertEqual(balance_of(user), 10 * self.workers)
+        self.assertEqual(Wallet.objects.get(user=user).ledger_sequence, self.workers)
+
+    def test_concurrent_withdrawals_never_overdraw(self):
+        user = make_user()
+        deposit_funds(user, 100, "NGN")
+
+        outcomes = self.run_concurrently(lambda: withdraw_funds(user, 60, "NGN"))
+
+        self.assertEqual(outcomes.count("ok"), 1)
+        self.assertEqual(balance_of(user), 40)
+        self.assertEqual(Transaction.objects.filter(transaction_type="withdraw").count(), 1)
+        self.assertEqual(
+            list(LedgerEntry.objects.filter(account="wallet").order_by("sequence").values_list("entry_type", "balance_after")),
+            [("credit", 100), ("debit", 40)],
+        )
+
+
+class BatchTests(APITestBase):
+    def submit(self, *items):
+        return self.client.post(reverse("transactions-batch"), {"transactions": [
+            {"transaction_type": transaction_type, "amount": amount} for transaction_type, amount in items
+        ]}, format="json")
+
+    def test_items_are_applied_in_order(self):
+        deposit_funds(self.user, 100)
+
+        response = self.submit(("deposit", 100), ("withdraw", 150))
+
+        self.assertEqual([row["status"] for row in response.data["data"]], ["accepted", "accepted"])
+        self.assertEqual(balance_of(self.user), 50)
+        self.assertEqual(
+            list(LedgerEntry.objects.filter(account="wallet").order_by("sequence").values_list("balance_after", flat=True)),
+            [100, 200, 50],
+        )
+
+    def test_withdrawal_before_the_deposit_covering_it_rejects_the_batch(self):
+        deposit_funds(self.user, 100)
+
+        response = self.submit(("withdraw", 150), ("deposit", 100))
+
+        self.assertEqual({row["message"] for row in response.data["data"]}, {"Insufficient funds"})
+        self.assertEqual(balance_of(self.user), 100)
+        self.assertEqual(LedgerEntry.objects.filter(account="wallet").count(), 1)
+        self.assertEqual(Wallet.objects.get(user=self.user).ledger_sequence, 1)
+
+
+class CursorPaginationTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        Transaction.objects.bulk_create(
+            Transaction(user=self.user, transaction_type="deposit", amount=n + 1, status="processed")
+            for n in range(45)
+        )
+        # Groups of rows share a timestamp, so pages must break ties on id.
+        now = timezone.now()
+        for index, pk in enumerate(Transaction.objects.order_by("id").values_list("pk", flat=True)):
+            Transaction.objects.filter(pk=pk).update(date_created=now - timedelta(minutes=index // 4))
+
+    def test_following_cursors_returns_every_transaction_once_in_order(self):
+        seen, cursor = [], None
+        while True:
+            params = {"page_size": 10, **({"cursor": cursor} if cursor else {})}
+            response = self.client.get(reverse("transactions"), params)
+            self.assertEqual(response.status_code, 200)
+            seen += [row["id"] for row in response.data["data"]]
+            cursor = response.data["next_cursor"]
+            if cursor is None:
+                break
+
+        expected = list(Transaction.objects.order_by("-date_created", "-id").values_list("pk", flat=True))
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(seen), 45)
+
+    def test_filters_apply_to_every_page(self):
+        Transaction.objects.filter(amount__lte=5).update(transaction_type="withdraw")
+
+        response = self.client.get(reverse("transactions"), {"transaction_type": "withdraw"})
+
+        self.assertEqual(sorted(row["amount"] for row in response.data["data"]), [1, 2, 3, 4, 5])
+        self.assertIsNone(response.data["next_cursor"])
+
+    def test_invalid_cursor_is_a_bad_request(self):
+        response = self.client.get(reverse("transactions"), {"cursor": "not-a-cursor"})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_impossible_dates_are_a_bad_request(self):
+        for url in (reverse("transactions"), reverse("transactions-statement")):
+            with self.subTest(url=url):
+                response = self.client.get(url, {"date_from": "2024-02-30"})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("date_from", response.data)
+
+
+class IdempotencyTests(APITestBase):
+    def deposit(self, key, amount=500):
+        return self.client.post(
+            reverse("deposit"), {"transaction_type": "deposit", "amount": amount}, format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_replayed_key_returns_the_first_response_and_applies_once(self):
+        first = self.deposit("key-1")
+        replay = self.deposit("key-1")
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual((replay.status_code, replay.data), (201, first.data))
+        self.assertEqual(replay["Idempotent-Replayed"], "true")
+        self.assertEqual(Transaction.objects.count(), 1)
+        self.assertEqual(balance_of(self.user), 500)
+
+    def test_replay_survives_a_cold_response_cache(self):
+        self.deposit("key-1")
+        response_cache.clear()
+
+        replay = self.deposit("key-1")
+
+        self.assertEqual(replay["Idempotent-Replayed"], "true")
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_key_reused_for_another_request_is_rejected(self):
+        self.deposit("key-1")
+
+        response = self.deposit("key-1", amount=900)
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(balance_of(self.user), 500)
+
+
+class ConditionalGetTests(APITestBase):
+    def get(self, name, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get(reverse(name), **headers)
+
+    def test_unchanged_balance_answers_not_modified(self):
+        deposit_funds(self.user, 100)
+        etag = self.get("acc-balance")["ETag"]
+
+        self.assertEqual(self.get("acc-balance", etag).status_code, 304)
+
+    def test_deposit_changes_the_balance_etag(self):
+        deposit_funds(self.user, 100)
+        etag = self.get("acc-balance")["ETag"]
+        deposit_funds(self.user, 50)
+
+        response = self.get("acc-balance", etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["available_amount"], 150)
+
+    def test_each_total_is_validated_against_its_own_type(self):
+        deposit_funds(self.user, 100)
+        deposited = self.get("total-deposit")
+        withdraw_funds(self.user, 30)
+        settle_claimed(claim_pending("test-worker", 10))
+
+        self.assertEqual(self.get("total-deposit", deposited["ETag"]).status_code, 304)
+        deposit_funds(self.user, 50)
+        response = self.get("total-deposit", deposited["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["total"], 150)
+
+    def test_totals_report_their_own_type_activity(self):
+        deposit = deposit_funds(self.user, 100)
+        withdraw_funds(self.user, 30)
+        settle_claimed(claim_pending("test-worker", 10))
+
+        last_activity = self.get("total-deposit").data["data"]["last_activity"]
+
+        self.assertEqual(last_activity, deposit.date_created.isoformat().replace("+00:00", "Z"))
+
+    def test_settlement_changes_the_status_etag(self):
+        deposit_funds(self.user, 100)
+        withdraw_funds(self.user, 30)
+        etag = self.get("withdraw-status")["ETag"]
+
+        settle_claimed(claim_pending("test-worker", 10))
+
+        response = self.get("withdraw-status", etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["message"], "Your withdrawal is completed")
+
+    def test_admin_processing_a_withdrawal_changes_the_etags(self):
+        deposit_funds(self.user, 100)
+        tx = withdraw_funds(self.user, 30)
+        status_etag = self.get("withdraw-status")["ETag"]
+        total_etag = self.get("total-withdraw")["ETag"]
+
+        tx.status = "processed"
+        site._registry[Transaction].save_model(
+            self.admin_request(), tx, SimpleNamespace(initial={"status": "pending"}), True
+        )
+
+        response = self.get("withdraw-status", status_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["message"], "Your withdrawal is completed")
+        response = self.get("total-withdraw", total_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["total"], 30)
+
+    def admin_request(self):
+        request = RequestFactory().post("/admin/")
+        request.user = make_user("root@example.com", is_superuser=True)
+        return request
+
+    def test_admin_deleting_a_transaction_changes_the_history_etag(self):
+        deposit_funds(self.user, 100)
+        stray = Transaction.objects.create(user=self.user, transaction_type="deposit", amount=5)
+        etag = self.get("transactions")["ETag"]
+
+        site._registry[Transaction].delete_queryset(self.admin_request(), Transaction.objects.filter(pk=stray.pk))
+
+        response = self.get("transactions", etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["data"]), 1)
+
+    def test_admin_correcting_a_total_changes_its_etag(self):
+        deposit_funds(self.user, 100)
+        etag = self.get("total-deposit")["ETag"]
+        summary = TransactionSummary.objects.get(wallet__user=self.user)
+        summary.total_deposited = 90
+
+        site._registry[TransactionSummary].save_model(
+            self.admin_request(), summary, SimpleNamespace(changed_data=["total_deposited"]), True
+        )
+
+        response = self.get("total-deposit", etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"]["total"], 90)
+
+
+class SettlementTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        ensure_wallet(self.user.pk, "NGN")
+
+    def test_settling_credits_pending_deposits_once(self):
+        Transaction.objects.bulk_create(
+            Transaction(user=self.user, transaction_type="deposit", amount=amount, currency="NGN")
+            for amount in (10, 20, 30)
+        )
+
+        settled = settle_claimed(claim_pending("worker-a", 10))
+        settle_claimed(claim_pending("worker-b", 10))
+
+        self.assertEqual(len(settled), 3)
+        self.assertEqual(balance_of(self.user), 60)
+        self.assertFalse(Transaction.objects.exclude(status="processed").exists())
+        self.assertEqual(LedgerEntry.objects.filter(entry_type="credit").count(), 3)
+        summary = TransactionSummary.objects.get(wallet__user=self.user)
+        self.assertEqual((summary.total_deposited, summary.deposit_count), (60, 3))
+
+    def test_claimed_rows_are_not_claimed_twice(self):
+        Transaction.objects.create(user=self.user, transaction_type="deposit", amount=10, currency="NGN")
+
+        self.assertEqual(len(claim_pending("worker-a", 10)), 1)
+        self.assertEqual(claim_pending("worker-b", 10), [])
+
+    def test_released_claims_go_back_to_the_queue(self):
+        Transaction.objects.create(user=self.user, transaction_type="deposit", amount=10, currency="NGN")
+        claim_pending("worker-a", 10)
+
+        self.assertEqual(release_claimed(worker_id="worker-a"), 1)
+        self.assertEqual(len(claim_pending("worker-b", 10)), 1)
+
+
+class SettlementWorkerCommandTests(TransactionTestCase):
+    def test_worker_drains_the_queue(self):
+        user = make_user()
+        deposit_funds(user, 100, "NGN")
+        withdraw_funds(user, 40, "NGN")
+        Transaction.objects.create(user=user, transaction_type="deposit", amount=25, currency="NGN")
+        out = io.StringIO()
+
+        call_command("process_transactions", once=True, batch_size=1, verbosity=2, stdout=out)
+
+        self.assertFalse(Transaction.objects.exclude(status="processed").exists())
+        self.assertEqual(balance_of(user), 85)
+        self.assertIn("[worker 0] settled 1", out.getvalue())
+        self.assertIn("Settled 2 transactions", out.getvalue())
+
+
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = db_router.PrimaryReplicaRouter()
+        self.token = db_router.begin_request()
+        self.addCleanup(db_router.end_request, self.token)
+
+    @override_settings(REPLICA_DATABASES=["replica1", "replica2", "replica3"])
+    def test_a_request_reads_from_one_replica(self):
+        self.assertTrue(db_router.allow_replica_reads(None))
+
+        aliases = {self.router.db_for_read(Transaction) for _ in range(50)}
+
+        self.assertEqual(len(aliases), 1)
+        self.assertIn(aliases.pop(), ["replica1", "replica2", "replica3"])
+
+    @override_settings(REPLICA_DATABASES=["replica1"])
+    def test_reads_after_a_write_go_to_the_primary(self):
+        db_router.allow_replica_reads(None)
+        self.router.db_for_write(Transaction)
+
+        self.assertEqual(self.router.db_for_read(Transaction), db_router.PRIMARY)
+
+    @override_settings(REPLICA_DATABASES=["replica1"])
+    def test_users_who_just_wrote_read_from_the_primary(self):
+        user = make_user()
+        db_router.mark_sticky(user.pk)
+
+        self.assertFalse(db_router.allow_replica_reads(user))
+        self.assertEqual(self.router.db_for_read(Transaction), db_router.PRIMARY)
+
+    def test_without_replicas_everything_reads_from_the_primary(self):
+        self.assertFalse(db_router.allow_replica_reads(None))
+        self.assertEqual(self.router.db_for_read(Transaction), db_router.PRIMARY)
+
+
+class ArchiveTests(APITestBase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp(prefix="apexpay-archive-test-")
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        settings_override = override_settings(TRANSACTION_ARCHIVE_DIR=directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        # Recent activity through the services, with ledger entries...
+        deposit_funds(self.user, 100)
+        deposit_funds(self.user, 50)
+        # ...and older history from before the ledger, without any. The
+        # wallet holds both.
+        old = Transaction.objects.bulk_create(
+            Transaction(user=self.user, transaction_type="deposit", amount=5, currency="NGN", status="processed")
+            for _ in range(4)
+        )
+        Transaction.objects.filter(pk__in=[tx.pk for tx in old]).update(date_created=timezone.now() - timedelta(days=400))
+        Wallet.objects.filter(user=self.user).update(available_amount=170)
+        self.old_ids = [tx.pk for tx in old]
+
+    def archive(self):
+        call_command("archive_transactions", older_than_days=30, stdout=io.StringIO())
+
+    def test_archiving_moves_old_rows_out_of_the_table(self):
+        Transaction.objects.exclude(pk__in=self.old_ids).update(date_created=timezone.now() - timedelta(days=400))
+
+        self.archive()
+
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_rows_posted_to_the_ledger_are_archived(self):
+        withdraw_funds(self.user, 30)
+        settle_claimed(claim_pending("worker-a", 10))
+        Transaction.objects.update(date_created=timezone.now() - timedelta(days=400))
+        wallet = Wallet.objects.get(user=self.user)
+        balance = balance_as_of(wallet, timezone.now())
+        entries = list(LedgerEntry.objects.order_by("id").values_list("id", "transaction_id", "amount"))
+
+        self.archive()
+
+        self.assertFalse(Transaction.objects.exists())
+        # The ledger is untouched and its references resolve from the archive.
+        self.assertEqual(list(LedgerEntry.objects.order_by("id").values_list("id", "transaction_id", "amount")), entries)
+        self.assertEqual(
+            [(entry.get_transaction().pk, entry.get_transaction().amount) for entry in LedgerEntry.objects.order_by("id")],
+            [(transaction_id, amount) for _, transaction_id, amount in entries],
+        )
+        self.assertEqual(balance_as_of(wallet, timezone.now()), balance)
+        self.assertEqual(unbalanced_transactions(), [])
+        # So do the latest-transaction pointers behind the status endpoints.
+        response = self.client.get(reverse("withdraw-status"))
+        self.assertEqual((response.data["data"]["amount"], response.data["message"]), (30, "Your withdrawal is completed"))
+        self.assertEqual(self.client.get(reverse("deposit-status")).data["data"]["amount"], 50)
+        report, _ = reconcile(shards=1, workers=1, chunk_size=1000)
+        self.assertTrue(report.empty)
+
+    def test_archiving_changes_the_history_etag(self):
+        etag = self.client.get(reverse("transactions"))["ETag"]
+
+        self.archive()
+
+        self.assertEqual(self.client.get(reverse("transactions"), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_history_and_reconciliation_read_through_the_archive(self):
+        self.archive()
+
+        response = self.client.get(reverse("transactions"))
+        report, _ = reconcile(shards=1, workers=1, chunk_size=1000)
+
+        self.assertEqual(len(response.data["data"]), 6)
+        self.assertEqual(sum(row["amount"] for row in response.data["data"]), 170)
+        self.assertTrue(report.empty)
+
+
+class SeedSyntheticTests(TestCase):
+    def test_seeded_wallets_reconcile(self):
+        call_command(
+            "seed_synthetic", users=30, mean_transactions=5, days=60, workers=1, seed=3, stdout=io.StringIO(),
+        )
+
+        report, _ = reconcile(shards=1, workers=1, chunk_size=1000)
+
+        self.assertEqual(User.objects.filter(email__startswith="synthetic-").count(), 30)
+        self.assertEqual(Wallet.objects.count(), 30)
+        self.assertTrue(report.empty)
+
+    @override_settings(LEDGER_SNAPSHOT_INTERVAL=3)
+    def test_seeded_wallets_match_their_ledger(self):
+        call_command(
+            "seed_synthetic", users=30, mean_transactions=5, days=60, workers=1, seed=3, stdout=io.StringIO(),
+        )
+
+        now = timezone.now()
+        for wallet in Wallet.objects.all():
+            legs = LedgerEntry.objects.filter(wallet=wallet, account="wallet")
+            self.assertEqual(balance_as_of(wallet, now), wallet.available_amount)
+            self.assertEqual(legs.count(), wallet.ledger_sequence)
+            self.assertFalse(legs.filter(balance_after__lt=0).exists())
+        self.assertTrue(BalanceSnapshot.objects.filter(sequence=3).exists())
+        self.assertEqual(unbalanced_transactions(), [])
+
+
+@skipUnless(connection.vendor == "postgresql", "Transactions is only partitioned on PostgreSQL")
+class PartitionTests(TestCase):
+    def indexed_columns(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT regexp_replace(indexdef, '^.* USING ', '') FROM pg_indexes WHERE tablename = %s", [table]
+            )
+            return sorted(row[0] for row in cursor.fetchall())
+
+    def test_every_partition_has_the_filter_and_work_queue_indexes(self):
+        parent = self.indexed_columns(partitions.TABLE)
+
+        self.assertIn("btree (user_id, status, date_created DESC, id DESC)", parent)
+        self.assertIn("btree (user_id, transaction_type, status, date_created DESC, id DESC)", parent)
+        self.assertIn("btree (id) WHERE ((status)::text = 'pending'::text)", parent)
+        for _, name in partitions.list_partitions(connection):
+            self.assertEqual(self.indexed_columns(name), parent)
+        self.assertEqual(self.indexed_columns(partitions.DEFAULT_PARTITION), parent)
+
+    def test_months_still_holding_rows_are_not_detached(self):
+        user = make_user()
+        old = timezone.now() - timedelta(days=400)
+        partitions.ensure_partitions(connection, 1, since=old)
+        tx = Transaction.objects.create(user=user, transaction_type="deposit", amount=5, status="processed")
+        Transaction.objects.filter(pk=tx.pk).update(date_created=old)
+        attached = partitions.list_partitions(connection)
+
+        with self.assertRaises(partitions.PartitionError):
+            partitions.detach_partitions(connection, timezone.now() - timedelta(days=31))
+
+        self.assertEqual(partitions.list_partitions(connection), attached)
+
+    def test_archived_months_are_detached(self):
+        user = make_user()
+        old = timezone.now() - timedelta(days=400)
+        partitions.ensure_partitions(connection, 1, since=old)
+        deposit_funds(user, 100, "NGN")
+        withdraw_funds(user, 30, "NGN")
+        settle_claimed(claim_pending("worker-a", 10))
+        Transaction.objects.update(date_created=old)
+        directory = tempfile.mkdtemp(prefix="apexpay-archive-test-")
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+
+        with override_settings(TRANSACTION_ARCHIVE_DIR=directory):
+            call_command("archive_transactions", older_than_days=30, stdout=io.StringIO())
+            detached = partitions.detach_partitions(connection, timezone.now() - timedelta(days=31))
+            wallet = Wallet.objects.get(user=user)
+
+            self.assertIn(partitions.partition_name(partitions.month_start(old)), detached)
+            self.assertEqual(balance_as_of(wallet, timezone.now()), 70)
+            self.assertEqual(
+                sorted(entry.get_transaction().amount for entry in LedgerEntry.objects.filter(account="wallet")), [30, 100]
+            )
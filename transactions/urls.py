@@ -1,22 +1,31 @@
 # transactions/urls.py
 
+from django.conf import settings
 from django.urls import path
 
+from transactions import async_views, views
 from transactions.views import (
+    BatchTransactionView,
     DepositView,
-    TotalWithdraw,
     WithdrawView,
-    GetTransactions,
-    GetWallet,
-    GetDepositStatus,
-    GetWithdrawStatus,
-    TotalDeposit,
+    StatementExportView,
 )
 
+# Read-only endpoints come from async_views when serving under ASGI.
+read_views = async_views if settings.ASYNC_READ_VIEWS else views
+GetTransactions = read_views.GetTransactions
+GetWallet = read_views.GetWallet
+GetDepositStatus = read_views.GetDepositStatus
+GetWithdrawStatus = read_views.GetWithdrawStatus
+TotalDeposit = read_views.TotalDeposit
+TotalWithdraw = read_views.TotalWithdraw
+
 urlpatterns = [
     path("deposit/", DepositView.as_view(), name="deposit"),
     path("withdraw/", WithdrawView.as_view(), name='withdraw'),
     path("transactions/", GetTransactions.as_view(), name="transactions"),
+    path("transactions/batch/", BatchTransactionView.as_view(), name="transactions-batch"),
+    path("transactions/statement/", StatementExportView.as_view(), name="transactions-statement"),
     path("balance/", GetWallet.as_view(), name="acc-balance"),
     path("deposit-status/", GetDepositStatus.as_view(), name="deposit-status"),
     path("withdraw-status/", GetWithdrawStatus.as_view(), name='withdraw-status'),
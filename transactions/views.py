@@ -1,58 +1,108 @@
 # Django imports
-from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.db import router
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 
 # App imports
-from transactions.serializers import TransactionSerializer, WalletSerializer, StatusSerializer, TotalSerializer
-from transactions.models import Transaction, Wallet
+from transactions.serializers import (
+    BatchTransactionSerializer,
+    TransactionSerializer,
+    WalletSerializer,
+    StatusSerializer,
+    TotalSerializer,
+)
+from transactions.models import Transaction, TransactionSummary, Wallet
+from transactions.services import InsufficientFunds, PendingTransaction, apply_batch, deposit_funds, withdraw_funds
+from transactions.exports import COLUMNS, EXPORT_FORMATS
+from transactions import archive
+from transactions.idempotency import idempotent
+from transactions.conditional import conditional
+from transactions.pagination import TransactionCursorPagination
+from transactions.filters import TransactionFilter
 from accounts.models import User
+from apexpay_core.db_router import allow_replica_reads
 
 # rest_framework imports
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
 
+class ReplicaReadMixin:
+    """
+    GET requests read from a replica once the caller is known, unless they
+    wrote within the sticky window.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in ("GET", "HEAD"):
+            allow_replica_reads(request.user)
+
+
+class WalletMixin:
+    """
+    Per-request accessor for the caller's wallet in ``?currency=`` (the
+    default currency when omitted). The wallet is loaded once per request
+    together with its summary and latest-transaction pointers.
+    """
+
+    def get_currency(self):
+        currency = (self.request.query_params.get("currency") or settings.DEFAULT_CURRENCY).upper()
+        if currency not in settings.SUPPORTED_CURRENCIES:
+            raise ValidationError({"currency": "Unsupported currency"})
+        return currency
+
+    def get_wallet_queryset(self, currency):
+        return (
+            Wallet.objects.select_related("summary", "summary__last_deposit", "summary__last_withdraw")
+            .filter(user=self.request.user, currency=currency)
+        )
+
+    def get_wallet(self):
+        wallets = self.request.__dict__.setdefault("_wallets", {})
+        currency = self.get_currency()
+        if currency not in wallets:
+            wallets[currency] = self.get_wallet_queryset(currency).first()
+        return wallets[currency]
+
+    def get_summary(self):
+        return self.summary_of(self.get_wallet())
+
+    @staticmethod
+    def summary_of(wallet):
+        try:
+            return wallet.summary if wallet else None
+        except TransactionSummary.DoesNotExist:
+            return None
+
+
 class DepositView(GenericAPIView):
     serializer_class = TransactionSerializer
     permission_classes = [IsAuthenticated]
+    throttle_scope = "deposit"
 
+    @idempotent
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
 
         if serializer.is_valid():
             user = request.user
             amount = serializer.validated_data.get("amount")
+            currency = serializer.validated_data.get("currency")
 
-            # Auto-set transaction type
-            transaction_type = "deposit"
-
-            # Get or create user's wallet
-            user_wallet, _ = Wallet.objects.get_or_create(user=user)
-
-            # Check last deposit status
-            last_tx = Transaction.objects.filter(
-                user=user, transaction_type="deposit"
-            ).last()
-
-            if last_tx and last_tx.status == "pending":
+            # Credit wallet and record the transaction atomically
+            try:
+                deposit_funds(user, amount, currency)
+            except PendingTransaction:
                 return Response(
                     {"message": "You have a pending transaction. Contact support."},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Update wallet
-            user_wallet.available_amount += amount
-            user_wallet.save()
-
-            # Create transaction
-            Transaction.objects.create(
-                user=user,
-                transaction_type=transaction_type,
-                amount=amount,
-                status="processed"   # IMPORTANT: no pending by default
-            )
-
             return Response(
                 {"message": "Transaction successful"},
                 status=status.HTTP_201_CREATED
@@ -65,20 +115,17 @@ class DepositView(GenericAPIView):
 class WithdrawView(GenericAPIView):
     serializer_class = TransactionSerializer
     permission_classes = [IsAuthenticated]
+    throttle_scope = "withdraw"
     
+    @idempotent
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
         
         if serializer.is_valid():
-            user = get_object_or_404(User, pk=request.user.pk)
-            serializer.validated_data["user"] = user
+            user = request.user
             transaction_type = serializer.validated_data.get("transaction_type")
             amount = serializer.validated_data.get("amount")
-            user_wallet = Wallet.objects.get(user=user)
-
-            transaction_status = Transaction.objects.filter(user=user, transaction_type="withdraw")
-            last_tx = transaction_status.last()
-            current_status = last_tx.status if last_tx else None
+            currency = serializer.validated_data.get("currency")
 
             if transaction_type != "withdraw":
                 return Response(
@@ -86,47 +133,183 @@ class WithdrawView(GenericAPIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            if current_status == "pending":
+            try:
+                withdraw_funds(user, amount, currency)
+            except PendingTransaction:
                 return Response(
                     {"message": "You have a pending transaction. Contact support."},
                     status=status.HTTP_400_BAD_REQUEST
                 )
+            except InsufficientFunds:
+                return Response(
+                    {"message": "Insufficient funds"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
-            if user_wallet.available_amount >= amount:
-                user_wallet.available_amount -= amount
-                user_wallet.save()
-                Transaction.objects.create(**serializer.validated_data)
-                return Response({"message": "Transaction successful"}, status=status.HTTP_201_CREATED)
+            return Response({"message": "Transaction successful"}, status=status.HTTP_201_CREATED)
 
-            return Response(
-                {"message": "Insufficient funds"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class BatchTransactionView(GenericAPIView):
+    """
+    Submit many deposits/withdrawals in one request:
+    ``{"transactions": [{"transaction_type": "deposit", "amount": 100, "currency": "USD", "user": 7}, ...]}``
+
+    ``user`` defaults to the caller; submitting for other users needs the
+    ``transactions.add_transaction`` permission. Items are applied per user,
+    all or nothing, in the order given (a withdrawal must be covered by the
+    balance plus the deposits before it), and every item gets its own status
+    in the response.
+    """
+    serializer_class = BatchTransactionSerializer
+    permission_classes = [IsAuthenticated]
+    throttle_scope = "batch"
+
+    def post(self, request):
+        items = request.data.get("transactions") if isinstance(request.data, dict) else None
+        serializer = self.serializer_class(
+            data=items,
+            many=True,
+            allow_empty=False,
+            max_length=settings.TRANSACTION_BATCH_MAX_ITEMS,
+        )
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        results = [None] * len(items)
+        groups = {}
+        failed_users = {}
+        can_submit_for_others = request.user.has_perm("transactions.add_transaction")
+
+        for index, (raw, row) in enumerate(zip(items, serializer.validated_data)):
+            if row["errors"]:
+                results[index] = {"index": index, "status": "invalid", "errors": row["errors"]}
+                try:
+                    user_id = int(raw.get("user", request.user.pk))
+                except (AttributeError, TypeError, ValueError):
+                    continue
+                failed_users.setdefault(user_id, "Another item for this user is invalid")
+                continue
+
+            item = row["item"]
+            user_id = item.pop("user", request.user.pk)
+            if user_id != request.user.pk and not can_submit_for_others:
+                results[index] = {"index": index, "status": "rejected", "message": "Not allowed to submit for this user"}
+                failed_users.setdefault(user_id, "Not allowed to submit for this user")
+                continue
+            groups.setdefault(user_id, []).append((index, item))
+
+        active_users = set(
+            User.objects.filter(pk__in=groups.keys(), is_active=True).values_list("pk", flat=True)
+        )
+
+        for user_id, group in groups.items():
+            message = failed_users.get(user_id)
+            if message is None and user_id not in active_users:
+                message = "User does not exist or is not active"
+
+            if message is None:
+                try:
+                    transactions = apply_batch(user_id, [item for _, item in group])
+                except PendingTransaction:
+                    message = "You have a pending transaction. Contact support."
+                except InsufficientFunds:
+                    message = "Insufficient funds"
+                else:
+                    for (index, _), tx in zip(group, transactions):
+                        results[index] = {"index": index, "status": "accepted", "id": tx.pk, "transaction_status": tx.status}
+                    continue
+
+            for index, _ in group:
+                results[index] = {"index": index, "status": "rejected", "message": message}
+
+        return Response(
+            {"message": "Batch processed", "data": results},
+            status=status.HTTP_200_OK
+        )
 
 
-class GetTransactions(GenericAPIView):
+class GetTransactions(ReplicaReadMixin, GenericAPIView):
     serializer_class = TransactionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = TransactionCursorPagination
+    filter_backends = [TransactionFilter]
     
+    @conditional
     def get(self, request):
-        user = get_object_or_404(User, pk=request.user.id)
-        transactions = Transaction.objects.filter(user=user)
-        serializer = self.serializer_class(instance=transactions, many=True)
-        
+        user = request.user
+        transactions = self.filter_queryset(Transaction.objects.filter(user=user))
+        return self.page_response(self.paginate_queryset(transactions))
+
+    def page_response(self, page):
+        serializer = self.serializer_class(instance=page, many=True)
         return Response(
-            {"message": "Your transactions are below", "data": serializer.data},
+            {"message": "Your transactions are below", **self.paginator.get_paginated_data(serializer.data)},
             status=status.HTTP_200_OK
         )
 
 
-class GetWallet(GenericAPIView):
+class StatementExportView(ReplicaReadMixin, GenericAPIView):
+    """
+    Stream the caller's full history as a file, oldest first:
+    ``?export_format=csv|ndjson|xlsx`` plus the GetTransactions filters
+    (``date_from``, ``date_to``, ``transaction_type``, ``status``,
+    ``currency``). Users with ``transactions.view_transaction`` can pass
+    ``?user=`` to export someone else's statement.
+    """
+    serializer_class = TransactionSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [TransactionFilter]
+
+    def get(self, request):
+        export_format = request.query_params.get("export_format", "csv").lower()
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"message": "export_format must be one of: " + ", ".join(EXPORT_FORMATS)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        user_id = request.user.pk
+        if request.query_params.get("user"):
+            if not request.user.has_perm("transactions.view_transaction"):
+                return Response({"message": "Not allowed to export this user's statement"}, status=status.HTTP_403_FORBIDDEN)
+            try:
+                user_id = int(request.query_params["user"])
+            except ValueError:
+                return Response({"message": "Invalid user"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # The rows are read while the response streams, after the request's
+        # routing state is gone, so pin the database chosen for it now.
+        transactions = self.filter_queryset(
+            Transaction.objects.using(router.db_for_read(Transaction)).filter(user_id=user_id)
+        )
+        rows = archive.merge_values(
+            transactions,
+            transactions.order_by("date_created", "id").values_list(*COLUMNS)
+            .iterator(chunk_size=settings.STATEMENT_EXPORT_CHUNK_SIZE),
+            COLUMNS,
+        )
+        stream, content_type = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(stream(rows), content_type=content_type)
+        response["Content-Disposition"] = 'attachment; filename="statement-{}-{}.{}"'.format(
+            user_id, timezone.now().strftime("%Y%m%d%H%M%S"), export_format
+        )
+        return response
+
+
+class GetWallet(ReplicaReadMixin, WalletMixin, GenericAPIView):
     serializer_class = WalletSerializer
     permission_classes = [IsAuthenticated]
     
+    @conditional
     def get(self, request):
-        user = get_object_or_404(User, pk=request.user.id)
-        balance = Wallet.objects.filter(user=user)
-        serializer = self.serializer_class(instance=balance, many=True)
+        return self.wallet_response(self.get_wallet())
+
+    def wallet_response(self, wallet):
+        if wallet is None:
+            return Response({"message": "You have no wallet in this currency"}, status=status.HTTP_404_NOT_FOUND)
+        serializer = self.serializer_class(instance=wallet)
         
         return Response(
             {"message": "Balance retrieved", "data": serializer.data},
@@ -134,92 +317,125 @@ class GetWallet(GenericAPIView):
         )
 
 
-class GetDepositStatus(GenericAPIView):
+class TransactionStatusView(ReplicaReadMixin, WalletMixin, GenericAPIView):
+    """
+    Status of the user's latest transaction of ``transaction_type`` in
+    ``?currency=``, read from the summary's latest-transaction pointer. Pass
+    ``?history=true`` to also get that type's history, one cursor page at a
+    time.
+    """
     serializer_class = StatusSerializer
     permission_classes = [IsAuthenticated]
-    
+    pagination_class = TransactionCursorPagination
+    transaction_type = None
+    messages = {}
+
+    @conditional
     def get(self, request):
-        user = get_object_or_404(User, pk=request.user.id)
-        transaction_status = Transaction.objects.filter(user=user, transaction_type="deposit")
-        last_tx = transaction_status.last()
-        current_status = last_tx.status if last_tx else None
-        serializer = self.serializer_class(instance=transaction_status, many=True)
+        last_tx = self.latest_of(self.get_summary())
+        history = None
+        if last_tx and self.wants_history():
+            history = self.paginate_queryset(self.get_history_queryset())
+        return self.status_response(last_tx, history)
+
+    def latest_of(self, summary):
+        if not summary:
+            return None
+        latest = getattr(summary, f"last_{self.transaction_type}")
+        pointer = getattr(summary, f"last_{self.transaction_type}_id")
+        if latest is None and pointer:
+            # Archived since it became the latest one.
+            row = archive.find(self.request.user.pk, pointer)
+            latest = Transaction(**row) if row else None
+        return latest
+
+    def wants_history(self):
+        return self.request.query_params.get("history", "").lower() in ("true", "1", "yes")
+
+    def get_history_queryset(self):
+        return Transaction.objects.filter(
+            user=self.request.user, transaction_type=self.transaction_type, currency=self.get_currency()
+        )
 
-        if not current_status:
+    def status_response(self, last_tx, history=None):
+        if not last_tx:
             return Response({"message": "You have no transaction records yet"}, status=status.HTTP_200_OK)
 
-        messages = {
-            "pending": "Your deposit is pending",
-            "processing": "Your deposit is processing",
-            "processed": "Your deposit is completed",
+        data = {
+            "message": self.messages.get(last_tx.status, "No records"),
+            "data": self.serializer_class(instance=last_tx).data,
         }
 
-        return Response(
-            {"message": messages.get(current_status, "No records"), "data": serializer.data},
-            status=status.HTTP_200_OK
-        )
+        if history is not None:
+            paginated = self.paginator.get_paginated_data(self.serializer_class(instance=history, many=True).data)
+            data["history"] = paginated["data"]
+            data["next_cursor"] = paginated["next_cursor"]
 
+        return Response(data, status=status.HTTP_200_OK)
 
-class GetWithdrawStatus(GenericAPIView):
-    serializer_class = StatusSerializer
-    permission_classes = [IsAuthenticated]
-    
-    def get(self, request):
-        user = get_object_or_404(User, pk=request.user.id)
-        transaction_status = Transaction.objects.filter(user=user, transaction_type="withdraw")
-        last_tx = transaction_status.last()
-        current_status = last_tx.status if last_tx else None
-        serializer = self.serializer_class(instance=transaction_status, many=True)
 
-        if not current_status:
-            return Response({"message": "You have no transaction records yet"}, status=status.HTTP_200_OK)
+class GetDepositStatus(TransactionStatusView):
+    transaction_type = "deposit"
+    messages = {
+        "pending": "Your deposit is pending",
+        "processing": "Your deposit is processing",
+        "processed": "Your deposit is completed",
+    }
 
-        messages = {
-            "pending": "Your withdrawal is pending",
-            "processing": "Your withdrawal is processing",
-            "processed": "Your withdrawal is completed",
-        }
 
-        return Response(
-            {"message": messages.get(current_status, "No records"), "data": serializer.data},
-            status=status.HTTP_200_OK
-        )
+class GetWithdrawStatus(TransactionStatusView):
+    transaction_type = "withdraw"
+    messages = {
+        "pending": "Your withdrawal is pending",
+        "processing": "Your withdrawal is processing",
+        "processed": "Your withdrawal is completed",
+    }
 
 
-class TotalDeposit(GenericAPIView):
+class TotalDeposit(ReplicaReadMixin, WalletMixin, GenericAPIView):
     serializer_class = TotalSerializer
     permission_classes = [IsAuthenticated]
+    summary_totals = "deposit"
     
+    @conditional
     def get(self, request):
-        user = get_object_or_404(User, pk=request.user.id)
-        total_deposit = Transaction.objects.filter(
-            user=user, transaction_type="deposit", status="processed"
-        )
-        serializer = self.serializer_class(instance=total_deposit, many=True)
+        return self.total_response(self.get_summary())
 
-        if total_deposit.count() == 0:
+    def total_response(self, summary):
+        if not summary or summary.deposit_count == 0:
             return Response({"message": "You have no transaction records yet"}, status=status.HTTP_200_OK)
 
+        serializer = self.serializer_class(instance={
+            "total": summary.total_deposited,
+            "count": summary.deposit_count,
+            "last_activity": summary.last_deposit_activity,
+        })
+
         return Response(
             {"message": "Total deposit amount", "data": serializer.data},
             status=status.HTTP_200_OK
         )
 
 
-class TotalWithdraw(GenericAPIView):
+class TotalWithdraw(ReplicaReadMixin, WalletMixin, GenericAPIView):
     serializer_class = TotalSerializer
     permission_classes = [IsAuthenticated]
+    summary_totals = "withdraw"
 
+    @conditional
     def get(self, request):
-        user = get_object_or_404(User, pk=request.user.id)
-        total_withdraw = Transaction.objects.filter(
-            user=user, transaction_type="withdraw", status="processed"
-        )
-        serializer = self.serializer_class(instance=total_withdraw, many=True)
+        return self.total_response(self.get_summary())
 
-        if total_withdraw.count() == 0:
+    def total_response(self, summary):
+        if not summary or summary.withdraw_count == 0:
             return Response({"message": "You have no transaction records yet"}, status=status.HTTP_200_OK)
 
+        serializer = self.serializer_class(instance={
+            "total": summary.total_withdrawn,
+            "count": summary.withdraw_count,
+            "last_activity": summary.last_withdraw_activity,
+        })
+
         return Response(
             {"message": "Total withdraw amount", "data": serializer.data},
             status=status.HTTP_200_OK